@@ -0,0 +1,97 @@
+"""
+Per-user activity for Competitive Programming Platform: a daily solve
+heatmap, solve streaks and points per week. Everything is derived from one
+grouped-by-day query over the submissions(user_id, solved_at) index.
+"""
+from __future__ import annotations
+from datetime import date, datetime
+from typing import TYPE_CHECKING
+from sqlalchemy import func
+from models import get_session, Problem, Submission
+
+if TYPE_CHECKING:
+    import numpy as np
+
+HEATMAP_WEEKS = 53
+WEEKLY_POINTS_WEEKS = 26
+
+
+def _daily_totals(user_id: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(day ordinals, solves, points) for each day the user solved something, in order."""
+    session = get_session()
+    try:
+        day = func.date(Submission.solved_at)
+        rows = session.query(
+            day,
+            func.count(Submission.id),
+            func.coalesce(func.sum(Problem.points), 0)
+        ).outerjoin(
+            Problem, Submission.problem_id == Problem.id
+        ).filter(
+            Submission.user_id == user_id,
+            Submission.solved_at.isnot(None)
+        ).group_by(day).order_by(day).all()
+    finally:
+        session.close()
+    import numpy as np  # Imported on first use, so pages importing this module start faster
+    days = np.array([date.fromisoformat(row[0]).toordinal() for row in rows], dtype=np.int64)
+    solves = np.array([row[1] for row in rows], dtype=np.int64)
+    points = np.array([row[2] for row in rows], dtype=np.int64)
+    return days, solves, points
+
+
+def _streaks(days: np.ndarray, today: int) -> tuple[int, int]:
+    """(current, longest) runs of consecutive days. The current run may end yesterday."""
+    days = days[days <= today]  # Clock skew can put a solve after today
+    if not len(days):
+        return 0, 0
+    import numpy as np
+    # Start a new run wherever the gap to the previous active day is not exactly one
+    breaks = np.flatnonzero(np.diff(days) != 1) + 1
+    starts = np.concatenate(([0], breaks))
+    lengths = np.diff(np.concatenate((starts, [len(days)])))
+    current = int(lengths[-1]) if today - days[-1] <= 1 else 0
+    return current, int(lengths.max())
+
+
+def get_activity(user_id: int, today: date | None = None) -> dict:
+    """
+    Get a user's activity summary:
+        heatmap: [{"date", "week", "weekday", "solves"}] for the last HEATMAP_WEEKS weeks
+        current_streak, longest_streak: consecutive days with a solve
+        active_days: days with at least one solve
+        weekly_points: [{"week", "points"}] for the last WEEKLY_POINTS_WEEKS weeks
+    """
+    import numpy as np
+    today = today or datetime.utcnow().date()
+    end = today.toordinal()
+    days, solves, points = _daily_totals(user_id)
+    current_streak, longest_streak = _streaks(days, end)
+
+    # Heatmap grid: whole weeks (Monday first) ending with the current week
+    first = end - today.weekday() - 7 * (HEATMAP_WEEKS - 1)
+    grid = np.zeros(end - first + 1, dtype=np.int64)
+    recent = (days >= first) & (days <= end)  # Clock skew can put a solve after today
+    grid[days[recent] - first] = solves[recent]
+    offsets = np.arange(len(grid))
+    heatmap = [
+        {"date": date.fromordinal(first + int(i)), "week": int(week), "weekday": int(weekday), "solves": int(count)}
+        for i, week, weekday, count in zip(offsets, offsets // 7, offsets % 7, grid)
+    ]
+
+    # Points per week, summed with one bincount over week offsets
+    week_start = end - today.weekday() - 7 * (WEEKLY_POINTS_WEEKS - 1)
+    in_range = (days >= week_start) & (days <= end)
+    weekly = np.bincount((days[in_range] - week_start) // 7, weights=points[in_range], minlength=WEEKLY_POINTS_WEEKS)
+    weekly_points = [
+        {"week": date.fromordinal(week_start + 7 * i), "points": int(total)}
+        for i, total in enumerate(weekly)
+    ]
+
+    return {
+        "heatmap": heatmap,
+        "current_streak": current_streak,
+        "longest_streak": longest_streak,
+        "active_days": len(days),
+        "weekly_points": weekly_points
+    }
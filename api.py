@@ -0,0 +1,366 @@
+"""
+Read-only JSON API for Competitive Programming Platform.
+Runs as a separate process next to the Streamlit app and shares its
+models and queries. Responses carry an ETag derived from the data version,
+which a background thread keeps in memory, so polls for unchanged data are
+answered with 304 (or from the response cache) without touching the DB.
+
+Endpoints:
+    GET /leaderboard?window=all|weekly|monthly&offset=0&limit=50
+    GET /users/{id}/stats
+    GET /problems?page=1&per_page=50
+    GET /health
+
+Usage:
+    python api.py --port 8502
+    python api.py --bench --scale small
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+VERSION_POLL_SECONDS = float(os.environ.get("CP_API_VERSION_POLL_SECONDS", "1.0"))
+WINDOW_BUCKET_SECONDS = 300  # Weekly/monthly windows slide; their ETags roll over this often
+RESPONSE_CACHE_SIZE = 1024
+MAX_LIMIT = 500
+MAX_ID = 2**63 - 1  # SQLite integers are signed 64-bit
+MAX_OFFSET = MAX_ID - MAX_LIMIT  # offset + limit is bound as one SQL integer
+WINDOWS = ("all", "weekly", "monthly")
+USER_STATS_PATH = re.compile(r"^/users/(\d{1,19})/stats$")
+
+
+class ApiError(Exception):
+    """An error response with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+class DataVersionWatcher:
+    """Keeps the global data version in memory, refreshed on a background thread."""
+
+    def __init__(self, interval: float = VERSION_POLL_SECONDS):
+        self.interval = interval
+        self.version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def refresh(self) -> int:
+        from models import get_data_version
+        self.version = get_data_version()
+        return self.version
+
+    def start(self):
+        self.refresh()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"API version refresh error: {e}")
+
+    def stop(self):
+        self._stop.set()
+
+
+def _int_arg(query: dict, name: str, default: int, minimum: int = 0, maximum: int | None = None) -> int:
+    raw = query.get(name, [None])[0]
+    if raw is None or raw == "":
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be an integer.")
+    if value < minimum:
+        raise ApiError(400, f"'{name}' must be at least {minimum}.")
+    if maximum is not None and value > maximum:
+        raise ApiError(400, f"'{name}' must be at most {maximum}.")
+    return value
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def leaderboard_view(query: dict) -> dict:
+    from leaderboard import get_leaderboard_page
+    window = query.get("window", ["all"])[0]
+    if window not in WINDOWS:
+        raise ApiError(400, f"'window' must be one of {', '.join(WINDOWS)}.")
+    offset = _int_arg(query, "offset", 0, 0, MAX_OFFSET)
+    limit = _int_arg(query, "limit", 50, 1, MAX_LIMIT)
+    entries, total = get_leaderboard_page(window, offset=offset, limit=limit)
+    return {"window": window, "offset": offset, "limit": limit, "total": total, "entries": entries}
+
+
+def _username(user_id: int) -> str:
+    """Username for `user_id`, or a 404 if there is no such user."""
+    from models import get_session, User
+    if user_id > MAX_ID:
+        raise ApiError(404, f"User {user_id} not found.")
+    session = get_session()
+    try:
+        username = session.query(User.username).filter(User.id == user_id).scalar()
+    finally:
+        session.close()
+    if username is None:
+        raise ApiError(404, f"User {user_id} not found.")
+    return username
+
+
+def user_stats_view(user_id: int) -> dict:
+    from leaderboard import get_user_stats
+    username = _username(user_id)
+    return {"user_id": user_id, "username": username, **get_user_stats(user_id)}
+
+
+def problems_view(query: dict) -> dict:
+    from problems import list_problems, count_problems
+    page = _int_arg(query, "page", 1, 1, MAX_OFFSET // MAX_LIMIT + 1)
+    per_page = _int_arg(query, "per_page", 50, 1, MAX_LIMIT)
+    rows = list_problems(limit=per_page, offset=(page - 1) * per_page)
+    return {
+        "page": page,
+        "per_page": per_page,
+        "total": count_problems(),
+        "problems": [
+            {
+                "id": row.id,
+                "title": row.title,
+                "problem_url": row.problem_url,
+                "points": row.points,
+                "cf_label": row.cf_label,
+                "created_at": row.created_at
+            }
+            for row in rows
+        ]
+    }
+
+
+class ApiApp:
+    """Routing, ETags and the response cache, independent of the HTTP server."""
+
+    def __init__(self, watcher: DataVersionWatcher):
+        self.watcher = watcher
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[str, tuple[str, bytes]] = OrderedDict()
+
+    def etag_for(self, path: str, query: dict) -> str:
+        """ETag for a resource at the current data version."""
+        tag = f"v{self.watcher.version}"
+        if path == "/leaderboard" and query.get("window", ["all"])[0] != "all":
+            tag += f"-w{int(time.time() // WINDOW_BUCKET_SECONDS)}"
+        return f'"{tag}"'
+
+    def route(self, path: str, query: dict) -> dict:
+        if path == "/leaderboard":
+            return leaderboard_view(query)
+        if path == "/problems":
+            return problems_view(query)
+        return user_stats_view(int(USER_STATS_PATH.match(path).group(1)))
+
+    def handle(self, target: str, if_none_match: str | None) -> tuple[int, dict[str, str], bytes]:
+        """Serve one GET. Returns (status, headers, body)."""
+        url = urlparse(target)
+        query = parse_qs(url.query)
+        if url.path == "/health":
+            body = json.dumps({"status": "ok", "data_version": self.watcher.version}).encode()
+            return 200, {"Cache-Control": "no-store"}, body
+
+        if url.path not in ("/leaderboard", "/problems") and not USER_STATS_PATH.match(url.path):
+            raise ApiError(404, f"No such endpoint: {url.path}")
+
+        etag = self.etag_for(url.path, query)
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        tags = {tag.strip().removeprefix("W/") for tag in (if_none_match or "").split(",")}
+        if "*" in tags:
+            # Matches any current representation (RFC 9110), so only a missing user falls through to 404
+            match = USER_STATS_PATH.match(url.path)
+            if match:
+                _username(int(match.group(1)))
+            return 304, headers, b""
+        if etag in tags:
+            return 304, headers, b""
+
+        key = f"{url.path}?{'&'.join(f'{k}={v}' for k, values in sorted(query.items()) for v in values)}"
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached and cached[0] == etag:
+                self._cache.move_to_end(key)
+                return 200, headers, cached[1]
+
+        body = json.dumps(self.route(url.path, query), default=_json_default).encode()
+        with self._lock:
+            self._cache[key] = (etag, body)
+            self._cache.move_to_end(key)
+            while len(self._cache) > RESPONSE_CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return 200, headers, body
+
+
+def make_server(host: str = "127.0.0.1", port: int = 8502, watcher: DataVersionWatcher | None = None):
+    """Create the HTTP server (not yet serving). Returns (server, watcher)."""
+    from metrics import get_registry
+
+    watcher = watcher or DataVersionWatcher()
+    watcher.start()
+    app = ApiApp(watcher)
+    metrics = get_registry()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # Headers and body go out in separate writes
+
+        def _send(self, status: int, headers: dict[str, str], body: bytes):
+            self.send_response(status)
+            if status != 304:
+                self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            start = time.perf_counter()
+            endpoint = urlparse(self.path).path
+            endpoint = "/users/{id}/stats" if USER_STATS_PATH.match(endpoint) else endpoint
+            try:
+                status, headers, body = app.handle(self.path, self.headers.get("If-None-Match"))
+            except ApiError as e:
+                status, headers, body = e.status, {}, json.dumps({"error": str(e)}).encode()
+            except Exception:
+                # Details go to the server log only, never to the client
+                print(f"API error on GET {self.path}:")
+                traceback.print_exc()
+                status, headers, body = 500, {}, json.dumps({"error": "Internal server error."}).encode()
+            self._send(status, headers, body)
+            metrics.inc("cp_api_requests_total", {"endpoint": endpoint, "status": str(status)})
+            metrics.observe("cp_api_request_milliseconds", (time.perf_counter() - start) * 1000, {"endpoint": endpoint})
+
+        def do_POST(self):
+            self._send(405, {"Allow": "GET"}, json.dumps({"error": "This API is read-only."}).encode())
+
+        do_PUT = do_PATCH = do_DELETE = do_POST
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    return server, watcher
+
+
+def run_benchmark(scale: str, seconds: float, clients: int, db: str | None) -> dict:
+    """
+    Measure requests per second against a scratch database: full responses
+    for each endpoint (response cache warm) and conditional polls that get 304.
+    """
+    import http.client
+    import tempfile
+    import models
+    from benchmarks import SCALES, generate_data
+
+    db_path = db or os.path.join(tempfile.mkdtemp(), "api_bench.db")
+    if not db:
+        generate_data(db_path, seed=7, progress=lambda message: None, **SCALES[scale])
+    models.use_database(f"sqlite:///{db_path}")
+    models.init_db()
+
+    server, watcher = make_server(port=0)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    cases = {
+        "leaderboard[all]": ("/leaderboard?window=all&limit=50", False),
+        "leaderboard[weekly]": ("/leaderboard?window=weekly&limit=50", False),
+        "users/stats": ("/users/2/stats", False),
+        "problems[page1]": ("/problems?page=1", False),
+        "leaderboard[all] 304": ("/leaderboard?window=all&limit=50", True),
+        "problems[page1] 304": ("/problems?page=1", True),
+    }
+
+    def client(path: str, conditional: bool, deadline: float, counts: list, index: int):
+        connection = http.client.HTTPConnection("127.0.0.1", port)
+        etag = None
+        done = 0
+        while time.perf_counter() < deadline:
+            connection.request("GET", path, headers={"If-None-Match": etag} if conditional and etag else {})
+            response = connection.getresponse()
+            response.read()
+            etag = response.getheader("ETag")
+            done += 1
+        connection.close()
+        counts[index] = done
+
+    results = {}
+    try:
+        for name, (path, conditional) in cases.items():
+            counts = [0] * clients
+            deadline = time.perf_counter() + seconds
+            threads = [
+                threading.Thread(target=client, args=(path, conditional, deadline, counts, i))
+                for i in range(clients)
+            ]
+            start = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - start
+            results[name] = {"requests": sum(counts), "rps": round(sum(counts) / elapsed, 1)}
+            print(f"  {name:<28} {results[name]['rps']:>10.1f} req/s  ({sum(counts)} requests)")
+    finally:
+        server.shutdown()
+        server.server_close()
+        watcher.stop()
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Serve the CP Platform read-only JSON API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--bench", action="store_true", help="run the local requests-per-second benchmark")
+    parser.add_argument("--scale", default="small", help="benchmark data scale (see benchmarks.py)")
+    parser.add_argument("--db", help="benchmark against this existing database instead of generating one")
+    parser.add_argument("--seconds", type=float, default=3.0, help="benchmark duration per case")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent benchmark clients")
+    args = parser.parse_args(argv)
+
+    if args.bench:
+        print(f"API benchmark (scale={args.scale}, clients={args.clients}, {args.seconds}s per case)")
+        run_benchmark(args.scale, args.seconds, args.clients, args.db)
+        return 0
+
+    import models
+    models.init_db()  # Creates or migrates the schema, like the app and the CLI do on startup
+    server, watcher = make_server(args.host, args.port)
+    print(f"Serving CP Platform API on http://{args.host}:{server.server_address[1]}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        watcher.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
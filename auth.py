@@ -1,14 +1,36 @@
 """
 Authentication module for Competitive Programming Platform.
 Handles login, registration, password change, and session management.
+The models (and SQLAlchemy) are imported on first use, so the login page
+can render while the database is still being initialized in the background.
 """
+import threading
 import streamlit as st
-from models import User, get_session, init_db
+
+_db_lock = threading.Lock()
+_initialized_urls = set()  # Databases initialized by this process
+_warmup_started = False
 
 
 def ensure_db_initialized():
-    """Ensure database is initialized."""
-    init_db()
+    """Initialize the database once per process; later calls return immediately."""
+    import models
+    if models.DATABASE_URL in _initialized_urls:
+        return
+    with _db_lock:
+        if models.DATABASE_URL not in _initialized_urls:
+            models.init_db()
+            _initialized_urls.add(models.DATABASE_URL)
+
+
+def warm_up_db():
+    """Start database initialization on a background thread (once per process)."""
+    global _warmup_started
+    with _db_lock:
+        if _warmup_started:
+            return
+        _warmup_started = True
+    threading.Thread(target=ensure_db_initialized, name="db-warmup", daemon=True).start()
 
 
 def login(username: str, password: str) -> bool:
@@ -16,6 +38,8 @@ def login(username: str, password: str) -> bool:
     Attempt to log in a user.
     Returns True if successful, False otherwise.
     """
+    from models import User, get_session
+    ensure_db_initialized()
     session = get_session()
     try:
         user = session.query(User).filter(User.username == username).first()
@@ -40,6 +64,8 @@ def register(username: str, password: str) -> tuple[bool, str]:
     if len(password) < 6:
         return False, "Password must be at least 6 characters."
     
+    from models import User, get_session, bump_data_version
+    ensure_db_initialized()
     session = get_session()
     try:
         # Check if username exists
@@ -51,6 +77,7 @@ def register(username: str, password: str) -> tuple[bool, str]:
         user = User(username=username, is_admin=False)
         user.set_password(password)
         session.add(user)
+        bump_data_version(session)
         session.commit()
         return True, "Registration successful! Please log in."
     except Exception as e:
@@ -68,6 +95,7 @@ def change_password(user_id: int, current_password: str, new_password: str) -> t
     if len(new_password) < 6:
         return False, "New password must be at least 6 characters."
     
+    from models import User, get_session
     session = get_session()
     try:
         user = session.query(User).filter(User.id == user_id).first()
@@ -116,6 +144,7 @@ def get_current_username() -> str | None:
 
 def update_cf_handle(user_id: int, cf_handle: str) -> tuple[bool, str]:
     """Update user's Codeforces handle."""
+    from models import User, get_session
     session = get_session()
     try:
         user = session.query(User).filter(User.id == user_id).first()
@@ -134,6 +163,7 @@ def update_cf_handle(user_id: int, cf_handle: str) -> tuple[bool, str]:
 
 def get_user_cf_handle(user_id: int) -> str | None:
     """Get user's Codeforces handle."""
+    from models import User, get_session
     session = get_session()
     try:
         user = session.query(User).filter(User.id == user_id).first()
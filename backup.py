@@ -0,0 +1,291 @@
+"""
+Online backup and data export for Competitive Programming Platform.
+Backups use SQLite's online backup API. The app keeps its database in WAL
+mode (models.enable_wal), so a backup copies one read snapshot in a single
+step without blocking writers. A database still in rollback-journal mode
+is copied a batch of pages at a time, pausing between steps so the app
+keeps writing; a write from another connection restarts that copy, and
+each restart backs off and retries with larger (but bounded) steps. Exports
+write users, problems and submissions to CSV or Parquet in fixed-size
+chunks read by id, so memory stays bounded and no read holds the database
+for the whole export.
+Both report progress and throughput through an optional
+`progress(fraction, message)` callback.
+"""
+import csv
+import os
+import sqlite3
+import time
+from datetime import datetime
+from sqlalchemy import func, select
+import models
+from models import User, Problem, Submission
+
+BACKUP_DIR = os.environ.get("CP_BACKUP_DIR", os.path.join(models.DATA_DIR, "backups"))
+EXPORT_DIR = os.path.join(models.DATA_DIR, "exports")
+BACKUP_STEP_PAGES = 1024  # Pages copied per step (4 MB at the default page size)
+# Pause after each step so writers get the lock (sqlite3's own `sleep` only applies after SQLITE_BUSY/LOCKED)
+BACKUP_STEP_SLEEP = 0.005
+BACKUP_MAX_STEP_PAGES = 32 * 1024  # Step size cap after restarts (128 MB, ~0.25s of lock at ~2s per GB)
+BACKUP_MAX_BACKOFF = 2.0  # Longest pause before retrying after a restart, in seconds
+BACKUP_MAX_SECONDS = 600
+EXPORT_CHUNK_ROWS = 50_000  # Also the Parquet row group size
+EXPORT_FORMATS = ["csv", "parquet"]
+
+# Exported columns per table (no password hashes)
+EXPORT_TABLES = {
+    "users": [User.id, User.username, User.cf_handle, User.is_admin, User.created_at],
+    "problems": [
+        Problem.id, Problem.title, Problem.problem_url, Problem.points, Problem.base_points,
+        Problem.cf_rating, Problem.cf_contest_id, Problem.cf_problem_index, Problem.added_by, Problem.created_at
+    ],
+    "submissions": [
+        Submission.id, Submission.user_id, Submission.problem_id, Submission.solved_at, Submission.cf_submission_id
+    ],
+}
+
+
+class _Restarted(Exception):
+    pass
+
+
+def _database_path() -> str | None:
+    url = models.engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    return url.database
+
+
+def _rate(amount: float, seconds: float) -> float:
+    return amount / seconds if seconds > 0 else 0.0
+
+
+def list_backups() -> list[tuple[str, int, datetime]]:
+    """Get [(path, size_bytes, modified_at)] for existing backups, newest first."""
+    if not os.path.isdir(BACKUP_DIR):
+        return []
+    backups = []
+    for name in os.listdir(BACKUP_DIR):
+        if name.endswith(".db"):
+            path = os.path.join(BACKUP_DIR, name)
+            stat = os.stat(path)
+            backups.append((path, stat.st_size, datetime.fromtimestamp(stat.st_mtime)))
+    return sorted(backups, key=lambda backup: backup[2], reverse=True)
+
+
+def prune_backups(keep: int) -> int:
+    """Delete all but the newest `keep` backups. Returns the number deleted."""
+    stale = list_backups()[keep:]
+    for path, _, _ in stale:
+        os.remove(path)
+    return len(stale)
+
+
+def backup_database(dest: str | None = None, step_pages: int = BACKUP_STEP_PAGES,
+                    keep: int | None = None, progress=None) -> tuple[bool, str]:
+    """
+    Copy the live database to `dest` (default: a timestamped file in
+    BACKUP_DIR) with the online backup API. A WAL database is copied in one
+    step; otherwise `step_pages` pages per step, doubled after each restart
+    up to BACKUP_MAX_STEP_PAGES. The copy is written next to `dest` and
+    renamed once it passes PRAGMA quick_check. Returns (success, message).
+    """
+    source_path = _database_path()
+    if source_path is None:
+        return False, "Online backup is only supported for file-based SQLite databases."
+
+    dest = dest or os.path.join(BACKUP_DIR, f"cp_platform-{datetime.utcnow():%Y%m%d-%H%M%S}.db")
+    os.makedirs(os.path.dirname(os.path.abspath(dest)), exist_ok=True)
+    partial = dest + ".partial"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    start = time.perf_counter()
+    with models.engine.connect():
+        pass  # The engine's first connection switches a rollback-journal database to WAL
+    source = sqlite3.connect(source_path)
+    target = sqlite3.connect(partial)
+    restarts = 0
+    try:
+        page_size = source.execute("PRAGMA page_size").fetchone()[0]
+        wal = source.execute("PRAGMA journal_mode").fetchone()[0].lower() == "wal"
+        last_remaining = None
+
+        def timed_out() -> TimeoutError:
+            reason = f", restarted {restarts} times by concurrent writes" if restarts else ""
+            return TimeoutError(
+                f"backup did not finish within {BACKUP_MAX_SECONDS}s{reason}; retry when writes "
+                f"are quieter or switch the database to WAL mode (PRAGMA journal_mode=WAL)"
+            )
+
+        def step(status, remaining, total):
+            nonlocal last_remaining
+            elapsed = time.perf_counter() - start
+            if last_remaining is not None and remaining > last_remaining:
+                raise _Restarted()
+            if elapsed > BACKUP_MAX_SECONDS:
+                raise timed_out()
+            last_remaining = remaining
+            if progress and total:
+                done = total - remaining
+                progress(done / total, f"Copied {done}/{total} pages "
+                                       f"({_rate(done * page_size / 2**20, elapsed):.1f} MB/s)")
+            if remaining:
+                # The source is unlocked between steps; this is the writers' window
+                time.sleep(BACKUP_STEP_SLEEP)
+
+        # In WAL mode one step reads a snapshot while writers keep appending to the WAL
+        pages = -1 if wal else step_pages
+        while True:
+            last_remaining = None
+            try:
+                source.backup(target, pages=pages, progress=step, sleep=BACKUP_STEP_SLEEP)
+                break
+            except _Restarted:
+                restarts += 1
+                backoff = min(BACKUP_STEP_SLEEP * 2 ** restarts, BACKUP_MAX_BACKOFF)
+                if time.perf_counter() - start + backoff > BACKUP_MAX_SECONDS:
+                    raise timed_out()
+                pages = max(step_pages, min(pages * 2, BACKUP_MAX_STEP_PAGES))
+                if progress:
+                    progress(0.0, f"Restarted by a concurrent write ({restarts}); "
+                                  f"retrying in {backoff:.2f}s with {pages}-page steps")
+                time.sleep(backoff)
+        check = target.execute("PRAGMA quick_check").fetchone()[0]
+        if check != "ok":
+            raise sqlite3.DatabaseError(f"quick_check failed: {check}")
+    except Exception as e:
+        target.close()
+        os.remove(partial)
+        return False, f"Error: {str(e)}"
+    finally:
+        source.close()
+    target.close()
+    os.replace(partial, dest)
+
+    elapsed = time.perf_counter() - start
+    size_mb = os.path.getsize(dest) / 2**20
+    message = f"Backed up {size_mb:.1f} MB to {dest} in {elapsed:.2f}s ({_rate(size_mb, elapsed):.1f} MB/s)."
+    if restarts:
+        message += f" Restarted {restarts} times by concurrent writes."
+    if keep is not None:
+        pruned = prune_backups(keep)
+        if pruned:
+            message += f" Removed {pruned} old backups."
+    if progress:
+        progress(1.0, message)
+    return True, message
+
+
+def _parquet_schema(columns):
+    import pyarrow as pa
+    types = {int: pa.int64(), str: pa.string(), bool: pa.bool_(), datetime: pa.timestamp("us")}
+    return pa.schema([(column.key, types[column.type.python_type]) for column in columns])
+
+
+class _CsvWriter:
+    def __init__(self, path: str, columns):
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([column.key for column in columns])
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, columns):
+        import pyarrow.parquet as pq
+        self.schema = _parquet_schema(columns)
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        import pyarrow as pa
+        values = list(zip(*rows))
+        self.writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(values, self.schema)],
+            schema=self.schema
+        ))
+
+    def close(self):
+        self.writer.close()
+
+
+def export_table(table: str, dest_dir: str | None = None, fmt: str = "csv",
+                 chunk_rows: int = EXPORT_CHUNK_ROWS, progress=None) -> tuple[bool, str]:
+    """
+    Export one table to `<dest_dir>/<table>.<fmt>`. Rows are read in id order,
+    `chunk_rows` at a time (WHERE id > last id), and each chunk is written
+    before the next is read. Returns (success, message).
+    """
+    if table not in EXPORT_TABLES:
+        return False, f"Unknown table '{table}'."
+    if fmt not in EXPORT_FORMATS:
+        return False, f"Unknown format '{fmt}'."
+    if fmt == "parquet":
+        try:
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            return False, "Parquet export needs pyarrow (pip install pyarrow)."
+
+    columns = EXPORT_TABLES[table]
+    id_column = columns[0]
+    dest_dir = dest_dir or EXPORT_DIR
+    os.makedirs(dest_dir, exist_ok=True)
+    path = os.path.join(dest_dir, f"{table}.{fmt}")
+    partial = path + ".partial"
+
+    start = time.perf_counter()
+    written = 0
+    writer = None
+    try:
+        with models.engine.connect() as conn:
+            total = conn.execute(select(func.count()).select_from(id_column.table)).scalar()
+        writer = (_ParquetWriter if fmt == "parquet" else _CsvWriter)(partial, columns)
+        last_id = None
+        while True:
+            query = select(*columns).order_by(id_column).limit(chunk_rows)
+            if last_id is not None:
+                query = query.where(id_column > last_id)
+            # A fresh short read per chunk, so writers are never held up for the whole export
+            with models.engine.connect() as conn:
+                rows = conn.execute(query).all()
+            if not rows:
+                break
+            writer.write(rows)
+            written += len(rows)
+            last_id = rows[-1][0]
+            if progress:
+                elapsed = time.perf_counter() - start
+                progress(min(written / total, 1.0) if total else 1.0,
+                         f"{table}: {written}/{total} rows ({_rate(written, elapsed):,.0f} rows/s)")
+            if len(rows) < chunk_rows:
+                break
+        writer.close()
+        writer = None
+        os.replace(partial, path)
+    except Exception as e:
+        if writer:
+            writer.close()
+        if os.path.exists(partial):
+            os.remove(partial)
+        return False, f"Error: {str(e)}"
+
+    elapsed = time.perf_counter() - start
+    return True, (f"Exported {written} {table} rows to {path} in {elapsed:.2f}s "
+                  f"({_rate(written, elapsed):,.0f} rows/s, {os.path.getsize(path) / 2**20:.1f} MB).")
+
+
+def export_tables(tables: list[str] | None = None, dest_dir: str | None = None, fmt: str = "csv",
+                  chunk_rows: int = EXPORT_CHUNK_ROWS, progress=None) -> tuple[bool, str]:
+    """Export several tables (default: all). Returns (success, message)."""
+    messages = []
+    for table in tables or list(EXPORT_TABLES):
+        success, message = export_table(table, dest_dir, fmt, chunk_rows, progress)
+        if not success:
+            return False, f"{table}: {message}"
+        messages.append(message)
+    return True, " ".join(messages)
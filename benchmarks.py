@@ -0,0 +1,411 @@
+"""
+Synthetic-data benchmarks for Competitive Programming Platform.
+Fills a scratch database with skewed users/problems/submissions and times
+the leaderboard, stats, problem list, sync and contest polling paths (the
+last two on a scratch copy of the database, against a local fake Codeforces
+API). Results are written as JSON so runs from different commits can be compared.
+
+Usage:
+    python benchmarks.py --scale small
+    python benchmarks.py --scale large --db data/bench.db --reuse
+    python benchmarks.py --scale small --compare data/benchmarks/<old>.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta
+
+SCALES = {
+    "tiny": {"users": 200, "problems": 100, "submissions": 5_000},
+    "small": {"users": 2_000, "problems": 1_000, "submissions": 100_000},
+    "medium": {"users": 20_000, "problems": 5_000, "submissions": 1_000_000},
+    "large": {"users": 100_000, "problems": 20_000, "submissions": 10_000_000},
+}
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+DEFAULT_DB = os.path.join(DATA_DIR, "bench.db")
+RESULTS_DIR = os.path.join(DATA_DIR, "benchmarks")
+INSERT_CHUNK = 200_000
+CF_LINKED_SHARE = 0.2  # fraction of users with a Codeforces handle
+SYNC_ACCEPTED = 200  # accepted problems per handle on the fake CF source
+POLL_BATCH = 200  # new contest submissions on the fake CF source per timed contest poll
+POLL_VERDICTS = ["OK", "WRONG_ANSWER", "WRONG_ANSWER", "TIME_LIMIT_EXCEEDED", "COMPILATION_ERROR"]
+# Placeholder hash; benchmark users never log in, and bcrypt for 100k users would dominate setup
+DUMMY_PASSWORD_HASH = "$2b$12$" + "x" * 53
+SQLITE_DATETIME = "%Y-%m-%d %H:%M:%S.%f"  # the format SQLAlchemy stores DateTime in
+
+
+def _zipf_weights(n: int, exponent: float, rng) -> "np.ndarray":
+    """Zipf-like weights in random order, so ids are not sorted by activity."""
+    import numpy as np
+    weights = 1.0 / np.arange(1, n + 1) ** exponent
+    rng.shuffle(weights)
+    return weights / weights.sum()
+
+
+def generate_data(db_path: str, users: int, problems: int, submissions: int,
+                  seed: int = 42, progress=print) -> dict:
+    """
+    Create a scratch database with skewed activity.
+    User activity and problem popularity both follow Zipf-like distributions,
+    solve times lean towards the recent past, and (user, problem) pairs are
+    unique. Returns the row counts actually written.
+    """
+    import numpy as np
+    import models
+
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.remove(path)
+    models.use_database(f"sqlite:///{db_path}")
+    models.Base.metadata.create_all(bind=models.engine)
+    models.engine.dispose()  # Pooled connections would keep the database in WAL mode during the bulk load
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    now_text = now.strftime(SQLITE_DATETIME)
+    started = time.perf_counter()
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA journal_mode=OFF")
+    conn.execute("PRAGMA synchronous=OFF")
+    try:
+        cf_users = set(rng.choice(users, size=int(users * CF_LINKED_SHARE), replace=False).tolist())
+        conn.executemany(
+            "INSERT INTO users (id, username, password_hash, cf_handle, is_admin, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                (i + 1, f"user{i + 1}", DUMMY_PASSWORD_HASH, f"cf_user{i + 1}" if i in cf_users else None, False, now_text)
+                for i in range(users)
+            )
+        )
+        points = rng.choice([10, 20, 30, 50, 100], size=problems, p=[0.35, 0.3, 0.2, 0.1, 0.05])
+        conn.executemany(
+            "INSERT INTO problems (id, title, problem_url, points, cf_contest_id, cf_problem_index, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                (i + 1, f"Problem {i + 1}", f"https://codeforces.com/problemset/problem/{1000 + i // 6}/{'ABCDEF'[i % 6]}",
+                 int(points[i]), 1000 + i // 6, "ABCDEF"[i % 6], (now - timedelta(minutes=i)).strftime(SQLITE_DATETIME))
+                for i in range(problems)
+            )
+        )
+        conn.commit()
+        progress(f"  users={users} problems={problems} ({time.perf_counter() - started:.1f}s)")
+
+        # Oversample (user, problem) pairs, then dedupe; skew makes collisions common.
+        user_p = _zipf_weights(users, 1.0, rng)
+        problem_p = _zipf_weights(problems, 0.8, rng)
+        target = min(submissions, users * problems)
+        keys = np.empty(0, dtype=np.int64)
+        while len(keys) < target:
+            draw = int((target - len(keys)) * 1.3) + 1000
+            user_idx = rng.choice(users, size=draw, p=user_p)
+            problem_idx = rng.choice(problems, size=draw, p=problem_p)
+            keys = np.unique(np.concatenate([keys, user_idx.astype(np.int64) * problems + problem_idx]))
+        keys = rng.permutation(keys)[:target]
+
+        # Recent-leaning solve times over the last year
+        ages = (rng.power(0.5, size=target) * 365 * 24 * 3600).astype(np.int64)
+        order = np.argsort(-ages, kind="stable")  # oldest first, so ids follow time
+        keys, ages = keys[order], ages[order]
+
+        written = 0
+        for chunk_start in range(0, target, INSERT_CHUNK):
+            chunk_keys = keys[chunk_start:chunk_start + INSERT_CHUNK]
+            chunk_ages = ages[chunk_start:chunk_start + INSERT_CHUNK]
+            conn.executemany(
+                "INSERT INTO submissions (user_id, problem_id, solved_at) VALUES (?, ?, ?)",
+                (
+                    (int(key // problems) + 1, int(key % problems) + 1,
+                     (now - timedelta(seconds=int(age))).strftime(SQLITE_DATETIME))
+                    for key, age in zip(chunk_keys, chunk_ages)
+                )
+            )
+            conn.commit()
+            written += len(chunk_keys)
+            progress(f"  submissions {written}/{target} ({time.perf_counter() - started:.1f}s)")
+    finally:
+        conn.close()
+
+    models.init_db()
+    return {"users": users, "problems": problems, "submissions": int(target),
+            "seconds": round(time.perf_counter() - started, 2)}
+
+
+def _time_call(fn, repeat: int, setup=None) -> dict:
+    """
+    Run `fn` once to warm up, then `repeat` times; return timing stats in ms.
+    `setup`, if given, runs untimed before each call.
+    """
+    if setup:
+        setup()
+    fn()
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "repeat": repeat,
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(statistics.median(samples), 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 3),
+        "mean_ms": round(statistics.fmean(samples), 3),
+    }
+
+
+def _sample_users():
+    """Pick the most active user and a median-activity user."""
+    from sqlalchemy import func
+    from models import get_session, Submission
+    session = get_session()
+    try:
+        counts = session.query(Submission.user_id, func.count(Submission.id).label("n")).group_by(
+            Submission.user_id
+        ).order_by(func.count(Submission.id).desc()).all()
+        if not counts:
+            return 1, 1
+        return counts[0].user_id, counts[len(counts) // 2].user_id
+    finally:
+        session.close()
+
+
+def _sync_cases():
+    """Build a fake CF source for CF-linked users. Returns (stub, [(user_id, handle)])."""
+    from models import get_session, User, Problem
+    from cf_stub import CodeforcesStub
+    session = get_session()
+    try:
+        linked = session.query(User.id, User.cf_handle).filter(User.cf_handle.isnot(None)).limit(50).all()
+        cf_keys = session.query(Problem.cf_contest_id, Problem.cf_problem_index).filter(
+            Problem.cf_contest_id.isnot(None)
+        ).limit(SYNC_ACCEPTED * 5).all()
+    finally:
+        session.close()
+    accepted = {
+        handle: [tuple(key) for key in cf_keys[i % 5::5][:SYNC_ACCEPTED]]
+        for i, (_, handle) in enumerate(linked)
+    }
+    return CodeforcesStub(accepted), [tuple(row) for row in linked]
+
+
+def _scratch_copy() -> str | None:
+    """
+    Copy the current SQLite database to a temporary file, so cases that write
+    (sync, contest polling) start from the same state on every run, --reuse or not.
+    """
+    import tempfile
+    import models
+    url = models.engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return None
+    path = os.path.join(tempfile.mkdtemp(), "bench_writes.db")
+    source, target = sqlite3.connect(url.database), sqlite3.connect(path)
+    try:
+        source.backup(target)
+    finally:
+        source.close()
+        target.close()
+    return path
+
+
+def _poll_case(stub) -> tuple[int, int, list[str]] | None:
+    """
+    Create a running contest linked to the CF contest with the most of our
+    problems, with an empty feed on the stub. Returns (contest_id, cf_contest_id, problem indices).
+    """
+    from sqlalchemy import func
+    from models import get_session, Problem, Contest
+    from contests import create_contest, LABELS
+    session = get_session()
+    try:
+        row = session.query(Problem.cf_contest_id).filter(Problem.cf_contest_id.isnot(None)).group_by(
+            Problem.cf_contest_id
+        ).order_by(func.count(Problem.id).desc()).first()
+        if row is None:
+            return None
+        cf_contest_id = row[0]
+        problems = session.query(Problem.id, Problem.cf_problem_index).filter(
+            Problem.cf_contest_id == cf_contest_id
+        ).order_by(Problem.id).limit(len(LABELS)).all()
+    finally:
+        session.close()
+    now = datetime.utcnow()
+    success, _ = create_contest("Benchmark round", now - timedelta(hours=1), now + timedelta(hours=1),
+                                [problem_id for problem_id, _ in problems], cf_contest_id=cf_contest_id)
+    if not success:
+        return None
+    stub.contest_submissions[cf_contest_id] = []
+    session = get_session()
+    try:
+        contest_id = session.query(Contest.id).order_by(Contest.id.desc()).first()[0]
+    finally:
+        session.close()
+    return contest_id, cf_contest_id, [index for _, index in problems]
+
+
+def run_benchmarks(repeat: int = 5, progress=print) -> dict:
+    """Time the main read and sync paths against the current database."""
+    import codeforces_api
+    from leaderboard import get_leaderboard, get_leaderboard_page, get_user_stats, get_user_solved_problems
+    from problems import list_problems
+    from recommendations import get_recommendations
+
+    heavy_user, median_user = _sample_users()
+    cases = {
+        "get_leaderboard[all]": lambda: get_leaderboard("all"),
+        "get_leaderboard[monthly]": lambda: get_leaderboard("monthly"),
+        "get_leaderboard[weekly]": lambda: get_leaderboard("weekly"),
+        "get_leaderboard_page[all,first50]": lambda: get_leaderboard_page("all", 0, 50),
+        "get_user_stats[heavy]": lambda: get_user_stats(heavy_user),
+        "get_user_stats[median]": lambda: get_user_stats(median_user),
+        "get_user_solved_problems[heavy]": lambda: get_user_solved_problems(heavy_user),
+        "problems_page[list_problems]": lambda: list_problems(),
+        "get_recommendations[heavy]": lambda: get_recommendations(heavy_user),
+    }
+
+    results = {}
+    for name, fn in cases.items():
+        results[name] = _time_call(fn, repeat)
+        progress(f"  {name:<40} median {results[name]['median_ms']:10.1f} ms")
+
+    stub, linked = _sync_cases()
+    scratch = _scratch_copy() if linked else None
+    if scratch:
+        import random
+        import shutil
+        import models
+        from contests import poll_cf_contest
+        from models import JudgeSyncState
+
+        original_url = models.DATABASE_URL
+        models.use_database(f"sqlite:///{scratch}")
+        base_url = stub.start()
+        saved = codeforces_api.CF_API_BASE, codeforces_api.provider.min_interval
+        codeforces_api.CF_API_BASE, codeforces_api.provider.min_interval = base_url, 0.0
+        try:
+            # Every timed sync fetches a full history: no cursors from earlier runs
+            session = models.get_session()
+            try:
+                session.query(JudgeSyncState).delete()
+                session.commit()
+            finally:
+                session.close()
+            users = iter([user_id for user_id, _ in linked] * (repeat + 1))
+            name = "sync_user_progress[fake_cf]"
+            results[name] = _time_call(lambda: codeforces_api.sync_user_progress(next(users)), repeat)
+            progress(f"  {name:<40} median {results[name]['median_ms']:10.1f} ms")
+
+            poll = _poll_case(stub)
+            if poll is not None:
+                contest_id, cf_contest_id, indices = poll
+                handles = [handle for _, handle in linked]
+                rng = random.Random(7)
+
+                def new_submissions():
+                    for _ in range(POLL_BATCH):
+                        stub.submit(cf_contest_id, rng.choice(handles), rng.choice(indices), rng.choice(POLL_VERDICTS))
+
+                name = f"poll_cf_contest[fake_cf,{POLL_BATCH} new]"
+                results[name] = _time_call(lambda: poll_cf_contest(contest_id), repeat, setup=new_submissions)
+                progress(f"  {name:<40} median {results[name]['median_ms']:10.1f} ms")
+        finally:
+            codeforces_api.CF_API_BASE, codeforces_api.provider.min_interval = saved
+            stub.stop()
+            models.use_database(original_url)
+            shutil.rmtree(os.path.dirname(scratch), ignore_errors=True)
+    return results
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare_results(old: dict, new: dict) -> list[str]:
+    """Describe per-benchmark median changes between two result files."""
+    lines = []
+    for name, result in new["results"].items():
+        before = old.get("results", {}).get(name)
+        if not before:
+            lines.append(f"  {name:<40} (new)")
+            continue
+        ratio = result["median_ms"] / before["median_ms"] if before["median_ms"] else float("inf")
+        lines.append(f"  {name:<40} {before['median_ms']:10.1f} -> {result['median_ms']:10.1f} ms  (x{ratio:.2f})")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the CP Platform benchmark suite.")
+    parser.add_argument("--scale", choices=SCALES, default="small")
+    parser.add_argument("--users", type=int, help="override the scale's user count")
+    parser.add_argument("--problems", type=int, help="override the scale's problem count")
+    parser.add_argument("--submissions", type=int, help="override the scale's submission count")
+    parser.add_argument("--db", default=DEFAULT_DB, help="scratch database path (will be overwritten)")
+    parser.add_argument("--reuse", action="store_true", help="reuse an existing scratch database")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="results JSON path (default: data/benchmarks/<commit>-<time>.json)")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    import models
+
+    params = dict(SCALES[args.scale])
+    for key in ("users", "problems", "submissions"):
+        if getattr(args, key):
+            params[key] = getattr(args, key)
+
+    if args.reuse and os.path.exists(args.db):
+        print(f"Reusing {args.db}")
+        models.use_database(f"sqlite:///{args.db}")
+        models.init_db()
+        dataset = {"reused": True}
+    else:
+        print(f"Generating {params} into {args.db}")
+        dataset = generate_data(args.db, seed=args.seed, **params)
+
+    print("Running benchmarks")
+    results = run_benchmarks(repeat=args.repeat)
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+            "scale": args.scale,
+            "params": params,
+            "dataset": dataset,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+        },
+        "results": results,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{report['meta']['commit'] or 'nogit'}-{datetime.utcnow():%Y%m%d-%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            print("\n".join(compare_results(json.load(f), report)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
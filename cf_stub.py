@@ -0,0 +1,139 @@
+"""
+Local Codeforces API stand-in for benchmarks and load tests.
+Serves user.info, user.status, problemset.problems and contest.status from in-memory data so
+sync and contest polling code can be exercised without network access or the real API's rate limits.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+
+class CodeforcesStub:
+    """
+    In-memory Codeforces data.
+    `accepted` maps handle -> list of (contest_id, problem_index) accepted by that handle.
+    `ratings` maps (contest_id, problem_index) -> problem rating.
+    Contest submissions are added with `submit()` and served by contest.status.
+    """
+
+    def __init__(self, accepted: dict[str, list[tuple[int, str]]] | None = None, latency: float = 0.0,
+                 ratings: dict[tuple[int, str], int] | None = None):
+        self.accepted = accepted or {}
+        self.ratings = ratings or {}
+        self.latency = latency
+        self.requests = 0
+        self.contest_submissions: dict[int, list[dict]] = {}  # contest_id -> submissions, oldest first
+        self._next_submission_id = 2_000_000
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def user_info(self, handles: str) -> dict:
+        result = []
+        for handle in handles.split(";"):
+            if handle not in self.accepted:
+                return {"status": "FAILED", "comment": f"handles: User with handle {handle} not found"}
+            result.append({"handle": handle, "rating": 1500, "rank": "specialist"})
+        return {"status": "OK", "result": result}
+
+    def user_status(self, handle: str, start: int, count: int) -> dict:
+        if handle not in self.accepted:
+            return {"status": "FAILED", "comment": f"handle: User with handle {handle} not found"}
+        solved = self.accepted[handle]
+        submissions = [
+            {
+                "id": 1_000_000 + i,
+                "verdict": "OK",
+                "problem": {"contestId": contest_id, "index": index},
+            }
+            for i, (contest_id, index) in enumerate(solved)
+        ]
+        submissions.reverse()  # newest first, like the real API
+        return {"status": "OK", "result": submissions[start - 1:start - 1 + count]}
+
+    def submit(self, contest_id: int, handle: str, index: str, verdict: str | None = "OK",
+               at: float | None = None) -> dict:
+        """Add a submission to a contest's status feed. `verdict=None` is still being judged."""
+        with self._lock:
+            self._next_submission_id += 1
+            submission = {
+                "id": self._next_submission_id,
+                "contestId": contest_id,
+                "creationTimeSeconds": int(time.time() if at is None else at),
+                "problem": {"contestId": contest_id, "index": index},
+                "author": {"members": [{"handle": handle}]},
+            }
+            if verdict is not None:
+                submission["verdict"] = verdict
+            self.contest_submissions.setdefault(contest_id, []).append(submission)
+        return submission
+
+    def contest_status(self, contest_id: int, start: int, count: int) -> dict:
+        with self._lock:
+            if contest_id not in self.contest_submissions:
+                return {"status": "FAILED", "comment": f"contestId: Contest with id {contest_id} not found"}
+            submissions = self.contest_submissions[contest_id][::-1]  # newest first, like the real API
+        return {"status": "OK", "result": submissions[start - 1:start - 1 + count]}
+
+    def problemset_problems(self) -> dict:
+        problems = [
+            {"contestId": contest_id, "index": index, "rating": rating}
+            for (contest_id, index), rating in self.ratings.items()
+        ]
+        return {"status": "OK", "result": {"problems": problems, "problemStatistics": []}}
+
+    def handle(self, path: str, query: dict) -> tuple[int, dict]:
+        """Dispatch one API call. Returns (http_status, body)."""
+        with self._lock:
+            self.requests += 1
+        method = path.rsplit("/", 1)[-1]
+
+        def arg(name, default=None):
+            return query.get(name, [default])[0]
+
+        if method == "user.info":
+            body = self.user_info(arg("handles", ""))
+        elif method == "user.status":
+            body = self.user_status(arg("handle", ""), int(arg("from", 1)), int(arg("count", 100)))
+        elif method == "problemset.problems":
+            body = self.problemset_problems()
+        elif method == "contest.status":
+            body = self.contest_status(int(arg("contestId", 0)), int(arg("from", 1)), int(arg("count", 100)))
+        else:
+            return 404, {"status": "FAILED", "comment": f"Unknown method {method}"}
+        return (200 if body["status"] == "OK" else 400), body
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Start serving on a background thread. Returns the API base URL."""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if stub.latency:
+                    threading.Event().wait(stub.latency)
+                url = urlparse(self.path)
+                status, body = stub.handle(url.path, parse_qs(url.query))
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_address[1]}/api"
+
+    def stop(self):
+        """Stop serving."""
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
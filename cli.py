@@ -0,0 +1,241 @@
+"""
+Command-line batch jobs for Competitive Programming Platform.
+Runs heavy operations outside the web process, e.g. from cron. Every
+command reports progress and timings and exits non-zero on failure.
+
+Usage:
+    python -m cli sync --workers 8
+    python -m cli import-problems problems.csv
+    python -m cli rebuild
+    python -m cli dedupe
+    python -m cli snapshot
+    python -m cli backup --keep 7
+    python -m cli export --format parquet
+    python -m cli bench --scale small
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+@contextmanager
+def timed(label: str):
+    """Print how long a step took."""
+    print(f"{label}...", flush=True)
+    start = time.perf_counter()
+    yield
+    print(f"{label} done in {time.perf_counter() - start:.2f}s", flush=True)
+
+
+def report(success: bool, message: str) -> bool:
+    print(f"  {'OK' if success else 'FAILED'}: {message}", flush=True)
+    return success
+
+
+def cmd_sync(args) -> int:
+    """Sync every linked judge account, fetching concurrently and writing once."""
+    from judges import get_providers, sync_judges
+    from models import get_session, User
+
+    providers = get_providers()
+    if args.min_interval is not None:
+        for provider in providers.values():
+            provider.min_interval = args.min_interval
+
+    session = get_session()
+    try:
+        usernames = dict(session.query(User.id, User.username).all())
+    finally:
+        session.close()
+    user_ids = None
+    if args.user:
+        unknown = sorted(set(args.user) - set(usernames.values()))
+        if unknown:
+            report(False, f"Unknown users: {', '.join(unknown)}")
+            return 1
+        user_ids = [user_id for user_id, name in usernames.items() if name in args.user]
+
+    done = 0
+
+    def progress(judge, user_id, handle, accepted, elapsed):
+        nonlocal done
+        done += 1
+        result = "FAILED" if accepted is None else f"{accepted} accepted"
+        print(f"  [{done}] {providers[judge].label} {usernames.get(user_id)} ({handle}): {result} ({elapsed:.2f}s)", flush=True)
+
+    with timed(f"Syncing {', '.join(args.judge or providers)} with {args.workers} workers"):
+        summary = sync_judges(user_ids=user_ids, judges=args.judge, workers=args.workers, progress=progress)
+    report(not summary.message.startswith("Error"), summary.message)
+    print(f"Fetched {summary.accounts} accounts; {summary.failed} failed.")
+    return 1 if summary.failed or summary.message.startswith("Error") else 0
+
+
+def _read_problem_rows(path: str) -> list[dict]:
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".json"):
+            rows = json.load(f)
+            if not isinstance(rows, list):
+                raise ValueError("JSON file must contain a list of problem objects.")
+            return rows
+        return list(csv.DictReader(f))
+
+
+def cmd_import_problems(args) -> int:
+    """Import problems from a CSV or JSON file."""
+    from problems import import_problems
+
+    try:
+        rows = _read_problem_rows(args.file)
+    except (OSError, ValueError) as e:
+        report(False, f"Could not read {args.file}: {e}")
+        return 1
+    with timed(f"Importing {len(rows)} problems from {args.file}"):
+        success = report(*import_problems(rows))
+    return 0 if success else 1
+
+
+def cmd_rebuild(args) -> int:
+    """Re-score problems and rebuild user totals and contest standings."""
+    from scoring import recompute_scores
+    from contests import rebuild_standings
+
+    ok = True
+    with timed("Re-scoring problems and rebuilding user totals"):
+        ok = report(*recompute_scores()) and ok
+    with timed("Rebuilding contest standings"):
+        ok = report(*rebuild_standings()) and ok
+    return 0 if ok else 1
+
+
+def cmd_dedupe(args) -> int:
+    """Remove duplicate submissions."""
+    from problems import dedupe_submissions
+
+    with timed("Removing duplicate submissions"):
+        success = report(*dedupe_submissions())
+    return 0 if success else 1
+
+
+def cmd_snapshot(args) -> int:
+    """Record a rank snapshot."""
+    from leaderboard import take_rank_snapshot
+
+    with timed("Taking rank snapshot"):
+        success = report(*take_rank_snapshot())
+    return 0 if success else 1
+
+
+def _print_progress():
+    """Progress callback that prints at most every 10%."""
+    shown = [-1]
+
+    def progress(fraction: float, message: str):
+        step = int(fraction * 10)
+        if step < shown[0]:  # Started over, e.g. a backup restarted by a concurrent write
+            shown[0] = -1
+        if step > shown[0]:
+            shown[0] = step
+            print(f"  {fraction:6.1%}  {message}", flush=True)
+    return progress
+
+
+def cmd_backup(args) -> int:
+    """Take an online backup of the database."""
+    from backup import backup_database
+
+    with timed("Backing up the database"):
+        success = report(*backup_database(args.dest, args.step_pages, args.keep, progress=_print_progress()))
+    return 0 if success else 1
+
+
+def cmd_export(args) -> int:
+    """Export tables to CSV or Parquet."""
+    from backup import EXPORT_TABLES, export_table
+
+    ok = True
+    for table in args.table or list(EXPORT_TABLES):
+        with timed(f"Exporting {table} as {args.format}"):
+            ok = report(*export_table(table, args.dir, args.format, args.chunk_rows, progress=_print_progress())) and ok
+    return 0 if ok else 1
+
+
+def cmd_bench(args) -> int:
+    """Run the benchmark suite (arguments are passed to benchmarks.py)."""
+    import benchmarks
+
+    with timed("Running benchmarks"):
+        return benchmarks.main(args.bench_args)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m cli", description="CP Platform batch jobs.")
+    parser.add_argument("--db", help="database URL (default: CP_DATABASE_URL or data/cp_platform.db)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    sync = commands.add_parser("sync", help="sync all users linked to an online judge")
+    sync.add_argument("--workers", type=int, default=8, help="accounts fetched concurrently")
+    sync.add_argument("--user", action="append", help="only this username (repeatable)")
+    sync.add_argument("--judge", action="append", help="only this judge, e.g. codeforces (repeatable)")
+    sync.add_argument("--min-interval", type=float, help="override every judge's seconds between requests")
+    sync.set_defaults(handler=cmd_sync)
+
+    importer = commands.add_parser("import-problems", help="bulk-import problems from CSV or JSON")
+    importer.add_argument("file", help="CSV with a header row, or a JSON list; columns: "
+                                       "title, problem_url, points, cf_contest_id, cf_problem_index")
+    importer.set_defaults(handler=cmd_import_problems)
+
+    commands.add_parser("rebuild", help="rebuild scores, user totals and contest standings").set_defaults(handler=cmd_rebuild)
+    commands.add_parser("dedupe", help="remove duplicate submissions").set_defaults(handler=cmd_dedupe)
+    commands.add_parser("snapshot", help="record a rank snapshot").set_defaults(handler=cmd_snapshot)
+
+    from backup import BACKUP_STEP_PAGES, EXPORT_CHUNK_ROWS, EXPORT_FORMATS, EXPORT_TABLES
+    backup = commands.add_parser("backup", help="online backup of the SQLite database")
+    backup.add_argument("--dest", help="backup file (default: data/backups/cp_platform-<time>.db)")
+    backup.add_argument("--step-pages", type=int, default=BACKUP_STEP_PAGES, help="pages copied per step")
+    backup.add_argument("--keep", type=int, help="then delete all but the newest KEEP backups")
+    backup.set_defaults(handler=cmd_backup)
+
+    export = commands.add_parser("export", help="export tables to CSV or Parquet")
+    export.add_argument("--table", action="append", choices=list(EXPORT_TABLES), help="only this table (repeatable)")
+    export.add_argument("--format", choices=EXPORT_FORMATS, default="csv")
+    export.add_argument("--dir", help="output directory (default: data/exports)")
+    export.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS, help="rows read and written per chunk")
+    export.set_defaults(handler=cmd_export)
+
+    # Everything after "bench" is passed through to benchmarks.py
+    commands.add_parser("bench", help="run the benchmark suite", add_help=False).set_defaults(handler=cmd_bench)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command == "bench":
+        args.bench_args = extra
+    elif extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    import models
+
+    if args.db:
+        models.use_database(args.db)
+    if args.command != "bench":
+        models.init_db()
+
+    start = time.perf_counter()
+    try:
+        code = args.handler(args)
+    except KeyboardInterrupt:
+        print("Interrupted.")
+        code = 130
+    except Exception as e:
+        print(f"Error: {type(e).__name__}: {e}")
+        code = 1
+    print(f"Finished '{args.command}' in {time.perf_counter() - start:.2f}s (exit {code}).")
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,41 +1,53 @@
 """
 Codeforces API client for Competitive Programming Platform.
-Handles fetching user info, submissions, and syncing progress.
+Handles fetching user info and submissions, and provides the Codeforces
+judge provider used by judges.sync_judges.
 """
+import os
 import time
-import requests
-from typing import Optional
-from datetime import datetime
+from metrics import get_registry, add_render_time
+from judges import JudgeProvider, register_provider
 
 # Base URL for Codeforces API
-CF_API_BASE = "https://codeforces.com/api"
-
-# Rate limiting: max 5 requests per second
-_last_request_time = 0
-_min_interval = 0.2  # 200ms between requests
+CF_API_BASE = os.environ.get("CP_CF_API_BASE", "https://codeforces.com/api")
+SUBMISSIONS_PAGE_SIZE = 1000
+PENDING_VERDICTS = {None, "TESTING"}  # Submissions that may still become accepted
 
 
 def _rate_limited_request(url: str) -> dict | None:
     """Make a rate-limited request to Codeforces API."""
-    global _last_request_time
+    import requests  # Only pages that talk to Codeforces pay for this import
+    metrics = get_registry()
+    method = url.split("?", 1)[0].rsplit("/", 1)[-1]
     
-    # Enforce rate limit
-    elapsed = time.time() - _last_request_time
-    if elapsed < _min_interval:
-        time.sleep(_min_interval - elapsed)
+    # Enforce the provider's rate limit; threads share its request slots
+    wait = provider.throttle()
+    if wait > 0:
+        metrics.observe("cp_cf_rate_limit_wait_milliseconds", wait * 1000, {"method": method})
+        add_render_time("cf", wait * 1000)
     
+    status = "error"
+    start = time.perf_counter()
     try:
         response = requests.get(url, timeout=10)
-        _last_request_time = time.time()
         
         if response.status_code == 200:
             data = response.json()
             if data.get("status") == "OK":
+                status = "ok"
                 return data.get("result")
+            status = "api_failed"
+        else:
+            status = f"http_{response.status_code}"
         return None
     except Exception as e:
         print(f"CF API error: {e}")
         return None
+    finally:
+        request_ms = (time.perf_counter() - start) * 1000
+        metrics.inc("cp_cf_requests_total", {"method": method, "status": status})
+        metrics.observe("cp_cf_request_milliseconds", request_ms, {"method": method})
+        add_render_time("cf", request_ms)
 
 
 def get_user_info(handle: str) -> dict | None:
@@ -50,83 +62,135 @@ def get_user_info(handle: str) -> dict | None:
     return None
 
 
-def get_user_submissions(handle: str, count: int = 100) -> list[dict]:
+def get_user_submissions(handle: str, count: int = 100, start: int = 1) -> list[dict]:
     """
-    Get user's recent submissions.
+    Get user's recent submissions, newest first.
     Returns list of submission dicts.
     """
-    url = f"{CF_API_BASE}/user.status?handle={handle}&from=1&count={count}"
+    url = f"{CF_API_BASE}/user.status?handle={handle}&from={start}&count={count}"
     result = _rate_limited_request(url)
     return result if result else []
 
 
+def get_contest_submissions(contest_id: int, start: int = 1, count: int = 500) -> list[dict] | None:
+    """
+    Get a page of a contest's submissions, newest first.
+    Returns None on API error (as opposed to [] for an empty page).
+    """
+    url = f"{CF_API_BASE}/contest.status?contestId={contest_id}&from={start}&count={count}"
+    return _rate_limited_request(url)
+
+
+def get_problemset_ratings() -> dict[tuple[int, str], int] | None:
+    """
+    Get {(contest_id, problem_index): rating} for every rated problem in the
+    Codeforces problemset. Returns None on API error.
+    """
+    metadata = provider.get_problem_metadata()
+    if metadata is None:
+        return None
+    return {key: problem["rating"] for key, problem in metadata.items() if problem["rating"]}
+
+
 def get_accepted_problems(handle: str) -> set[tuple[int, str]]:
     """
     Get set of (contest_id, problem_index) for all accepted submissions.
     """
-    submissions = get_user_submissions(handle, count=1000)
-    accepted = set()
-    
-    for sub in submissions:
-        if sub.get("verdict") == "OK":
-            problem = sub.get("problem", {})
-            contest_id = problem.get("contestId")
-            index = problem.get("index")
-            if contest_id and index:
-                accepted.add((contest_id, index))
-    
-    return accepted
+    result = provider.fetch_accepted(handle)
+    return result[0] if result else set()
+
+
+class CodeforcesProvider(JudgeProvider):
+    """Codeforces. Problems are keyed by (contest_id, problem_index)."""
+    name = "codeforces"
+    label = "Codeforces"
+    min_interval = 0.2  # The API allows about 5 requests per second
+    profile_ttl = 600
+    metadata_ttl = 3600  # problemset.problems is several MB
 
+    def handles(self, session) -> dict[int, str]:
+        from models import User
+        return dict(session.query(User.id, User.cf_handle).filter(
+            User.cf_handle.isnot(None), User.cf_handle != ""
+        ).all())
 
-def sync_user_progress(user_id: int, cf_handle: str) -> tuple[int, str]:
+    def local_problems(self, session) -> dict[tuple[int, str], int]:
+        from models import Problem
+        return {
+            (contest_id, index): problem_id
+            for problem_id, contest_id, index in session.query(
+                Problem.id, Problem.cf_contest_id, Problem.cf_problem_index
+            ).filter(Problem.cf_contest_id.isnot(None), Problem.cf_problem_index.isnot(None))
+        }
+
+    def fetch_accepted(self, handle: str, since: int | None = None) -> tuple[set, int | None] | None:
+        """
+        Page through user.status (newest first) down to submission `since`.
+        The new cursor stops short of any submission still being judged.
+        """
+        accepted = set()
+        newest = since
+        pending = None
+        start = 1
+        while True:
+            page = _rate_limited_request(
+                f"{CF_API_BASE}/user.status?handle={handle}&from={start}&count={SUBMISSIONS_PAGE_SIZE}"
+            )
+            if page is None:
+                return None
+            reached_cursor = False
+            for sub in page:
+                sub_id = sub.get("id", 0)
+                if since is not None and sub_id <= since:
+                    reached_cursor = True
+                    break
+                newest = max(newest or 0, sub_id)
+                if sub.get("verdict") in PENDING_VERDICTS:
+                    pending = sub_id if pending is None else min(pending, sub_id)
+                elif sub.get("verdict") == "OK":
+                    problem = sub.get("problem", {})
+                    if problem.get("contestId") and problem.get("index"):
+                        accepted.add((problem["contestId"], problem["index"]))
+            if reached_cursor or len(page) < SUBMISSIONS_PAGE_SIZE:
+                break
+            start += len(page)
+        return accepted, newest if pending is None else pending - 1
+
+    def fetch_profile(self, handle: str) -> dict | None:
+        return get_user_info(handle)
+
+    def fetch_problem_metadata(self) -> dict | None:
+        result = _rate_limited_request(f"{CF_API_BASE}/problemset.problems")
+        if result is None:
+            return None
+        return {
+            (problem["contestId"], problem["index"]): {
+                "name": problem.get("name"),
+                "rating": problem.get("rating"),
+                "tags": problem.get("tags", [])
+            }
+            for problem in result.get("problems", [])
+            if problem.get("contestId") and problem.get("index")
+        }
+
+
+provider = CodeforcesProvider()
+register_provider(provider)
+
+
+def sync_user_progress(user_id: int) -> tuple[int, str]:
     """
-    Sync user's Codeforces submissions with local problems.
-    Returns (count_synced, message).
+    Sync one user's Codeforces solves with local problems, using the handle
+    stored on their account. Returns (count_synced, message).
     """
-    from models import get_session, Problem, Submission
+    from judges import sync_judges
     
-    if not cf_handle:
+    summary = sync_judges(user_ids=[user_id], judges=[provider.name])
+    if not summary.accounts and not summary.failed:
         return 0, "No Codeforces handle set."
-    
-    # Get accepted problems from CF
-    accepted = get_accepted_problems(cf_handle)
-    if not accepted:
-        return 0, "No accepted submissions found or API error."
-    
-    session = get_session()
-    try:
-        # Get all CF problems in our database
-        cf_problems = session.query(Problem).filter(
-            Problem.cf_contest_id.isnot(None),
-            Problem.cf_problem_index.isnot(None)
-        ).all()
-        
-        synced = 0
-        for problem in cf_problems:
-            key = (problem.cf_contest_id, problem.cf_problem_index)
-            if key in accepted:
-                # Check if already submitted
-                existing = session.query(Submission).filter(
-                    Submission.user_id == user_id,
-                    Submission.problem_id == problem.id
-                ).first()
-                
-                if not existing:
-                    submission = Submission(
-                        user_id=user_id,
-                        problem_id=problem.id,
-                        solved_at=datetime.utcnow()
-                    )
-                    session.add(submission)
-                    synced += 1
-        
-        session.commit()
-        return synced, f"Synced {synced} new solved problems!"
-    except Exception as e:
-        session.rollback()
-        return 0, f"Error: {str(e)}"
-    finally:
-        session.close()
+    if summary.failed:
+        return 0, "Codeforces API error."
+    return summary.synced, summary.message
 
 
 def validate_handle(handle: str) -> tuple[bool, str]:
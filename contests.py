@@ -0,0 +1,390 @@
+"""
+Contest mode for Competitive Programming Platform.
+Time-boxed contests over a fixed problem set with ICPC-style scoring
+(problems solved, then penalty minutes). Standings are updated
+incrementally as each attempt arrives, from "Mark Solved" or from polling
+the Codeforces contest.status feed, and never recomputed from scratch.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from sqlalchemy import func, insert, select
+from models import (
+    get_session, bump_data_version, User, Problem,
+    Contest, ContestProblem, ContestResult, ContestStanding
+)
+
+CF_PAGE_SIZE = 500
+CF_POLL_INTERVAL = 30.0  # seconds between Codeforces polls per contest
+# Verdicts that do not count as attempts under ICPC rules
+IGNORED_VERDICTS = {"COMPILATION_ERROR", "SKIPPED"}
+PENDING_VERDICTS = {None, "TESTING"}
+LABELS = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+_poll_lock = threading.Lock()
+_last_poll: dict[int, float] = {}
+
+
+@dataclass(slots=True, frozen=True)
+class ContestRow:
+    """Lightweight view of a contest for list pages."""
+    id: int
+    name: str
+    start_at: datetime
+    end_at: datetime
+    penalty_minutes: int
+    cf_contest_id: int | None
+
+    def status(self, now: datetime | None = None) -> str:
+        """"upcoming", "running" or "finished"."""
+        now = now or datetime.utcnow()
+        if now < self.start_at:
+            return "upcoming"
+        if now <= self.end_at:
+            return "running"
+        return "finished"
+
+
+def create_contest(name: str, start_at: datetime, end_at: datetime, problem_ids: list[int],
+                   penalty_minutes: int = 20, cf_contest_id: int | None = None,
+                   created_by: int | None = None) -> tuple[bool, str]:
+    """
+    Create a contest. Problems are labelled A, B, C... in the given order.
+    Returns (success, message).
+    """
+    if not name:
+        return False, "Name is required."
+    if end_at <= start_at:
+        return False, "Contest must end after it starts."
+    if not problem_ids:
+        return False, "Pick at least one problem."
+    if len(problem_ids) > len(LABELS):
+        return False, f"At most {len(LABELS)} problems per contest."
+
+    session = get_session()
+    try:
+        contest = Contest(
+            name=name,
+            start_at=start_at,
+            end_at=end_at,
+            penalty_minutes=penalty_minutes,
+            cf_contest_id=cf_contest_id or None,
+            cf_cursor=0,
+            created_by=created_by
+        )
+        session.add(contest)
+        session.flush()
+        session.add_all([
+            ContestProblem(contest_id=contest.id, problem_id=problem_id, label=LABELS[i])
+            for i, problem_id in enumerate(problem_ids)
+        ])
+        bump_data_version(session)
+        session.commit()
+        return True, f"Contest '{name}' created with {len(problem_ids)} problems!"
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def delete_contest(contest_id: int):
+    """Delete a contest and its standings."""
+    session = get_session()
+    try:
+        for model in (ContestStanding, ContestResult, ContestProblem):
+            session.query(model).filter(model.contest_id == contest_id).delete()
+        session.query(Contest).filter(Contest.id == contest_id).delete()
+        bump_data_version(session)
+        session.commit()
+    finally:
+        session.close()
+
+
+def list_contests() -> list[ContestRow]:
+    """Get all contests, most recent start first."""
+    session = get_session()
+    try:
+        rows = session.query(
+            Contest.id, Contest.name, Contest.start_at, Contest.end_at,
+            Contest.penalty_minutes, Contest.cf_contest_id
+        ).order_by(Contest.start_at.desc()).all()
+        return [ContestRow(*row) for row in rows]
+    finally:
+        session.close()
+
+
+def get_contest_problems(contest_id: int) -> list[tuple[str, int, str]]:
+    """Get (label, problem_id, title) for a contest, in label order."""
+    session = get_session()
+    try:
+        rows = session.query(ContestProblem.label, Problem.id, Problem.title).join(
+            Problem, ContestProblem.problem_id == Problem.id
+        ).filter(ContestProblem.contest_id == contest_id).order_by(ContestProblem.label).all()
+        return [tuple(row) for row in rows]
+    finally:
+        session.close()
+
+
+def record_attempt(session, contest: Contest, user_id: int, problem_id: int,
+                   at: datetime, accepted: bool) -> bool:
+    """
+    Apply one attempt to a participant's result and running standing.
+    Only the rows for this (contest, user) change. Attempts after a problem
+    is solved are ignored. Returns True if anything changed.
+    """
+    result = session.get(ContestResult, (contest.id, user_id, problem_id))
+    if result is None:
+        result = ContestResult(contest_id=contest.id, user_id=user_id, problem_id=problem_id, wrong_attempts=0)
+        session.add(result)
+    elif result.solved_at is not None:
+        return False
+
+    standing = session.get(ContestStanding, (contest.id, user_id))
+    if standing is None:
+        standing = ContestStanding(contest_id=contest.id, user_id=user_id, solved=0, penalty=0)
+        session.add(standing)
+
+    if not accepted:
+        result.wrong_attempts += 1
+        return True
+
+    minutes = int((at - contest.start_at).total_seconds() // 60)
+    result.solved_at = at
+    result.penalty = minutes + result.wrong_attempts * contest.penalty_minutes
+    standing.solved += 1
+    standing.penalty += result.penalty
+    if standing.last_solved_at is None or at > standing.last_solved_at:
+        standing.last_solved_at = at
+    return True
+
+
+def record_solve(session, user_id: int, problem_id: int, solved_at: datetime) -> bool:
+    """
+    Apply a solve to every running contest that includes the problem.
+    Call inside the transaction that records the solve. Returns True if any
+    standing changed.
+    """
+    contests = session.query(Contest).join(
+        ContestProblem, ContestProblem.contest_id == Contest.id
+    ).filter(
+        ContestProblem.problem_id == problem_id,
+        Contest.start_at <= solved_at,
+        Contest.end_at >= solved_at
+    ).all()
+    changed = False
+    for contest in contests:
+        changed = record_attempt(session, contest, user_id, problem_id, solved_at, accepted=True) or changed
+    return changed
+
+
+def recompute_standings(session, contest_ids: list[int] | None = None) -> int:
+    """
+    Recompute running standings from per-problem results with one
+    INSERT ... SELECT, for the given contests or all, in the caller's
+    transaction. Returns the number of standings written.
+    """
+    stale = session.query(ContestStanding)
+    results = select(
+        ContestResult.contest_id,
+        ContestResult.user_id,
+        func.count(ContestResult.solved_at),
+        func.coalesce(func.sum(ContestResult.penalty), 0),
+        func.max(ContestResult.solved_at)
+    ).group_by(ContestResult.contest_id, ContestResult.user_id)
+    if contest_ids is not None:
+        stale = stale.filter(ContestStanding.contest_id.in_(contest_ids))
+        results = results.where(ContestResult.contest_id.in_(contest_ids))
+    stale.delete(synchronize_session=False)
+    return session.execute(insert(ContestStanding).from_select(
+        ["contest_id", "user_id", "solved", "penalty", "last_solved_at"], results
+    )).rowcount
+
+
+def rebuild_standings(contest_id: int | None = None) -> tuple[bool, str]:
+    """
+    Recompute running standings from per-problem results with one
+    INSERT ... SELECT, for one contest or all. Returns (success, message).
+    """
+    session = get_session()
+    try:
+        count = recompute_standings(session, None if contest_id is None else [contest_id])
+        bump_data_version(session)
+        session.commit()
+        return True, f"Rebuilt {count} contest standings."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def _fetch_new_cf_submissions(cf_contest_id: int, cursor: int, since: datetime) -> list[dict] | None:
+    """
+    Page through contest.status (newest first) until reaching the cursor or
+    a submission made before `since`, so the first poll of a linked contest
+    does not page through the whole feed.
+    """
+    from codeforces_api import get_contest_submissions
+
+    since_seconds = since.replace(tzinfo=timezone.utc).timestamp()
+    fresh = []
+    start = 1
+    while True:
+        page = get_contest_submissions(cf_contest_id, start, CF_PAGE_SIZE)
+        if page is None:
+            return None
+        new = [
+            submission for submission in page
+            if submission.get("id", 0) > cursor and submission.get("creationTimeSeconds", 0) >= since_seconds
+        ]
+        fresh.extend(new)
+        if len(new) < len(page) or len(page) < CF_PAGE_SIZE:
+            break
+        start += CF_PAGE_SIZE
+    fresh.sort(key=lambda submission: submission["id"])
+    return fresh
+
+
+def poll_cf_contest(contest_id: int) -> tuple[int, str]:
+    """
+    Apply Codeforces submissions made since the contest's cursor.
+    Processing stops at the first submission still being judged by one of
+    our users on one of the contest's problems, so it is picked up by the
+    next poll; the cursor moves past everything else. Returns (attempts
+    applied, message).
+    """
+    session = get_session()
+    try:
+        contest = session.get(Contest, contest_id)
+        if not contest or not contest.cf_contest_id:
+            return 0, "Contest is not linked to Codeforces."
+
+        fresh = _fetch_new_cf_submissions(contest.cf_contest_id, contest.cf_cursor, contest.start_at)
+        if fresh is None:
+            return 0, "Codeforces API error."
+        if not fresh:
+            return 0, "No new submissions."
+
+        problem_ids = {
+            (cf_contest_id, index): problem_id
+            for problem_id, cf_contest_id, index in session.query(
+                Problem.id, Problem.cf_contest_id, Problem.cf_problem_index
+            ).join(ContestProblem, ContestProblem.problem_id == Problem.id).filter(
+                ContestProblem.contest_id == contest.id
+            ).all()
+        }
+        handles = {
+            member.get("handle", "").lower()
+            for submission in fresh
+            for member in submission.get("author", {}).get("members", [])
+        }
+        user_ids = {
+            handle.lower(): user_id
+            for user_id, handle in session.query(User.id, User.cf_handle).filter(
+                User.cf_handle.isnot(None)
+            ).all()
+            if handle.lower() in handles
+        }
+
+        applied = 0
+        for submission in fresh:
+            verdict = submission.get("verdict")
+            problem = submission.get("problem", {})
+            problem_id = problem_ids.get((problem.get("contestId"), problem.get("index")))
+            at = datetime.fromtimestamp(submission.get("creationTimeSeconds", 0), timezone.utc).replace(tzinfo=None)
+            authors = [member.get("handle", "").lower() for member in submission.get("author", {}).get("members", [])]
+            participants = [user_ids[handle] for handle in authors if handle in user_ids]
+            counts = problem_id is not None and participants and contest.start_at <= at <= contest.end_at
+            # Other people's submissions still in the queue must not hold up the cursor
+            if verdict in PENDING_VERDICTS and counts:
+                break
+            contest.cf_cursor = submission["id"]
+            if not counts or verdict in IGNORED_VERDICTS or verdict in PENDING_VERDICTS:
+                continue
+
+            for user_id in participants:
+                if record_attempt(session, contest, user_id, problem_id, at, verdict == "OK"):
+                    applied += 1
+
+        if applied:
+            bump_data_version(session)
+        session.commit()
+        return applied, f"Applied {applied} new attempts."
+    except Exception as e:
+        session.rollback()
+        return 0, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def poll_cf_contest_if_due(contest_id: int, min_interval: float = CF_POLL_INTERVAL) -> bool:
+    """
+    Poll a contest's Codeforces feed unless it was polled recently.
+    Safe to call on every page view; at most one viewer triggers a poll per interval.
+    """
+    now = time.monotonic()
+    with _poll_lock:
+        if now - _last_poll.get(contest_id, float("-inf")) < min_interval:
+            return False
+        _last_poll[contest_id] = now
+    poll_cf_contest(contest_id)
+    return True
+
+
+def get_standings(contest_id: int) -> dict:
+    """
+    Get contest standings: problems and ranked rows with per-problem cells.
+    Reads the maintained standings through the ordering index, plus one
+    query for the per-problem results. Tied participants share a rank.
+    """
+    session = get_session()
+    try:
+        problems = session.query(ContestProblem.label, ContestProblem.problem_id).filter(
+            ContestProblem.contest_id == contest_id
+        ).order_by(ContestProblem.label).all()
+        labels = {problem_id: label for label, problem_id in problems}
+
+        standings = session.query(
+            ContestStanding.user_id,
+            User.username,
+            ContestStanding.solved,
+            ContestStanding.penalty
+        ).join(User, ContestStanding.user_id == User.id).filter(
+            ContestStanding.contest_id == contest_id
+        ).order_by(
+            ContestStanding.solved.desc(),
+            ContestStanding.penalty,
+            ContestStanding.last_solved_at
+        ).all()
+
+        cells: dict[int, dict[str, str]] = {}
+        for user_id, problem_id, wrong_attempts, penalty in session.query(
+            ContestResult.user_id, ContestResult.problem_id, ContestResult.wrong_attempts, ContestResult.penalty
+        ).filter(ContestResult.contest_id == contest_id).all():
+            if penalty is not None:
+                cell = f"+{wrong_attempts or ''} ({penalty})"
+            else:
+                cell = f"-{wrong_attempts}"
+            cells.setdefault(user_id, {})[labels.get(problem_id, "?")] = cell
+
+        rows = []
+        rank = 0
+        previous = None
+        for position, (user_id, username, solved, penalty) in enumerate(standings, 1):
+            if (solved, penalty) != previous:
+                rank = position
+                previous = (solved, penalty)
+            rows.append({
+                "rank": rank,
+                "user_id": user_id,
+                "username": username,
+                "solved": solved,
+                "penalty": penalty,
+                "cells": cells.get(user_id, {})
+            })
+
+        return {"labels": [label for label, _ in problems], "rows": rows}
+    finally:
+        session.close()
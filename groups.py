@@ -0,0 +1,230 @@
+"""
+Groups (cohorts/teams) for Competitive Programming Platform.
+Users can belong to any number of groups. Group leaderboards and stats
+are read from the shared per-user rollups in leaderboard.get_user_totals,
+so each group view is a membership lookup plus vectorized selection and
+sorting rather than another aggregation over submissions.
+"""
+from __future__ import annotations
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+from sqlalchemy import func, select
+from models import get_session, bump_data_version, User, Group, GroupMember
+from leaderboard import get_user_totals
+
+if TYPE_CHECKING:
+    import numpy as np
+
+
+@dataclass(slots=True, frozen=True)
+class GroupRow:
+    """Lightweight view of a group for list pages."""
+    id: int
+    name: str
+    description: str | None
+    member_count: int
+    created_at: datetime | None
+
+
+def create_group(name: str, description: str | None = None) -> tuple[bool, str]:
+    """Create a group. Returns (success, message)."""
+    name = (name or "").strip()
+    if not name:
+        return False, "Name is required."
+
+    session = get_session()
+    try:
+        if session.query(Group.id).filter(Group.name == name).first():
+            return False, f"Group '{name}' already exists."
+        session.add(Group(name=name, description=description or None))
+        bump_data_version(session)
+        session.commit()
+        return True, f"Group '{name}' created!"
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def delete_group(group_id: int):
+    """Delete a group and its memberships."""
+    session = get_session()
+    try:
+        session.query(GroupMember).filter(GroupMember.group_id == group_id).delete()
+        session.query(Group).filter(Group.id == group_id).delete()
+        bump_data_version(session)
+        session.commit()
+    finally:
+        session.close()
+
+
+def set_group_members(group_id: int, user_ids: list[int]) -> tuple[bool, str]:
+    """Replace a group's members in one transaction. Returns (success, message)."""
+    session = get_session()
+    try:
+        wanted = set(user_ids)
+        current = {
+            user_id for (user_id,) in session.query(GroupMember.user_id).filter(GroupMember.group_id == group_id)
+        }
+        removed = current - wanted
+        if removed:
+            session.query(GroupMember).filter(
+                GroupMember.group_id == group_id,
+                GroupMember.user_id.in_(removed)
+            ).delete(synchronize_session=False)
+        added = wanted - current
+        if added:
+            session.execute(GroupMember.__table__.insert(), [
+                {"group_id": group_id, "user_id": user_id} for user_id in sorted(added)
+            ])
+        bump_data_version(session)
+        session.commit()
+        return True, f"Added {len(added)} and removed {len(removed)} members."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def _group_rows(session, user_id: int | None = None) -> list[GroupRow]:
+    member_count = session.query(
+        GroupMember.group_id, func.count(GroupMember.user_id).label("members")
+    ).group_by(GroupMember.group_id).subquery()
+    query = session.query(
+        Group.id, Group.name, Group.description,
+        func.coalesce(member_count.c.members, 0), Group.created_at
+    ).outerjoin(member_count, member_count.c.group_id == Group.id)
+    if user_id is not None:
+        query = query.join(GroupMember, GroupMember.group_id == Group.id).filter(GroupMember.user_id == user_id)
+    return [GroupRow(*row) for row in query.order_by(Group.name).all()]
+
+
+def list_groups() -> list[GroupRow]:
+    """Get all groups with member counts, by name."""
+    session = get_session()
+    try:
+        return _group_rows(session)
+    finally:
+        session.close()
+
+
+def get_user_groups(user_id: int) -> list[GroupRow]:
+    """Get the groups a user belongs to, by name."""
+    session = get_session()
+    try:
+        return _group_rows(session, user_id)
+    finally:
+        session.close()
+
+
+def get_group_member_ids(group_id: int) -> list[int]:
+    """Get the user ids in a group."""
+    session = get_session()
+    try:
+        return [user_id for (user_id,) in session.query(GroupMember.user_id).filter(GroupMember.group_id == group_id)]
+    finally:
+        session.close()
+
+
+def _lookup_totals(member_ids: np.ndarray, time_filter: str) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """(found, solved, points) for each member id from the per-user rollup."""
+    import numpy as np  # Imported on first use, so pages listing groups start faster
+    user_ids, solved, points = get_user_totals(time_filter)
+    if not len(user_ids):
+        zeros = np.zeros(len(member_ids), dtype=np.int64)
+        return zeros.astype(bool), zeros, zeros
+    positions = np.minimum(np.searchsorted(user_ids, member_ids), len(user_ids) - 1)
+    found = user_ids[positions] == member_ids
+    return found, np.where(found, solved[positions], 0), np.where(found, points[positions], 0)
+
+
+def get_group_leaderboard(group_id: int, time_filter: str = "all") -> list[dict]:
+    """
+    Get a group's leaderboard, ranked like get_leaderboard (points, then
+    solved count, then user id). All-time boards list every member; weekly
+    and monthly boards list members who solved something in the window.
+    """
+    session = get_session()
+    try:
+        members = session.query(User.id, User.username).join(
+            GroupMember, GroupMember.user_id == User.id
+        ).filter(GroupMember.group_id == group_id).all()
+    finally:
+        session.close()
+    if not members:
+        return []
+
+    import numpy as np
+    member_ids = np.array([user_id for user_id, _ in members], dtype=np.int64)
+    usernames = [username for _, username in members]
+    found, solved, points = _lookup_totals(member_ids, time_filter)
+    keep = np.ones(len(members), dtype=bool) if time_filter == "all" else found
+    order = np.flatnonzero(keep)[np.lexsort((member_ids[keep], -solved[keep], -points[keep]))]
+    return [
+        {
+            "rank": rank,
+            "user_id": int(member_ids[i]),
+            "username": usernames[i],
+            "solved_count": int(solved[i]),
+            "total_points": int(points[i])
+        }
+        for rank, i in enumerate(order, 1)
+    ]
+
+
+def get_group_standings(time_filter: str = "all") -> list[dict]:
+    """
+    Rank all groups by total member points for a window, with per-group
+    stats. One membership query plus a vectorized lookup and bincount,
+    so it stays cheap with hundreds of groups.
+    """
+    session = get_session()
+    try:
+        groups = session.query(Group.id, Group.name).order_by(Group.id).all()
+        memberships = session.connection().execute(select(GroupMember.group_id, GroupMember.user_id)).all()
+    finally:
+        session.close()
+    if not groups:
+        return []
+
+    import numpy as np
+    group_ids = np.array([group_id for group_id, _ in groups], dtype=np.int64)
+    if memberships:
+        member_groups, member_ids = (np.array(column, dtype=np.int64) for column in zip(*memberships))
+    else:
+        member_groups = member_ids = np.empty(0, dtype=np.int64)
+    group_index = np.searchsorted(group_ids, member_groups)
+    found, solved, points = _lookup_totals(member_ids, time_filter)
+
+    size = len(group_ids)
+    members = np.bincount(group_index, minlength=size)
+    active = np.bincount(group_index, weights=found, minlength=size).astype(np.int64)
+    total_solved = np.bincount(group_index, weights=solved, minlength=size).astype(np.int64)
+    total_points = np.bincount(group_index, weights=points, minlength=size).astype(np.int64)
+
+    order = np.lexsort((group_ids, -total_solved, -total_points))
+    return [
+        {
+            "rank": rank,
+            "group_id": int(group_ids[i]),
+            "name": groups[i][1],
+            "members": int(members[i]),
+            "active_members": int(active[i]),
+            "solved_count": int(total_solved[i]),
+            "total_points": int(total_points[i]),
+            "avg_points": round(float(total_points[i]) / members[i], 1) if members[i] else 0.0
+        }
+        for rank, i in enumerate(order, 1)
+    ]
+
+
+def list_users() -> list[tuple[int, str]]:
+    """Get (id, username) for every user, by username, for membership pickers."""
+    session = get_session()
+    try:
+        return [tuple(row) for row in session.query(User.id, User.username).order_by(User.username).all()]
+    finally:
+        session.close()
@@ -0,0 +1,284 @@
+"""
+Online judge providers for Competitive Programming Platform.
+A provider knows how to find its users' handles and its problems in our
+database, and how to fetch accepted problems, profiles and problem metadata
+from the judge. Each provider declares its own rate limit and cache policy.
+A sync pass fetches from every provider concurrently and then writes all
+new solves, score updates and cursors in one transaction.
+"""
+import abc
+import importlib
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from sqlalchemy import insert
+from models import get_session, bump_data_version, Contest, ContestProblem, JudgeSyncState, Submission
+
+BUILTIN_PROVIDERS = ["codeforces_api"]  # Modules that register a provider on import
+SYNC_WORKERS = 8
+_BATCH = 500  # Ids per IN (...) clause
+
+_providers: dict[str, "JudgeProvider"] = {}
+
+
+class JudgeProvider(abc.ABC):
+    """
+    Base class for an online judge. Subclasses set the class attributes and
+    implement the abstract fetch_* and local lookup methods (a subclass that
+    misses one cannot be instantiated); fetch_* return None on API errors.
+    """
+    name = ""  # Stored in judge_sync_state.judge
+    label = ""  # Shown to users
+    min_interval = 0.0  # Seconds between API requests
+    profile_ttl = 0  # Seconds a fetched profile is reused
+    metadata_ttl = 0  # Seconds fetched problem metadata is reused
+
+    def __init__(self):
+        self._rate_lock = threading.Lock()
+        self._last_request = 0.0
+        self._cache_lock = threading.Lock()
+        self._cache: dict = {}
+
+    @abc.abstractmethod
+    def handles(self, session) -> dict[int, str]:
+        """Get {user_id: handle} for users linked to this judge."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def local_problems(self, session) -> dict:
+        """Get {problem_key: problem_id} for our problems hosted on this judge."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fetch_accepted(self, handle: str, since: int | None = None) -> tuple[set, int | None] | None:
+        """
+        Get (problem keys accepted after submission id `since`, new cursor).
+        `since=None` fetches the whole history.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fetch_profile(self, handle: str) -> dict | None:
+        """Get the judge's profile for a handle (rating, rank, ...)."""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def fetch_problem_metadata(self) -> dict | None:
+        """Get {problem_key: {"name", "rating", "tags"}} for the judge's problemset."""
+        raise NotImplementedError
+
+    def throttle(self) -> float:
+        """Wait for this provider's next request slot. Returns seconds waited."""
+        with self._rate_lock:
+            now = time.time()
+            slot = max(now, self._last_request + self.min_interval)
+            self._last_request = slot
+        wait = slot - now
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def _cached(self, key, ttl: float, fetch):
+        now = time.time()
+        with self._cache_lock:
+            hit = self._cache.get(key)
+        if hit and now - hit[0] < ttl:
+            return hit[1]
+        value = fetch()
+        if value is not None and ttl > 0:
+            with self._cache_lock:
+                self._cache[key] = (now, value)
+        return value
+
+    def get_profile(self, handle: str) -> dict | None:
+        """Profile for a handle, cached for `profile_ttl` seconds."""
+        return self._cached(("profile", handle), self.profile_ttl, lambda: self.fetch_profile(handle))
+
+    def get_problem_metadata(self) -> dict | None:
+        """Problemset metadata, cached for `metadata_ttl` seconds."""
+        return self._cached(("metadata",), self.metadata_ttl, self.fetch_problem_metadata)
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+
+def register_provider(provider: JudgeProvider):
+    """Make a provider available to sync passes."""
+    if not isinstance(provider, JudgeProvider):
+        raise TypeError(f"{type(provider).__name__} is not a JudgeProvider")
+    if not provider.name:
+        raise ValueError(f"{type(provider).__name__} has no name")
+    _providers[provider.name] = provider
+
+
+def get_providers() -> dict[str, JudgeProvider]:
+    """Get all registered providers by name."""
+    for module in BUILTIN_PROVIDERS:
+        importlib.import_module(module)
+    return dict(_providers)
+
+
+def get_provider(name: str) -> JudgeProvider:
+    """Get a provider by name."""
+    return get_providers()[name]
+
+
+def get_profile(judge: str, handle: str) -> dict | None:
+    """Get a (cached) judge profile for a handle."""
+    return get_provider(judge).get_profile(handle)
+
+
+@dataclass(slots=True, frozen=True)
+class SyncSummary:
+    """Outcome of a sync pass."""
+    synced: int  # New submissions recorded
+    accounts: int  # Judge accounts fetched successfully
+    failed: int  # Judge accounts whose fetch failed
+    message: str
+
+
+def _chunks(values: list, size: int = _BATCH):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _plan(session, providers: list[JudgeProvider], user_ids: list[int] | None) -> list[tuple]:
+    """
+    Work out what to fetch: [(provider, problems, watermark, [(user_id, handle, since)])].
+    A cursor is only reused for the same handle and when no problems were added
+    for that judge since it was saved; otherwise the full history is fetched.
+    """
+    plans = []
+    for provider in providers:
+        handles = provider.handles(session)
+        if user_ids is not None:
+            handles = {user_id: handles[user_id] for user_id in user_ids if user_id in handles}
+        if not handles:
+            continue
+        problems = provider.local_problems(session)
+        watermark = max(problems.values(), default=0)
+        states = {
+            state.user_id: state
+            for state in session.query(JudgeSyncState).filter(JudgeSyncState.judge == provider.name)
+        }
+        accounts = []
+        for user_id, handle in handles.items():
+            state = states.get(user_id)
+            fresh = state and state.handle == handle and state.problem_watermark >= watermark
+            accounts.append((user_id, handle, state.cursor if fresh else None))
+        plans.append((provider, problems, watermark, accounts))
+    return plans
+
+
+def _write(session, plans: list[tuple], fetched: dict) -> int:
+    """Record new solves and cursors inside the caller's transaction. Returns new solves."""
+    from contests import record_solve
+    from scoring import apply_solves
+
+    candidates = set()
+    for provider, problems, _, _ in plans:
+        for (name, user_id), (keys, _) in fetched.items():
+            if name == provider.name:
+                candidates.update((user_id, problems[key]) for key in keys if key in problems)
+
+    user_ids = sorted({user_id for user_id, _ in candidates})
+    existing = set()
+    for chunk in _chunks(user_ids):
+        existing.update(session.query(Submission.user_id, Submission.problem_id).filter(
+            Submission.user_id.in_(chunk)
+        ).all())
+    new = sorted(candidates - existing)
+
+    now = datetime.utcnow()
+    if new:
+        session.execute(insert(Submission), [
+            {"user_id": user_id, "problem_id": problem_id, "solved_at": now} for user_id, problem_id in new
+        ])
+        apply_solves(session, new)
+        # Only problems in running contests can change standings
+        running = {
+            problem_id for (problem_id,) in session.query(ContestProblem.problem_id).join(
+                Contest, Contest.id == ContestProblem.contest_id
+            ).filter(Contest.start_at <= now, Contest.end_at >= now)
+        }
+        for user_id, problem_id in new:
+            if problem_id in running:
+                record_solve(session, user_id, problem_id, now)
+        bump_data_version(session)
+
+    for provider, _, watermark, accounts in plans:
+        rows = [
+            {"user_id": user_id, "judge": provider.name, "handle": handle,
+             "cursor": fetched[(provider.name, user_id)][1], "problem_watermark": watermark, "synced_at": now}
+            for user_id, handle, _ in accounts
+            if (provider.name, user_id) in fetched
+        ]
+        for chunk in _chunks([row["user_id"] for row in rows]):
+            session.query(JudgeSyncState).filter(
+                JudgeSyncState.judge == provider.name, JudgeSyncState.user_id.in_(chunk)
+            ).delete(synchronize_session=False)
+        if rows:
+            session.execute(insert(JudgeSyncState), rows)
+    return len(new)
+
+
+def sync_judges(user_ids: list[int] | None = None, judges: list[str] | None = None,
+                workers: int = SYNC_WORKERS, progress=None) -> SyncSummary:
+    """
+    Sync accepted problems for linked users (default: all) from the given
+    judges (default: all). Fetches run concurrently, each provider keeping to
+    its own rate limit; results are written in a single transaction.
+    `progress(judge, user_id, handle, accepted_or_None, seconds)` is called
+    after each fetch.
+    """
+    providers = list(get_providers().values())
+    if judges is not None:
+        providers = [provider for provider in providers if provider.name in judges]
+
+    session = get_session()
+    try:
+        plans = _plan(session, providers, user_ids)
+    finally:
+        session.close()
+
+    def fetch(provider, user_id, handle, since):
+        start = time.perf_counter()
+        try:
+            result = provider.fetch_accepted(handle, since)
+        except Exception as e:
+            print(f"{provider.label} sync error for {handle}: {e}")
+            result = None
+        return provider, user_id, handle, result, time.perf_counter() - start
+
+    tasks = [(provider, *account) for provider, _, _, accounts in plans for account in accounts]
+    if not tasks:
+        return SyncSummary(0, 0, 0, "No linked judge accounts to sync.")
+
+    fetched = {}
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(tasks)))) as pool:
+        futures = [pool.submit(fetch, *task) for task in tasks]
+        for future in as_completed(futures):
+            provider, user_id, handle, result, elapsed = future.result()
+            if result is not None:
+                fetched[(provider.name, user_id)] = result
+            if progress:
+                progress(provider.name, user_id, handle, None if result is None else len(result[0]), elapsed)
+    failed = len(tasks) - len(fetched)
+
+    session = get_session()
+    try:
+        synced = _write(session, plans, fetched)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        return SyncSummary(0, len(fetched), failed, f"Error: {str(e)}")
+    finally:
+        session.close()
+
+    message = f"Synced {synced} new solved problems!"
+    if failed:
+        message += f" ({failed} of {len(tasks)} accounts could not be fetched.)"
+    return SyncSummary(synced, len(fetched), failed, message)
@@ -1,9 +1,109 @@
 """
 Leaderboard calculations for Competitive Programming Platform.
+Also records periodic rank snapshots, so rank trends and deltas are read
+from a small indexed history table instead of replaying submissions.
 """
+from __future__ import annotations
+import os
+import threading
+import time
 from datetime import datetime, timedelta
-from models import get_session, User, Problem, Submission
-from sqlalchemy import func
+from typing import TYPE_CHECKING
+from models import (
+    get_session, get_data_version, bump_data_version, User, Problem, Submission, UserScore,
+    RankSnapshot, RankSnapshotEntry
+)
+from sqlalchemy import func, and_, or_, insert, select, literal
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SNAPSHOT_INTERVAL = timedelta(hours=float(os.environ.get("CP_SNAPSHOT_HOURS", "24")))
+SNAPSHOT_CHECK_SECONDS = 60.0  # How often a process looks at the last snapshot time
+TOTALS_TTL = 300.0  # Bounds how stale a cached weekly/monthly window can get
+
+_totals_lock = threading.Lock()
+_totals_cache: dict[str, tuple[int, float, np.ndarray, np.ndarray, np.ndarray]] = {}
+
+_snapshot_lock = threading.Lock()
+_last_snapshot_check = float("-inf")
+
+
+def _window_start(time_filter: str) -> datetime | None:
+    """Get the earliest solve time counted for a leaderboard window."""
+    if time_filter == "weekly":
+        return datetime.utcnow() - timedelta(days=7)
+    if time_filter == "monthly":
+        return datetime.utcnow() - timedelta(days=30)
+    return None
+
+
+def _ranked_query(session, time_filter: str = "all"):
+    """
+    Build a subquery of user totals with a stable rank column.
+    Ties on points and solved count are broken by user id so that
+    pages never overlap or skip users. All-time totals come from the
+    user_scores rollup; windows aggregate their submissions.
+    """
+    start_date = _window_start(time_filter)
+    
+    if start_date is None:
+        totals = session.query(
+            User.id.label("user_id"),
+            User.username.label("username"),
+            func.coalesce(UserScore.solved_count, 0).label("solved_count"),
+            func.coalesce(UserScore.total_points, 0).label("total_points")
+        ).outerjoin(UserScore, UserScore.user_id == User.id).subquery()
+        return _ranked(session, totals)
+    
+    window = _submission_totals(session, start_date).subquery()
+    totals = session.query(
+        User.id.label("user_id"),
+        User.username.label("username"),
+        window.c.solved_count,
+        window.c.total_points
+    ).join(window, window.c.user_id == User.id).subquery()
+    return _ranked(session, totals)
+
+
+def _submission_totals(session, start_date: datetime):
+    """Per-user solved count and points for submissions since start_date."""
+    return session.query(
+        Submission.user_id.label("user_id"),
+        func.count(Submission.id).label("solved_count"),
+        func.coalesce(func.sum(Problem.points), 0).label("total_points")
+    ).join(
+        Problem, Submission.problem_id == Problem.id, isouter=True
+    ).filter(
+        Submission.solved_at >= start_date
+    ).group_by(Submission.user_id)
+
+
+def _ranked(session, totals):
+    """Add the rank column to a totals subquery."""
+    rank = func.row_number().over(order_by=(
+        totals.c.total_points.desc(),
+        totals.c.solved_count.desc(),
+        totals.c.user_id
+    ))
+    return session.query(
+        totals.c.user_id,
+        totals.c.username,
+        totals.c.solved_count,
+        totals.c.total_points,
+        rank.label("rank")
+    ).subquery()
+
+
+def _to_entry(row) -> dict:
+    """Convert a ranked row into a leaderboard entry."""
+    return {
+        "rank": row.rank,
+        "user_id": row.user_id,
+        "username": row.username,
+        "solved_count": row.solved_count or 0,
+        "total_points": row.total_points or 0
+    }
 
 
 def get_leaderboard(time_filter: str = "all") -> list[dict]:
@@ -14,51 +114,53 @@ def get_leaderboard(time_filter: str = "all") -> list[dict]:
         time_filter: "all", "monthly", or "weekly"
     
     Returns:
-        List of dicts with username, solved_count, total_points, rank
+        List of dicts with user_id, username, solved_count, total_points, rank
     """
     session = get_session()
     try:
-        # Determine date filter
-        if time_filter == "weekly":
-            start_date = datetime.utcnow() - timedelta(days=7)
-        elif time_filter == "monthly":
-            start_date = datetime.utcnow() - timedelta(days=30)
-        else:
-            start_date = None
-        
-        # Build query
-        query = session.query(
-            User.id,
-            User.username,
-            func.count(Submission.id).label("solved_count"),
-            func.coalesce(func.sum(Problem.points), 0).label("total_points")
-        ).join(
-            Submission, User.id == Submission.user_id, isouter=True
-        ).join(
-            Problem, Submission.problem_id == Problem.id, isouter=True
-        )
-        
-        if start_date:
-            query = query.filter(Submission.solved_at >= start_date)
-        
-        # Group and order
-        query = query.group_by(User.id).order_by(
-            func.coalesce(func.sum(Problem.points), 0).desc(),
-            func.count(Submission.id).desc()
-        )
-        
-        results = query.all()
-        
-        leaderboard = []
-        for rank, row in enumerate(results, 1):
-            leaderboard.append({
-                "rank": rank,
-                "username": row.username,
-                "solved_count": row.solved_count or 0,
-                "total_points": row.total_points or 0
-            })
-        
-        return leaderboard
+        ranked = _ranked_query(session, time_filter)
+        results = session.query(ranked).order_by(ranked.c.rank).all()
+        return [_to_entry(row) for row in results]
+    finally:
+        session.close()
+
+
+def get_leaderboard_page(time_filter: str = "all", offset: int = 0, limit: int = 50) -> tuple[list[dict], int]:
+    """
+    Get one page of the leaderboard.
+    
+    Returns:
+        (entries for ranks offset+1 .. offset+limit, total number of ranked users)
+    """
+    session = get_session()
+    try:
+        ranked = _ranked_query(session, time_filter)
+        total = session.query(func.count()).select_from(ranked).scalar() or 0
+        rows = session.query(ranked).filter(
+            ranked.c.rank > offset,
+            ranked.c.rank <= offset + limit
+        ).order_by(ranked.c.rank).all()
+        return [_to_entry(row) for row in rows], total
+    finally:
+        session.close()
+
+
+def get_leaderboard_neighbourhood(user_id: int, time_filter: str = "all", radius: int = 10) -> list[dict]:
+    """
+    Get the leaderboard entries around a user's rank.
+    Returns up to `radius` users above and below, or [] if the user is unranked.
+    """
+    session = get_session()
+    try:
+        ranked = _ranked_query(session, time_filter)
+        user_rank = session.query(ranked.c.rank).filter(ranked.c.user_id == user_id).scalar()
+        if user_rank is None:
+            return []
+        rows = session.query(ranked).filter(
+            ranked.c.rank >= user_rank - radius,
+            ranked.c.rank <= user_rank + radius
+        ).order_by(ranked.c.rank).all()
+        return [_to_entry(row) for row in rows]
     finally:
         session.close()
 
@@ -68,22 +170,10 @@ def get_user_stats(user_id: int) -> dict:
     session = get_session()
     try:
         # Get solved count and points
-        result = session.query(
-            func.count(Submission.id).label("solved_count"),
-            func.coalesce(func.sum(Problem.points), 0).label("total_points")
-        ).join(
-            Problem, Submission.problem_id == Problem.id
-        ).filter(
-            Submission.user_id == user_id
-        ).first()
+        result = session.get(UserScore, user_id)
         
         # Get user's rank
-        leaderboard = get_leaderboard("all")
-        user_rank = None
-        for entry in leaderboard:
-            if session.query(User).filter(User.id == user_id).first().username == entry["username"]:
-                user_rank = entry["rank"]
-                break
+        user_rank = _current_rank(session, user_id, result)
         
         return {
             "solved_count": result.solved_count if result else 0,
@@ -94,13 +184,173 @@ def get_user_stats(user_id: int) -> dict:
         session.close()
 
 
-def get_user_solved_problems(user_id: int) -> list[int]:
-    """Get list of problem IDs solved by user."""
+def get_user_totals(time_filter: str = "all") -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Per-user rollup for a window as (user_ids, solved_counts, total_points)
+    arrays sorted by user id, covering users with at least one solve in the
+    window. Computed once per data version and shared by every caller in
+    the process, so views over many subsets of users (such as groups) do
+    not each re-aggregate submissions.
+    """
+    version = get_data_version()
+    cached = _totals_cache.get(time_filter)
+    if cached and cached[0] == version and time.monotonic() - cached[1] < TOTALS_TTL:
+        return cached[2:]
+
+    session = get_session()
+    try:
+        start_date = _window_start(time_filter)
+        if start_date is None:
+            query = session.query(
+                UserScore.user_id, UserScore.solved_count, UserScore.total_points
+            ).filter(UserScore.solved_count > 0).order_by(UserScore.user_id)
+        else:
+            totals = _submission_totals(session, start_date).subquery()
+            query = session.query(totals).order_by(totals.c.user_id)
+        rows = query.all()
+    finally:
+        session.close()
+
+    import numpy as np  # Only totals need it, so importing this module stays light
+    if rows:
+        user_ids, solved, points = (np.array(column, dtype=np.int64) for column in zip(*rows))
+    else:
+        user_ids = solved = points = np.empty(0, dtype=np.int64)
+    with _totals_lock:
+        _totals_cache[time_filter] = (version, time.monotonic(), user_ids, solved, points)
+    return user_ids, solved, points
+
+
+def _current_rank(session, user_id: int, score: UserScore | None) -> int | None:
+    """
+    All-time rank of a user, counting the users ahead of them through the
+    user_scores ordering index. Users without solves share the (0, 0) tail,
+    which still needs the full ranking.
+    """
+    if score is None or (score.total_points, score.solved_count) == (0, 0):
+        ranked = _ranked_query(session, "all")
+        return session.query(ranked.c.rank).filter(ranked.c.user_id == user_id).scalar()
+    points, solved = score.total_points, score.solved_count
+    ahead = session.query(func.count()).select_from(UserScore).filter(or_(
+        UserScore.total_points > points,
+        and_(UserScore.total_points == points, UserScore.solved_count > solved),
+        and_(UserScore.total_points == points, UserScore.solved_count == solved, UserScore.user_id < user_id)
+    )).scalar()
+    return ahead + 1
+
+
+def get_user_solved_problems(user_id: int) -> set[int]:
+    """Get set of problem IDs solved by user."""
     session = get_session()
     try:
-        submissions = session.query(Submission.problem_id).filter(
+        rows = session.query(Submission.problem_id).filter(
             Submission.user_id == user_id
+        ).distinct().all()
+        return {problem_id for (problem_id,) in rows}
+    finally:
+        session.close()
+
+
+def take_rank_snapshot() -> tuple[bool, str]:
+    """
+    Record every ranked user's all-time rank and totals with one INSERT ... SELECT.
+    Returns (success, message).
+    """
+    session = get_session()
+    try:
+        snapshot = RankSnapshot(taken_at=datetime.utcnow())
+        session.add(snapshot)
+        session.flush()
+        ranked = _ranked_query(session, "all")
+        count = session.execute(insert(RankSnapshotEntry).from_select(
+            ["snapshot_id", "user_id", "rank", "total_points", "solved_count"],
+            select(
+                literal(snapshot.id), ranked.c.user_id, ranked.c.rank,
+                ranked.c.total_points, ranked.c.solved_count
+            ).where(ranked.c.solved_count > 0)
+        )).rowcount
+        bump_data_version(session)
+        session.commit()
+        return True, f"Snapshot #{snapshot.id} recorded {count} users."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def take_rank_snapshot_if_due(interval: timedelta = SNAPSHOT_INTERVAL) -> bool:
+    """
+    Take a snapshot if the latest one is older than `interval`.
+    Safe to call on every page view; each process checks at most once a minute.
+    """
+    global _last_snapshot_check
+    now = time.monotonic()
+    with _snapshot_lock:
+        if now - _last_snapshot_check < SNAPSHOT_CHECK_SECONDS:
+            return False
+        _last_snapshot_check = now
+
+    session = get_session()
+    try:
+        last_taken = session.query(func.max(RankSnapshot.taken_at)).scalar()
+    finally:
+        session.close()
+    if last_taken and datetime.utcnow() - last_taken < interval:
+        return False
+    success, _ = take_rank_snapshot()
+    return success
+
+
+def _baseline_snapshot(session, days: int) -> int | None:
+    """Latest snapshot at least `days` old, else the oldest one there is."""
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    snapshot_id = session.query(RankSnapshot.id).filter(
+        RankSnapshot.taken_at <= cutoff
+    ).order_by(RankSnapshot.taken_at.desc()).limit(1).scalar()
+    if snapshot_id is None:
+        snapshot_id = session.query(RankSnapshot.id).order_by(RankSnapshot.taken_at).limit(1).scalar()
+    return snapshot_id
+
+
+def get_rank_changes(user_ids: list[int], days: int = 7) -> dict[int, int]:
+    """
+    Get each user's all-time rank from about `days` ago.
+    Returns {user_id: previous rank} for users ranked in that snapshot.
+    """
+    if not user_ids:
+        return {}
+    session = get_session()
+    try:
+        snapshot_id = _baseline_snapshot(session, days)
+        if snapshot_id is None:
+            return {}
+        rows = session.query(RankSnapshotEntry.user_id, RankSnapshotEntry.rank).filter(
+            RankSnapshotEntry.snapshot_id == snapshot_id,
+            RankSnapshotEntry.user_id.in_(user_ids)
         ).all()
-        return [s.problem_id for s in submissions]
+        return dict(rows)
+    finally:
+        session.close()
+
+
+def get_rank_history(user_id: int, limit: int = 90) -> list[dict]:
+    """Get a user's most recent snapshots, oldest first."""
+    session = get_session()
+    try:
+        rows = session.query(
+            RankSnapshot.taken_at,
+            RankSnapshotEntry.rank,
+            RankSnapshotEntry.total_points,
+            RankSnapshotEntry.solved_count
+        ).join(
+            RankSnapshot, RankSnapshotEntry.snapshot_id == RankSnapshot.id
+        ).filter(
+            RankSnapshotEntry.user_id == user_id
+        ).order_by(RankSnapshotEntry.snapshot_id.desc()).limit(limit).all()
+        return [
+            {"taken_at": taken_at, "rank": rank, "total_points": points, "solved_count": solved}
+            for taken_at, rank, points, solved in reversed(rows)
+        ]
     finally:
         session.close()
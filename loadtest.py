@@ -0,0 +1,285 @@
+"""
+Concurrent-session load test for Competitive Programming Platform.
+Drives the real page scripts headlessly with Streamlit's AppTest against a
+seeded scratch database and a local Codeforces stand-in, and reports
+throughput, per-step latency and database lock errors.
+
+AppTest swaps a process-global Runtime while a script runs, so concurrent
+AppTests in one process interfere; each simulated session therefore runs
+in its own worker process, all sharing the same database file.
+
+Usage:
+    python loadtest.py --sessions 20 --journeys 5
+    python loadtest.py --sessions 50 --duration 60 --scale small --output data/loadtest.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import multiprocessing
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+LOAD_PASSWORD = "loadtest-pass"
+STEPS = ["login", "dashboard", "mark_solved", "leaderboard_filter"]
+SESSION_KEYS = ["user_id", "username", "is_admin", "logged_in"]
+
+
+@dataclass
+class StepStats:
+    """Latency samples and failures for one journey step."""
+    latencies_ms: list[float] = field(default_factory=list)
+    errors: int = 0
+    lock_errors: int = 0
+
+
+class LoadResults:
+    """Thread-safe collection of step results."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.steps = {step: StepStats() for step in STEPS}
+        self.journeys = 0
+        self.error_samples: list[str] = []
+
+    def record(self, step: str, elapsed_ms: float, error: str | None = None):
+        with self._lock:
+            stats = self.steps[step]
+            stats.latencies_ms.append(elapsed_ms)
+            if error:
+                stats.errors += 1
+                if "database is locked" in error:
+                    stats.lock_errors += 1
+                if len(self.error_samples) < 20:
+                    self.error_samples.append(f"{step}: {error[:200]}")
+
+    def finish_journey(self):
+        with self._lock:
+            self.journeys += 1
+
+    def to_dict(self) -> dict:
+        """Raw samples, for sending results back from a worker process."""
+        return {
+            "journeys": self.journeys,
+            "error_samples": self.error_samples,
+            "steps": {step: vars(stats) for step, stats in self.steps.items()},
+        }
+
+    def merge(self, raw: dict):
+        """Add raw samples from another LoadResults.to_dict()."""
+        with self._lock:
+            self.journeys += raw["journeys"]
+            self.error_samples.extend(raw["error_samples"][:20 - len(self.error_samples)])
+            for step, stats in raw["steps"].items():
+                self.steps[step].latencies_ms.extend(stats["latencies_ms"])
+                self.steps[step].errors += stats["errors"]
+                self.steps[step].lock_errors += stats["lock_errors"]
+
+    def summary(self, wall_seconds: float) -> dict:
+        steps = {}
+        for step, stats in self.steps.items():
+            samples = sorted(stats.latencies_ms)
+            steps[step] = {
+                "count": len(samples),
+                "errors": stats.errors,
+                "lock_errors": stats.lock_errors,
+                "p50_ms": round(statistics.median(samples), 1) if samples else None,
+                "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))], 1) if samples else None,
+                "max_ms": round(samples[-1], 1) if samples else None,
+            }
+        total_steps = sum(step["count"] for step in steps.values())
+        return {
+            "wall_seconds": round(wall_seconds, 2),
+            "journeys": self.journeys,
+            "journeys_per_second": round(self.journeys / wall_seconds, 2) if wall_seconds else 0.0,
+            "steps_per_second": round(total_steps / wall_seconds, 2) if wall_seconds else 0.0,
+            "lock_errors": sum(step["lock_errors"] for step in steps.values()),
+            "steps": steps,
+            "error_samples": self.error_samples,
+        }
+
+
+def seed_database(db_path: str, sessions: int, scale: str) -> list[tuple[str, str]]:
+    """
+    Fill a scratch database and add one login-capable user per session.
+    Returns [(username, cf_handle)] for the load users.
+    """
+    import bcrypt
+    import models
+    from benchmarks import SCALES, generate_data
+
+    generate_data(db_path, seed=7, progress=lambda message: None, **SCALES[scale])
+    password_hash = bcrypt.hashpw(LOAD_PASSWORD.encode(), bcrypt.gensalt()).decode()
+    users = [(f"load{i}", f"cf_load{i}") for i in range(sessions)]
+    with models.engine.begin() as conn:
+        conn.execute(models.User.__table__.insert(), [
+            {"username": username, "password_hash": password_hash, "cf_handle": handle, "is_admin": False}
+            for username, handle in users
+        ])
+    return users
+
+
+def _run_page(script: str, state: dict, timeout: float):
+    """Run a page script as a logged-in session. Returns the AppTest."""
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(APP_DIR, script), default_timeout=timeout)
+    for key, value in state.items():
+        at.session_state[key] = value
+    return at.run()
+
+
+def _error_of(at) -> str | None:
+    if at.exception:
+        return "; ".join(str(e.value) for e in at.exception)
+    return None
+
+
+def run_journey(username: str, results: LoadResults, timeout: float):
+    """Login, view dashboard, mark a problem solved, switch leaderboard filters."""
+    from streamlit.testing.v1 import AppTest
+
+    # Login
+    start = time.perf_counter()
+    at = AppTest.from_file(os.path.join(APP_DIR, "streamlit_app.py"), default_timeout=timeout).run()
+    at.text_input[0].input(username)
+    at.text_input[1].input(LOAD_PASSWORD)
+    at.button[0].click().run()
+    logged_in = "logged_in" in at.session_state and at.session_state["logged_in"]
+    error = _error_of(at) or (None if logged_in else "login failed")
+    results.record("login", (time.perf_counter() - start) * 1000, error)
+    if error:
+        return
+    state = {key: at.session_state[key] for key in SESSION_KEYS}
+
+    # Dashboard
+    start = time.perf_counter()
+    at = _run_page("pages/1_Dashboard.py", state, timeout)
+    results.record("dashboard", (time.perf_counter() - start) * 1000, _error_of(at))
+
+    # Mark the first unsolved problem solved
+    start = time.perf_counter()
+    at = _run_page("pages/2_Problems.py", state, timeout)
+    error = _error_of(at)
+    if not error:
+        buttons = [button for button in at.button if str(button.key or "").startswith("solve_")]
+        if buttons:
+            buttons[0].click().run()
+            error = _error_of(at)
+    results.record("mark_solved", (time.perf_counter() - start) * 1000, error)
+
+    # Leaderboard, then switch the time filter
+    start = time.perf_counter()
+    at = _run_page("pages/3_Leaderboard.py", state, timeout)
+    error = _error_of(at)
+    if not error:
+        at.radio[0].set_value("Weekly").run()
+        at.radio[0].set_value("Monthly").run()
+        error = _error_of(at)
+    results.record("leaderboard_filter", (time.perf_counter() - start) * 1000, error)
+
+    results.finish_journey()
+
+
+def _session_worker(db_url: str, cf_base: str, username: str, journeys: int,
+                    start_at: float, deadline: float | None, timeout: float) -> dict:
+    """Run one simulated session's journeys in a worker process."""
+    os.environ["CP_DATABASE_URL"] = db_url
+    os.environ["CP_CF_API_BASE"] = cf_base
+    sys.path.insert(0, APP_DIR)
+    from streamlit.testing.v1 import AppTest  # noqa: F401 - import before the clock starts
+    import auth, leaderboard, problems, codeforces_api  # noqa: F401
+
+    # All workers start together once imports are done
+    time.sleep(max(0.0, start_at - time.time()))
+    results = LoadResults()
+    done = 0
+    while (deadline and time.time() < deadline) or (not deadline and done < journeys):
+        try:
+            run_journey(username, results, timeout)
+        except Exception as e:
+            results.record("login", 0.0, f"{type(e).__name__}: {e}")
+        done += 1
+    raw = results.to_dict()
+    raw["finished_at"] = time.time()
+    return raw
+
+
+def run_load(db_url: str, cf_base: str, users: list[tuple[str, str]], journeys: int,
+             duration: float | None, timeout: float, warmup: float) -> dict:
+    """
+    Run one worker process per session until each has done `journeys` or
+    `duration` elapses. Workers start together `warmup` seconds from now so
+    process start-up is not counted as load.
+    """
+    results = LoadResults()
+    start_at = time.time() + warmup
+    deadline = start_at + duration if duration else None
+    finished_at = start_at
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=len(users), mp_context=context) as pool:
+        futures = [
+            pool.submit(_session_worker, db_url, cf_base, username, journeys, start_at, deadline, timeout)
+            for username, _ in users
+        ]
+        for future in futures:
+            raw = future.result()
+            finished_at = max(finished_at, raw.pop("finished_at"))
+            results.merge(raw)
+    return results.summary(finished_at - start_at)
+
+
+def print_summary(summary: dict):
+    print(f"\nJourneys: {summary['journeys']} in {summary['wall_seconds']}s "
+          f"({summary['journeys_per_second']}/s, {summary['steps_per_second']} steps/s)")
+    print(f"{'step':<20}{'count':>8}{'errors':>8}{'locked':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for step, stats in summary["steps"].items():
+        print(f"{step:<20}{stats['count']:>8}{stats['errors']:>8}{stats['lock_errors']:>8}"
+              f"{stats['p50_ms'] or 0:>10}{stats['p95_ms'] or 0:>10}{stats['max_ms'] or 0:>10}")
+    for sample in summary["error_samples"]:
+        print(f"  ! {sample}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test the CP Platform pages with concurrent sessions.")
+    parser.add_argument("--sessions", type=int, default=10, help="concurrent simulated sessions")
+    parser.add_argument("--journeys", type=int, default=3, help="journeys per session (ignored with --duration)")
+    parser.add_argument("--duration", type=float, help="run for this many seconds instead")
+    parser.add_argument("--scale", default="tiny", help="benchmark data scale to seed (see benchmarks.py)")
+    parser.add_argument("--db", help="scratch database path (default: a temp file)")
+    parser.add_argument("--cf-latency", type=float, default=0.05, help="simulated Codeforces latency (s)")
+    parser.add_argument("--timeout", type=float, default=60.0, help="per-script run timeout (s)")
+    parser.add_argument("--warmup", type=float, default=15.0, help="seconds allowed for worker start-up")
+    parser.add_argument("--output", help="write the summary JSON here")
+    args = parser.parse_args(argv)
+
+    from cf_stub import CodeforcesStub
+
+    db_path = args.db or os.path.join(tempfile.mkdtemp(), "loadtest.db")
+    print(f"Seeding {db_path} (scale={args.scale}, sessions={args.sessions})")
+    users = seed_database(db_path, args.sessions, args.scale)
+
+    stub = CodeforcesStub({handle: [(1000, "A")] for _, handle in users}, latency=args.cf_latency)
+    cf_base = stub.start()
+    try:
+        summary = run_load(f"sqlite:///{db_path}", cf_base, users, args.journeys, args.duration,
+                           args.timeout, args.warmup)
+    finally:
+        stub.stop()
+    summary["config"] = {key: value for key, value in vars(args).items() if key != "output"}
+
+    print_summary(summary)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+        print(f"Summary written to {args.output}")
+    failed = sum(stats["errors"] for stats in summary["steps"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
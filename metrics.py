@@ -0,0 +1,387 @@
+"""
+Application metrics for Competitive Programming Platform.
+Counters and latency histograms for page renders and Codeforces calls,
+active-session tracking, on-demand cProfile captures, and export in the
+Prometheus text format.
+"""
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+# Histogram bucket upper bounds in milliseconds (last bucket is +Inf)
+LATENCY_BUCKETS_MS = (0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+METRICS_FILE = os.environ.get("CP_METRICS_FILE", os.path.join(DATA_DIR, "metrics.prom"))
+METRICS_FILE_INTERVAL = 15.0  # seconds between Prometheus file rewrites
+ACTIVE_SESSION_WINDOW = 300.0  # a session is active if it rendered in the last 5 minutes
+RECENT_RENDER_SAMPLES = 500  # per page, for exact p50/p95 in the admin view
+PROFILE_TOP_FUNCTIONS = 40
+
+PAGES = ["home", "dashboard", "problems", "leaderboard", "leaderboard_live", "contests", "contests_live", "groups", "admin"]
+
+METRIC_HELP = {
+    "cp_page_renders_total": ("counter", "Page script runs."),
+    "cp_page_render_milliseconds": ("histogram", "Page render time split by phase (total, db, cf, render)."),
+    "cp_cf_requests_total": ("counter", "Codeforces API requests by method and outcome."),
+    "cp_cf_request_milliseconds": ("histogram", "Codeforces API request latency."),
+    "cp_cf_rate_limit_wait_milliseconds": ("histogram", "Time spent sleeping for the Codeforces rate limit."),
+    "cp_active_sessions": ("gauge", "Browser sessions that rendered a page in the last 5 minutes."),
+    "cp_api_requests_total": ("counter", "JSON API requests by endpoint and HTTP status."),
+    "cp_api_request_milliseconds": ("histogram", "JSON API request latency."),
+}
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds)."""
+
+    def __init__(self, buckets: tuple = LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value_ms: float):
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile as the upper bound of the bucket that holds it."""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+    def to_dict(self) -> dict:
+        """Export counts and summary statistics."""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(self.quantile(0.5), 3),
+            "p95_ms": round(self.quantile(0.95), 3),
+            "max_ms": round(self.max, 3),
+            "buckets_ms": list(self.buckets),
+            "bucket_counts": list(self.counts),
+        }
+
+
+def _label_key(labels: dict | None) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def _escape_label(value) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_key: tuple, extra: tuple = ()) -> str:
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    body = ",".join(f'{name}="{_escape_label(value)}"' for name, value in pairs)
+    return "{" + body + "}"
+
+
+class MetricsRegistry:
+    """Thread-safe counters, gauges and histograms keyed by name and labels."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: dict[tuple, float] = {}
+        self._gauges: dict[tuple, float] = {}
+        self._histograms: dict[tuple, LatencyHistogram] = {}
+
+    def inc(self, name: str, labels: dict | None = None, value: float = 1.0):
+        """Increment a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, labels: dict | None = None):
+        """Set a gauge."""
+        with self._lock:
+            self._gauges[(name, _label_key(labels))] = value
+
+    def observe(self, name: str, value_ms: float, labels: dict | None = None):
+        """Record a histogram observation in milliseconds."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(value_ms)
+
+    def histogram(self, name: str, labels: dict | None = None) -> LatencyHistogram | None:
+        """Get one histogram, if anything was observed for it."""
+        with self._lock:
+            return self._histograms.get((name, _label_key(labels)))
+
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            series: dict[str, list] = {}
+            for (name, labels), value in self._counters.items():
+                series.setdefault(name, []).append((labels, value))
+            for (name, labels), value in self._gauges.items():
+                series.setdefault(name, []).append((labels, value))
+            for (name, labels), histogram in self._histograms.items():
+                series.setdefault(name, []).append((labels, histogram.to_dict()))
+
+        lines = []
+        for name in sorted(series):
+            kind, help_text = METRIC_HELP.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(series[name], key=lambda item: item[0]):
+                if isinstance(value, dict):
+                    cumulative = 0
+                    for bound, bucket_count in zip(value["buckets_ms"] + ["+Inf"], value["bucket_counts"]):
+                        cumulative += bucket_count
+                        lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {value['total_ms']}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+                else:
+                    lines.append(f"{name}{_format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    return _registry
+
+
+# --- Page render tracking ---------------------------------------------------
+
+@dataclass
+class RenderTimings:
+    """Time spent in external calls during one page render."""
+    page: str
+    db_ms: float = 0.0
+    cf_ms: float = 0.0
+    started: float = field(default_factory=time.perf_counter)
+
+
+_current_render: ContextVar[RenderTimings | None] = ContextVar("current_render", default=None)
+_state_lock = threading.Lock()
+_recent_renders: dict[str, deque] = {}
+_session_last_seen: dict[str, float] = {}
+_profile_requests: set[str] = set()
+_profiles: dict[str, dict] = {}
+_last_file_write = 0.0
+
+
+def add_render_time(phase: str, elapsed_ms: float):
+    """Attribute time spent in the DB ("db") or Codeforces ("cf") to the current render."""
+    timings = _current_render.get()
+    if timings is None:
+        return
+    if phase == "db":
+        timings.db_ms += elapsed_ms
+    elif phase == "cf":
+        timings.cf_ms += elapsed_ms
+
+
+def _current_session_id() -> str | None:
+    try:
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+    except ImportError:
+        return None
+    ctx = get_script_run_ctx(suppress_warning=True)
+    return ctx.session_id if ctx else None
+
+
+def _touch_session():
+    session_id = _current_session_id()
+    now = time.time()
+    with _state_lock:
+        if session_id:
+            _session_last_seen[session_id] = now
+        cutoff = now - ACTIVE_SESSION_WINDOW
+        for stale in [sid for sid, seen in _session_last_seen.items() if seen < cutoff]:
+            del _session_last_seen[stale]
+        active = len(_session_last_seen)
+    _registry.set_gauge("cp_active_sessions", active)
+
+
+def request_profile(page: str):
+    """Capture a cProfile of the next render of `page`."""
+    with _state_lock:
+        _profile_requests.add(page)
+
+
+def get_profiles() -> dict[str, dict]:
+    """Get the latest captured profile per page."""
+    with _state_lock:
+        return dict(_profiles)
+
+
+def pending_profiles() -> set[str]:
+    """Get pages whose next render will be profiled."""
+    with _state_lock:
+        return set(_profile_requests)
+
+
+def _store_profile(page: str, profiler: cProfile.Profile, elapsed_ms: float):
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(PROFILE_TOP_FUNCTIONS)
+    with _state_lock:
+        _profiles[page] = {
+            "captured_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "elapsed_ms": round(elapsed_ms, 1),
+            "stats": output.getvalue(),
+        }
+
+
+@contextmanager
+def track_page(page: str):
+    """
+    Time one run of a page script.
+    Records total time and its split into DB, Codeforces and rendering,
+    marks the caller's session active, and captures a cProfile if one was
+    requested for this page. Nested tracking (e.g. a fragment inside a page)
+    also counts toward the outer render. Streamlit's rerun/stop exceptions
+    pass through.
+    """
+    timings = RenderTimings(page=page)
+    parent = _current_render.get()
+    token = _current_render.set(timings)
+    _touch_session()
+
+    with _state_lock:
+        profile = page in _profile_requests
+        _profile_requests.discard(page)
+    profiler = cProfile.Profile() if profile else None
+    if profiler:
+        profiler.enable()
+    try:
+        yield timings
+    finally:
+        if profiler:
+            profiler.disable()
+        _current_render.reset(token)
+        if parent is not None:
+            parent.db_ms += timings.db_ms
+            parent.cf_ms += timings.cf_ms
+        total_ms = (time.perf_counter() - timings.started) * 1000
+        if profiler:
+            _store_profile(page, profiler, total_ms)
+        _record_render(timings, total_ms)
+
+
+def _record_render(timings: RenderTimings, total_ms: float):
+    render_ms = max(0.0, total_ms - timings.db_ms - timings.cf_ms)
+    page = timings.page
+    _registry.inc("cp_page_renders_total", {"page": page})
+    for phase, value in (("total", total_ms), ("db", timings.db_ms), ("cf", timings.cf_ms), ("render", render_ms)):
+        _registry.observe("cp_page_render_milliseconds", value, {"page": page, "phase": phase})
+    with _state_lock:
+        _recent_renders.setdefault(page, deque(maxlen=RECENT_RENDER_SAMPLES)).append(
+            (total_ms, timings.db_ms, timings.cf_ms, render_ms)
+        )
+    maybe_write_metrics_file()
+
+
+def _percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def page_render_summary() -> list[dict]:
+    """Get p50/p95 render times per page from recent renders."""
+    with _state_lock:
+        samples = {page: list(renders) for page, renders in _recent_renders.items()}
+    summary = []
+    for page, renders in sorted(samples.items()):
+        columns = list(zip(*renders))
+        row = {"page": page, "renders": len(renders)}
+        for name, values in zip(("total", "db", "cf", "render"), columns):
+            row[f"{name}_p50_ms"] = round(_percentile(values, 0.5), 1)
+            row[f"{name}_p95_ms"] = round(_percentile(values, 0.95), 1)
+        summary.append(row)
+    return summary
+
+
+def active_session_count() -> int:
+    """Get the number of sessions that rendered a page recently."""
+    _touch_session()
+    with _state_lock:
+        return len(_session_last_seen)
+
+
+# --- DB timing --------------------------------------------------------------
+
+def _db_before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context, so a statement that fails leaves nothing behind
+    context.render_timer_start = time.perf_counter()
+
+
+def _db_after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "render_timer_start", None)
+    if start is not None:
+        add_render_time("db", (time.perf_counter() - start) * 1000)
+
+
+def attach_db_timer(engine):
+    """Attribute time spent executing SQL on `engine` to the current page render."""
+    from sqlalchemy import event
+    if not event.contains(engine, "after_cursor_execute", _db_after_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _db_before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _db_after_cursor_execute)
+
+
+# --- Export -----------------------------------------------------------------
+
+def render_prometheus() -> str:
+    """Render all application metrics in the Prometheus text format."""
+    active_session_count()
+    return _registry.render_prometheus()
+
+
+def write_metrics_file(path: str = METRICS_FILE):
+    """Atomically write the Prometheus text file (node_exporter textfile style)."""
+    global _last_file_write
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+    _last_file_write = time.time()
+
+
+def maybe_write_metrics_file():
+    """Rewrite the Prometheus file if the last write is older than the interval."""
+    if time.time() - _last_file_write < METRICS_FILE_INTERVAL:
+        return
+    try:
+        write_metrics_file()
+    except OSError as e:
+        print(f"Metrics file write failed: {e}")
@@ -4,22 +4,86 @@ Uses SQLAlchemy ORM with SQLite.
 """
 import os
 from datetime import datetime
-from sqlalchemy import create_engine, Column, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import create_engine, event, Column, Integer, String, Boolean, DateTime, ForeignKey, Index, update, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
-import bcrypt
+from metrics import attach_db_timer
 
 # Database setup
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 DATABASE_PATH = os.path.join(DATA_DIR, "cp_platform.db")
-DATABASE_URL = f"sqlite:///{DATABASE_PATH}"
+DATABASE_URL = os.environ.get("CP_DATABASE_URL", f"sqlite:///{DATABASE_PATH}")
+
+
+def _set_wal_mode(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def enable_wal(engine):
+    """
+    Put a file-based SQLite database in WAL mode on every new connection:
+    readers and the writer no longer block each other, and online backups
+    copy a read snapshot in one step. The mode is stored in the file, so
+    this is a no-op once set.
+    """
+    url = engine.url
+    if url.get_backend_name() != "sqlite" or not url.database or url.database == ":memory:":
+        return
+    if not event.contains(engine, "connect", _set_wal_mode):
+        event.listen(engine, "connect", _set_wal_mode)
+
 
 engine = create_engine(DATABASE_URL, echo=False)
+enable_wal(engine)
+attach_db_timer(engine)
 SessionLocal = sessionmaker(bind=engine)
 Base = declarative_base()
 
 
+def enable_query_metrics(slow_ms: float | None = None):
+    """Attach query timing, slow-query logging and EXPLAIN capture to the engine."""
+    from query_metrics import instrument_engine
+    instrument_engine(engine, slow_ms=slow_ms)
+
+
+def disable_query_metrics():
+    """Detach query instrumentation from the engine."""
+    from query_metrics import uninstrument_engine
+    uninstrument_engine(engine)
+
+
+def query_metrics_enabled() -> bool:
+    """Check whether query instrumentation is attached to the engine."""
+    from query_metrics import is_instrumented
+    return is_instrumented(engine)
+
+
+# Opt-in instrumentation, e.g. CP_QUERY_METRICS=1 CP_SLOW_QUERY_MS=50
+if os.environ.get("CP_QUERY_METRICS"):
+    enable_query_metrics(float(os.environ.get("CP_SLOW_QUERY_MS", "100")))
+
+
+def use_database(url: str):
+    """
+    Point the module at a different database (e.g. a scratch DB for benchmarks).
+    Existing sessions keep their old binding; new ones use the new engine.
+    """
+    global engine, DATABASE_URL
+    instrumented = query_metrics_enabled()
+    engine.dispose()
+    DATABASE_URL = url
+    engine = create_engine(url, echo=False)
+    enable_wal(engine)
+    attach_db_timer(engine)
+    SessionLocal.configure(bind=engine)
+    if instrumented:
+        enable_query_metrics()
+    return engine
+
+
 class User(Base):
     """User model for authentication and profile."""
     __tablename__ = "users"
@@ -36,10 +100,12 @@ class User(Base):
     
     def set_password(self, password: str):
         """Hash and set password."""
+        import bcrypt
         self.password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
     
     def check_password(self, password: str) -> bool:
         """Verify password."""
+        import bcrypt
         return bcrypt.checkpw(password.encode(), self.password_hash.encode())
 
 
@@ -50,7 +116,9 @@ class Problem(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String(200), nullable=False)
     problem_url = Column(String(500), nullable=True)
-    points = Column(Integer, default=10)  # Admin-defined points
+    points = Column(Integer, default=10)  # Current value; see scoring.py
+    base_points = Column(Integer, nullable=True)  # Admin-defined points
+    cf_rating = Column(Integer, nullable=True)  # Mirrored from the CF problemset
     cf_contest_id = Column(Integer, nullable=True)  # For Codeforces problems
     cf_problem_index = Column(String(5), nullable=True)  # e.g., "A", "B1"
     added_by = Column(Integer, ForeignKey("users.id"), nullable=True)
@@ -73,11 +141,202 @@ class Submission(Base):
     # Relationships
     user = relationship("User", back_populates="submissions")
     problem = relationship("Problem", back_populates="submissions")
+    
+    __table_args__ = (
+        Index("ix_submissions_user_solved", "user_id", "solved_at"),
+        Index("ix_submissions_solved_at", "solved_at"),
+    )
+
+
+class Contest(Base):
+    """A time-boxed contest over a fixed problem set, scored ICPC-style."""
+    __tablename__ = "contests"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(200), nullable=False)
+    start_at = Column(DateTime, nullable=False)
+    end_at = Column(DateTime, nullable=False)
+    penalty_minutes = Column(Integer, nullable=False, default=20)  # Per wrong attempt before AC
+    cf_contest_id = Column(Integer, nullable=True)  # Poll this CF contest's submissions
+    cf_cursor = Column(Integer, nullable=False, default=0)  # Last CF submission id processed
+    created_by = Column(Integer, ForeignKey("users.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ContestProblem(Base):
+    """A problem in a contest's problem set."""
+    __tablename__ = "contest_problems"
+    
+    contest_id = Column(Integer, ForeignKey("contests.id"), primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problems.id"), primary_key=True, index=True)
+    label = Column(String(5), nullable=False)  # e.g., "A", "B"
+
+
+class ContestResult(Base):
+    """One participant's attempts on one contest problem."""
+    __tablename__ = "contest_results"
+    
+    contest_id = Column(Integer, ForeignKey("contests.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    problem_id = Column(Integer, ForeignKey("problems.id"), primary_key=True)
+    wrong_attempts = Column(Integer, nullable=False, default=0)
+    solved_at = Column(DateTime, nullable=True)
+    penalty = Column(Integer, nullable=True)  # Minutes, set when solved
+
+
+class ContestStanding(Base):
+    """Running totals per participant, updated as each solve arrives."""
+    __tablename__ = "contest_standings"
+    
+    contest_id = Column(Integer, ForeignKey("contests.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    solved = Column(Integer, nullable=False, default=0)
+    penalty = Column(Integer, nullable=False, default=0)
+    last_solved_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("ix_contest_standings_order", "contest_id", solved.desc(), "penalty", "last_solved_at"),
+    )
+
+
+class UserScore(Base):
+    """All-time totals per user, kept in step with submissions and problem values."""
+    __tablename__ = "user_scores"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    solved_count = Column(Integer, nullable=False, default=0)
+    total_points = Column(Integer, nullable=False, default=0)
+    
+    __table_args__ = (
+        Index("ix_user_scores_order", total_points.desc(), solved_count.desc(), "user_id"),
+    )
+
+
+class Group(Base):
+    """A cohort or team of users with its own leaderboard."""
+    __tablename__ = "groups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)
+    description = Column(String(500), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class GroupMember(Base):
+    """Membership of a user in a group (many-to-many)."""
+    __tablename__ = "group_members"
+    
+    group_id = Column(Integer, ForeignKey("groups.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True, index=True)
+
+
+class RankSnapshot(Base):
+    """A point-in-time capture of the all-time leaderboard."""
+    __tablename__ = "rank_snapshots"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    taken_at = Column(DateTime, nullable=False, index=True)
+
+
+class RankSnapshotEntry(Base):
+    """One user's rank and totals in a snapshot (users with at least one solve)."""
+    __tablename__ = "rank_snapshot_entries"
+    
+    snapshot_id = Column(Integer, ForeignKey("rank_snapshots.id"), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    rank = Column(Integer, nullable=False)
+    total_points = Column(Integer, nullable=False)
+    solved_count = Column(Integer, nullable=False)
+    
+    __table_args__ = (
+        Index("ix_rank_snapshot_entries_user", "user_id", "snapshot_id"),
+    )
+
+
+class JudgeSyncState(Base):
+    """Per-user sync cursor for an online judge (see judges.py)."""
+    __tablename__ = "judge_sync_state"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    judge = Column(String(20), primary_key=True)  # Provider name, e.g. "codeforces"
+    handle = Column(String(50), nullable=False)  # Handle the cursor belongs to
+    cursor = Column(Integer, nullable=True)  # Judge submission id already seen
+    problem_watermark = Column(Integer, nullable=False, default=0)  # Highest local problem id at sync time
+    synced_at = Column(DateTime, default=datetime.utcnow)
+
+
+class AppMeta(Base):
+    """Key/value counters shared by every process using the database."""
+    __tablename__ = "app_meta"
+    
+    key = Column(String(50), primary_key=True)
+    value = Column(Integer, nullable=False, default=0)
+
+
+DATA_VERSION_KEY = "data_version"
+
+
+def bump_data_version(session):
+    """
+    Increment the global data version as part of the caller's transaction.
+    Call this from every write that can change what the leaderboard or
+    problem lists show; readers use it to decide whether to re-query.
+    """
+    updated = session.execute(
+        update(AppMeta).where(AppMeta.key == DATA_VERSION_KEY).values(value=AppMeta.value + 1)
+    ).rowcount
+    if not updated:
+        session.add(AppMeta(key=DATA_VERSION_KEY, value=1))
+
+
+def get_data_version() -> int:
+    """Get the global data version (a single primary-key lookup)."""
+    return get_setting(DATA_VERSION_KEY)
+
+
+def get_setting(key: str, default: int = 0) -> int:
+    """Get an integer setting from app_meta."""
+    session = get_session()
+    try:
+        value = session.query(AppMeta.value).filter(AppMeta.key == key).scalar()
+        return default if value is None else value
+    finally:
+        session.close()
+
+
+def set_setting(session, key: str, value: int):
+    """Set an integer setting in app_meta as part of the caller's transaction."""
+    updated = session.execute(
+        update(AppMeta).where(AppMeta.key == key).values(value=value)
+    ).rowcount
+    if not updated:
+        session.add(AppMeta(key=key, value=value))
+
+
+def _migrate():
+    """
+    Bring an existing database up to the current models: add nullable
+    columns and indexes introduced since its tables were created.
+    """
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name not in existing:
+                    column_type = column.type.compile(dialect=engine.dialect)
+                    conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+        conn.execute(text("UPDATE problems SET base_points = points WHERE base_points IS NULL"))
 
 
 def init_db():
     """Initialize database and create Admin user if not exists."""
     Base.metadata.create_all(bind=engine)
+    _migrate()
     
     session = SessionLocal()
     try:
@@ -87,8 +346,15 @@ def init_db():
             admin = User(username="Admin", is_admin=True)
             admin.set_password("12345678")
             session.add(admin)
+            bump_data_version(session)
             session.commit()
             print("Created Admin user with default password.")
+        
+        # Build the score rollup for databases created before it existed
+        if not session.query(UserScore.user_id).first() and session.query(Submission.id).first():
+            from scoring import rebuild_user_scores
+            rebuild_user_scores(session)
+            session.commit()
     finally:
         session.close()
 
@@ -2,114 +2,180 @@
 Dashboard Page - User profile, stats, and Codeforces sync.
 """
 import streamlit as st
+from datetime import datetime
 from auth import (
     is_logged_in, is_admin, get_current_username, get_current_user_id,
     logout, change_password, update_cf_handle, get_user_cf_handle
 )
-from codeforces_api import validate_handle, sync_user_progress, get_user_info
-from leaderboard import get_user_stats
+from codeforces_api import validate_handle, sync_user_progress
+from judges import get_profile
+from leaderboard import get_user_stats, get_rank_history
+from recommendations import get_recommendations
+from activity import get_activity
+from metrics import track_page
 
-# Redirect if not logged in
-if not is_logged_in():
-    st.switch_page("streamlit_app.py")
 
-st.set_page_config(page_title="Dashboard | CP Platform", page_icon="📊", layout="wide")
+# Activity only changes when this user solves something (or the day rolls over)
+@st.cache_data(ttl=3600, max_entries=1024, show_spinner=False)
+def load_activity(user_id: int, solved_count: int, day: str):
+    return get_activity(user_id)
 
-# Sidebar
-with st.sidebar:
-    st.markdown(f"### 👋 **{get_current_username()}**")
-    if is_admin():
-        st.markdown("🛡️ *Admin*")
-    st.divider()
-    if st.button("🏠 Home", use_container_width=True):
-        st.switch_page("streamlit_app.py")
-    if st.button("🚪 Logout", use_container_width=True):
-        logout()
+
+with track_page("dashboard"):
+    # Redirect if not logged in
+    if not is_logged_in():
         st.switch_page("streamlit_app.py")
 
-# Main content
-st.title("📊 Dashboard")
-
-user_id = get_current_user_id()
-
-# Stats section
-st.subheader("📈 Your Stats")
-stats = get_user_stats(user_id)
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("🏅 Rank", f"#{stats['rank']}" if stats['rank'] else "N/A")
-with col2:
-    st.metric("✅ Problems Solved", stats['solved_count'])
-with col3:
-    st.metric("⭐ Total Points", stats['total_points'])
-
-st.divider()
-
-# Codeforces section
-st.subheader("🔗 Codeforces Integration")
-
-current_handle = get_user_cf_handle(user_id)
-if current_handle:
-    st.success(f"Connected: **{current_handle}**")
-    
-    # Show CF info
-    cf_info = get_user_info(current_handle)
-    if cf_info:
+    st.set_page_config(page_title="Dashboard | CP Platform", page_icon="📊", layout="wide")
+
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 👋 **{get_current_username()}**")
+        if is_admin():
+            st.markdown("🛡️ *Admin*")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
+
+    # Main content
+    st.title("📊 Dashboard")
+
+    user_id = get_current_user_id()
+
+    # Stats section
+    st.subheader("📈 Your Stats")
+    stats = get_user_stats(user_id)
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🏅 Rank", f"#{stats['rank']}" if stats['rank'] else "N/A")
+    with col2:
+        st.metric("✅ Problems Solved", stats['solved_count'])
+    with col3:
+        st.metric("⭐ Total Points", stats['total_points'])
+
+    # Charts need pandas and altair; import them here so the stats above render first
+    import pandas as pd
+    import altair as alt
+
+    history = get_rank_history(user_id)
+    if len(history) > 1:
+        trend = pd.DataFrame(history).set_index("taken_at")
         col1, col2 = st.columns(2)
         with col1:
-            st.metric("CF Rating", cf_info.get("rating", "Unrated"))
+            st.caption("Rank over time (lower is better)")
+            st.line_chart(trend["rank"], height=200)
         with col2:
-            st.metric("CF Rank", cf_info.get("rank", "unrated").title())
-
-col1, col2 = st.columns(2)
-
-with col1:
-    with st.form("cf_handle_form"):
-        new_handle = st.text_input("Codeforces Handle", value=current_handle or "")
-        if st.form_submit_button("Update Handle"):
-            if new_handle:
-                valid, msg = validate_handle(new_handle)
-                if valid:
-                    success, update_msg = update_cf_handle(user_id, new_handle)
-                    if success:
-                        st.success(f"{msg}")
-                        st.rerun()
+            st.caption("Points over time")
+            st.line_chart(trend["total_points"], height=200)
+
+    # Activity section
+    activity = load_activity(user_id, stats['solved_count'], datetime.utcnow().date().isoformat())
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("🔥 Current Streak", f"{activity['current_streak']} days")
+    with col2:
+        st.metric("🏆 Longest Streak", f"{activity['longest_streak']} days")
+    with col3:
+        st.metric("📅 Active Days", activity['active_days'])
+
+    heatmap = alt.Chart(pd.DataFrame(activity["heatmap"])).mark_rect(cornerRadius=2).encode(
+        x=alt.X("week:O", axis=None),
+        y=alt.Y("weekday:O", axis=None),
+        color=alt.Color("solves:Q", scale=alt.Scale(scheme="greens"), legend=None),
+        tooltip=[alt.Tooltip("date:T", title="Date"), alt.Tooltip("solves:Q", title="Solves")]
+    ).properties(height=130)
+    st.altair_chart(heatmap, use_container_width=True)
+
+    st.caption("Points per week")
+    st.bar_chart(pd.DataFrame(activity["weekly_points"]).set_index("week"), height=200)
+
+    st.divider()
+
+    # Recommendations section
+    st.subheader("🎯 Next Problems")
+    recommendations = get_recommendations(user_id, limit=5)
+    if not recommendations:
+        st.info("No recommendations yet. Solve a few problems first!")
+    else:
+        for rec in recommendations:
+            title = f"[{rec['title']}]({rec['problem_url']})" if rec['problem_url'] else rec['title']
+            details = [f"{rec['points']} pts"]
+            if rec['cf_rating']:
+                details.append(f"CF {rec['cf_rating']}")
+            if rec['similar_solvers']:
+                details.append(f"solved by {rec['similar_solvers']} users like you")
+            st.markdown(f"- **{title}** · " + " · ".join(details))
+
+    st.divider()
+
+    # Codeforces section
+    st.subheader("🔗 Codeforces Integration")
+
+    current_handle = get_user_cf_handle(user_id)
+    if current_handle:
+        st.success(f"Connected: **{current_handle}**")
+        
+        # Show CF info (cached by the provider)
+        cf_info = get_profile("codeforces", current_handle)
+        if cf_info:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.metric("CF Rating", cf_info.get("rating", "Unrated"))
+            with col2:
+                st.metric("CF Rank", cf_info.get("rank", "unrated").title())
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        with st.form("cf_handle_form"):
+            new_handle = st.text_input("Codeforces Handle", value=current_handle or "")
+            if st.form_submit_button("Update Handle"):
+                if new_handle:
+                    valid, msg = validate_handle(new_handle)
+                    if valid:
+                        success, update_msg = update_cf_handle(user_id, new_handle)
+                        if success:
+                            st.success(f"{msg}")
+                            st.rerun()
+                        else:
+                            st.error(update_msg)
                     else:
-                        st.error(update_msg)
+                        st.error(msg)
                 else:
-                    st.error(msg)
-            else:
-                update_cf_handle(user_id, "")
-                st.info("Handle cleared.")
-                st.rerun()
+                    update_cf_handle(user_id, "")
+                    st.info("Handle cleared.")
+                    st.rerun()
 
-with col2:
-    if current_handle:
-        if st.button("🔄 Sync Progress", use_container_width=True, type="primary"):
-            with st.spinner("Syncing with Codeforces..."):
-                count, msg = sync_user_progress(user_id, current_handle)
-                if count > 0:
+    with col2:
+        if current_handle:
+            if st.button("🔄 Sync Progress", use_container_width=True, type="primary"):
+                with st.spinner("Syncing with Codeforces..."):
+                    count, msg = sync_user_progress(user_id)
+                    if count > 0:
+                        st.success(msg)
+                        st.rerun()
+                    else:
+                        st.info(msg)
+
+    st.divider()
+
+    # Password change section
+    st.subheader("🔐 Change Password")
+
+    with st.form("password_form"):
+        current_pwd = st.text_input("Current Password", type="password")
+        new_pwd = st.text_input("New Password", type="password")
+        confirm_pwd = st.text_input("Confirm New Password", type="password")
+        
+        if st.form_submit_button("Change Password"):
+            if new_pwd != confirm_pwd:
+                st.error("New passwords do not match.")
+            else:
+                success, msg = change_password(user_id, current_pwd, new_pwd)
+                if success:
                     st.success(msg)
-                    st.rerun()
                 else:
-                    st.info(msg)
-
-st.divider()
-
-# Password change section
-st.subheader("🔐 Change Password")
-
-with st.form("password_form"):
-    current_pwd = st.text_input("Current Password", type="password")
-    new_pwd = st.text_input("New Password", type="password")
-    confirm_pwd = st.text_input("Confirm New Password", type="password")
-    
-    if st.form_submit_button("Change Password"):
-        if new_pwd != confirm_pwd:
-            st.error("New passwords do not match.")
-        else:
-            success, msg = change_password(user_id, current_pwd, new_pwd)
-            if success:
-                st.success(msg)
-            else:
-                st.error(msg)
+                    st.error(msg)
@@ -3,39 +3,38 @@ Problems Page - Browse and track problem completions.
 """
 import streamlit as st
 from auth import is_logged_in, is_admin, get_current_username, get_current_user_id, logout
-from models import get_session, Problem, Submission
 from leaderboard import get_user_solved_problems
-from datetime import datetime
+from problems import list_problems, mark_solved
+from metrics import track_page
 
-# Redirect if not logged in
-if not is_logged_in():
-    st.switch_page("streamlit_app.py")
+with track_page("problems"):
+    # Redirect if not logged in
+    if not is_logged_in():
+        st.switch_page("streamlit_app.py")
 
-st.set_page_config(page_title="Problems | CP Platform", page_icon="📚", layout="wide")
+    st.set_page_config(page_title="Problems | CP Platform", page_icon="📚", layout="wide")
 
-# Sidebar
-with st.sidebar:
-    st.markdown(f"### 👋 **{get_current_username()}**")
-    if is_admin():
-        st.markdown("🛡️ *Admin*")
-    st.divider()
-    if st.button("🏠 Home", use_container_width=True):
-        st.switch_page("streamlit_app.py")
-    if st.button("🚪 Logout", use_container_width=True):
-        logout()
-        st.switch_page("streamlit_app.py")
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 👋 **{get_current_username()}**")
+        if is_admin():
+            st.markdown("🛡️ *Admin*")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
+
+    # Main content
+    st.title("📚 Problems")
 
-# Main content
-st.title("📚 Problems")
+    user_id = get_current_user_id()
+    solved_ids = get_user_solved_problems(user_id)
 
-user_id = get_current_user_id()
-solved_ids = get_user_solved_problems(user_id)
+    # Get all problems
+    problems = list_problems()
 
-# Get all problems
-session = get_session()
-try:
-    problems = session.query(Problem).order_by(Problem.created_at.desc()).all()
-    
     if not problems:
         st.info("No problems added yet. Ask an admin to add some!")
     else:
@@ -74,29 +73,20 @@ try:
                     st.metric("Points", problem.points)
                 
                 with col3:
-                    if problem.cf_contest_id:
-                        st.caption(f"CF: {problem.cf_contest_id}{problem.cf_problem_index}")
+                    if problem.cf_label:
+                        st.caption(f"CF: {problem.cf_label}")
                     else:
                         st.caption("Custom")
                 
                 with col4:
                     if not is_solved:
                         if st.button("Mark Solved", key=f"solve_{problem.id}"):
-                            new_session = get_session()
-                            try:
-                                sub = Submission(
-                                    user_id=user_id,
-                                    problem_id=problem.id,
-                                    solved_at=datetime.utcnow()
-                                )
-                                new_session.add(sub)
-                                new_session.commit()
+                            success, message = mark_solved(user_id, problem.id)
+                            if success:
                                 st.rerun()
-                            finally:
-                                new_session.close()
+                            else:
+                                st.error(message)
                     else:
                         st.success("Solved!")
                 
                 st.divider()
-finally:
-    session.close()
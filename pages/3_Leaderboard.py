@@ -1,92 +1,183 @@
 """
 Leaderboard Page - User rankings.
 """
+import os
+import time
 import streamlit as st
+import numpy as np
 import pandas as pd
-from auth import is_logged_in, is_admin, get_current_username, logout
-from leaderboard import get_leaderboard
-
-# Redirect if not logged in
-if not is_logged_in():
-    st.switch_page("streamlit_app.py")
-
-st.set_page_config(page_title="Leaderboard | CP Platform", page_icon="🏅", layout="wide")
-
-# Sidebar
-with st.sidebar:
-    st.markdown(f"### 👋 **{get_current_username()}**")
-    if is_admin():
-        st.markdown("🛡️ *Admin*")
-    st.divider()
-    if st.button("🏠 Home", use_container_width=True):
-        st.switch_page("streamlit_app.py")
-    if st.button("🚪 Logout", use_container_width=True):
-        logout()
-        st.switch_page("streamlit_app.py")
+from auth import is_logged_in, is_admin, get_current_username, get_current_user_id, logout
+from leaderboard import (
+    get_leaderboard_page, get_leaderboard_neighbourhood, get_rank_changes, take_rank_snapshot_if_due
+)
+from models import get_data_version
+from metrics import track_page
+from styling import highlight
 
-# Main content
-st.title("🏅 Leaderboard")
+DELTA_DAYS = 7
+TABLE_TTL = 300  # Same as the data caches, so weekly/monthly windows still move on
+REFRESH_OPTIONS = [0, 5, 10, 30, 60]  # seconds, 0 = off
+DEFAULT_REFRESH_SECONDS = int(os.environ.get("CP_LEADERBOARD_REFRESH_SECONDS", "10"))
 
-# Time filter
-time_filter = st.radio(
-    "Time Period:",
-    ["All Time", "Monthly", "Weekly"],
-    horizontal=True
-)
+# Leaderboard reads are cached per data version, so polls only re-query
+# after something was actually written. The TTL bounds how stale the
+# weekly/monthly windows can get while nothing changes.
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def load_page(time_key: str, offset: int, limit: int, data_version: int):
+    return get_leaderboard_page(time_key, offset=offset, limit=limit)
+
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def load_neighbourhood(user_id: int, time_key: str, radius: int, data_version: int):
+    return get_leaderboard_neighbourhood(user_id, time_key, radius=radius)
+
+
+@st.cache_data(ttl=300, max_entries=256, show_spinner=False)
+def load_rank_changes(user_ids: tuple[int, ...], data_version: int):
+    return get_rank_changes(list(user_ids), days=DELTA_DAYS)
+
+
+def format_delta(current: np.ndarray, previous: np.ndarray) -> np.ndarray:
+    """Render rank movement as "▲3", "▼2", "–", or "new" for users not in the snapshot."""
+    moved = np.nan_to_num(previous - current).astype(int)
+    return np.select(
+        [np.isnan(previous), moved > 0, moved < 0],
+        ["new", np.char.add("▲", np.abs(moved).astype(str)), np.char.add("▼", np.abs(moved).astype(str))],
+        default="–"
+    )
+
+
+def build_table(entries: list[dict], user_id: int, time_key: str, data_version: int):
+    """Build the styled rankings table for one page of entries."""
+    df = pd.DataFrame(entries)
+    is_current_user = (df["user_id"] == user_id).to_numpy()
+    if time_key == "all":
+        changes = load_rank_changes(tuple(df["user_id"]), data_version)
+        if changes:
+            previous = df["user_id"].map(changes).to_numpy(dtype=float)
+            df.insert(1, "Since Last Week", format_delta(df["rank"].to_numpy(), previous))
+    df = df.drop(columns=["user_id"]).rename(columns={
+        "rank": "Rank",
+        "username": "Username",
+        "solved_count": "Problems Solved",
+        "total_points": "Total Points"
+    })
+    return highlight(df, is_current_user)
+
+
+@track_page("leaderboard_live")
+def show_leaderboard():
+    """
+    Render the leaderboard; reruns on its own when auto-refresh is on. The
+    styled table is kept in session state per data version and view, so a
+    refresh with no new data skips the DataFrame and Styler work (Streamlit
+    still re-emits the element on every run of the fragment).
+    """
+    # Time filter
+    time_filter = st.radio(
+        "Time Period:",
+        ["All Time", "Monthly", "Weekly"],
+        horizontal=True
+    )
 
-filter_map = {
-    "All Time": "all",
-    "Monthly": "monthly",
-    "Weekly": "weekly"
-}
+    filter_map = {
+        "All Time": "all",
+        "Monthly": "monthly",
+        "Weekly": "weekly"
+    }
 
-# Get leaderboard
-leaderboard = get_leaderboard(filter_map[time_filter])
+    time_key = filter_map[time_filter]
+    user_id = get_current_user_id()
+    data_version = get_data_version()
 
-if not leaderboard:
-    st.info("No data yet. Solve some problems to appear on the leaderboard!")
-else:
-    # Show top 3 with special formatting
-    if len(leaderboard) >= 1:
+    # Top 3 always come from the first page
+    top_entries, total_users = load_page(time_key, 0, 3, data_version)
+
+    if not top_entries:
+        st.info("No data yet. Solve some problems to appear on the leaderboard!")
+    else:
+        # Show top 3 with special formatting
         st.markdown("### 🥇 Top Performers")
         
-        cols = st.columns(min(3, len(leaderboard)))
+        cols = st.columns(len(top_entries))
         medals = ["🥇", "🥈", "🥉"]
         
         for i, col in enumerate(cols):
-            if i < len(leaderboard):
-                entry = leaderboard[i]
-                with col:
-                    st.markdown(f"### {medals[i]} {entry['username']}")
-                    st.metric("Points", entry['total_points'])
-                    st.caption(f"{entry['solved_count']} problems solved")
+            entry = top_entries[i]
+            with col:
+                st.markdown(f"### {medals[i]} {entry['username']}")
+                st.metric("Points", entry['total_points'])
+                st.caption(f"{entry['solved_count']} problems solved")
         
         st.divider()
+        
+        # Rankings table, one page at a time
+        st.markdown("### 📊 Full Rankings")
+        
+        view = st.radio("Show:", ["Pages", "Around Me"], horizontal=True)
+        
+        if view == "Around Me":
+            radius = st.select_slider("Users above and below", options=[5, 10, 25, 50], value=10)
+            table_key = (data_version, time_key, user_id, view, radius)
+            entries = load_neighbourhood(user_id, time_key, radius, data_version)
+            if not entries:
+                st.info("You are not ranked in this period yet.")
+        else:
+            col1, col2 = st.columns([1, 3])
+            with col1:
+                page_size = st.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+            page_count = max(1, (total_users + page_size - 1) // page_size)
+            with col2:
+                page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, key="leaderboard_page")
+            table_key = (data_version, time_key, user_id, view, page, page_size)
+            entries, total_users = load_page(time_key, (page - 1) * page_size, page_size, data_version)
+            st.caption(f"{total_users} ranked users")
+        
+        if entries:
+            # Only rebuild the table when the data or the view changed since the last run
+            cached = st.session_state.get("leaderboard_table")
+            if cached and cached[0] == table_key and time.monotonic() - cached[1] < TABLE_TTL:
+                table = cached[2]
+            else:
+                table = build_table(entries, user_id, time_key, data_version)
+                st.session_state["leaderboard_table"] = (table_key, time.monotonic(), table)
+            
+            st.dataframe(
+                table,
+                use_container_width=True,
+                hide_index=True
+            )
+
+
+with track_page("leaderboard"):
+    # Redirect if not logged in
+    if not is_logged_in():
+        st.switch_page("streamlit_app.py")
+
+    st.set_page_config(page_title="Leaderboard | CP Platform", page_icon="🏅", layout="wide")
+
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 👋 **{get_current_username()}**")
+        if is_admin():
+            st.markdown("🛡️ *Admin*")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
+        st.divider()
+        refresh_seconds = st.selectbox(
+            "🔄 Auto-refresh",
+            sorted(set(REFRESH_OPTIONS + [DEFAULT_REFRESH_SECONDS])),
+            index=sorted(set(REFRESH_OPTIONS + [DEFAULT_REFRESH_SECONDS])).index(DEFAULT_REFRESH_SECONDS),
+            format_func=lambda seconds: f"Every {seconds}s" if seconds else "Off"
+        )
     
-    # Full table
-    st.markdown("### 📊 Full Rankings")
-    
-    # Create DataFrame
-    df = pd.DataFrame(leaderboard)
-    df = df.rename(columns={
-        "rank": "Rank",
-        "username": "Username",
-        "solved_count": "Problems Solved",
-        "total_points": "Total Points"
-    })
-    
-    # Style the current user
-    current_user = get_current_username()
-    
-    def highlight_user(row):
-        if row["Username"] == current_user:
-            return ["background-color: #1e3a5f"] * len(row)
-        return [""] * len(row)
+    # Main content
+    st.title("🏅 Leaderboard")
     
-    styled_df = df.style.apply(highlight_user, axis=1)
+    take_rank_snapshot_if_due()
     
-    st.dataframe(
-        styled_df,
-        use_container_width=True,
-        hide_index=True
-    )
+    st.fragment(run_every=refresh_seconds or None)(show_leaderboard)()
@@ -3,93 +3,121 @@ Admin Page - Add and manage problems.
 """
 import streamlit as st
 from auth import is_logged_in, is_admin, get_current_username, get_current_user_id, logout
-from models import get_session, Problem
-import re
+from datetime import datetime, timedelta
+from problems import list_problems, add_problem, delete_problem
+from scoring import SCORING_MODES, get_scoring_mode, set_scoring_mode, recompute_scores, mirror_cf_ratings
+from groups import list_groups, create_group, delete_group, set_group_members, get_group_member_ids, list_users
+from contests import list_contests, create_contest, delete_contest, poll_cf_contest
+from backup import backup_database, list_backups, export_table, EXPORT_TABLES, EXPORT_FORMATS, EXPORT_DIR
+from models import enable_query_metrics, disable_query_metrics, query_metrics_enabled
+from query_metrics import get_query_metrics
+from metrics import (
+    track_page, PAGES, page_render_summary, active_session_count,
+    render_prometheus, write_metrics_file, request_profile, pending_profiles, get_profiles,
+    METRICS_FILE
+)
 
-# Redirect if not logged in or not admin
-if not is_logged_in():
-    st.switch_page("streamlit_app.py")
+with track_page("admin"):
+    # Redirect if not logged in or not admin
+    if not is_logged_in():
+        st.switch_page("streamlit_app.py")
 
-if not is_admin():
-    st.error("Access denied. Admin only.")
-    st.stop()
+    if not is_admin():
+        st.error("Access denied. Admin only.")
+        st.stop()
 
-st.set_page_config(page_title="Admin | CP Platform", page_icon="🛡️", layout="wide")
+    st.set_page_config(page_title="Admin | CP Platform", page_icon="🛡️", layout="wide")
 
-# Sidebar
-with st.sidebar:
-    st.markdown(f"### 🛡️ **{get_current_username()}** (Admin)")
-    st.divider()
-    if st.button("🏠 Home", use_container_width=True):
-        st.switch_page("streamlit_app.py")
-    if st.button("🚪 Logout", use_container_width=True):
-        logout()
-        st.switch_page("streamlit_app.py")
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 🛡️ **{get_current_username()}** (Admin)")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
 
-# Main content
-st.title("🛡️ Admin Panel")
+    # Main content
+    st.title("🛡️ Admin Panel")
 
-tab1, tab2 = st.tabs(["➕ Add Problem", "📋 Manage Problems"])
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs(
+        ["➕ Add Problem", "📋 Manage Problems", "📈 Metrics", "⏱️ Page Performance", "🏁 Contests", "👥 Groups",
+         "💾 Backup & Export"]
+    )
 
-with tab1:
-    st.subheader("Add New Problem")
-    
-    with st.form("add_problem_form"):
-        title = st.text_input("Problem Title *", placeholder="e.g., Two Sum")
-        problem_url = st.text_input("Problem URL", placeholder="https://codeforces.com/...")
-        points = st.number_input("Points *", min_value=1, max_value=1000, value=10)
+    with tab1:
+        st.subheader("Add New Problem")
         
-        st.markdown("#### Codeforces Details (Optional)")
-        st.caption("For auto-sync with Codeforces submissions")
+        with st.form("add_problem_form"):
+            title = st.text_input("Problem Title *", placeholder="e.g., Two Sum")
+            problem_url = st.text_input("Problem URL", placeholder="https://codeforces.com/...")
+            points = st.number_input("Points *", min_value=1, max_value=1000, value=10)
+            
+            st.markdown("#### Codeforces Details (Optional)")
+            st.caption("For auto-sync with Codeforces submissions")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                cf_contest_id = st.number_input("Contest ID", min_value=0, value=0, help="e.g., 1234")
+            with col2:
+                cf_problem_index = st.text_input("Problem Index", placeholder="e.g., A, B1, C")
+            
+            submitted = st.form_submit_button("Add Problem", type="primary", use_container_width=True)
+            
+            if submitted:
+                success, message = add_problem(
+                    title,
+                    problem_url,
+                    points,
+                    cf_contest_id=cf_contest_id if cf_contest_id > 0 else None,
+                    cf_problem_index=cf_problem_index,
+                    added_by=get_current_user_id()
+                )
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+
+    with tab2:
+        st.subheader("Scoring")
         
-        col1, col2 = st.columns(2)
+        current_mode = get_scoring_mode()
+        col1, col2, col3 = st.columns([2, 1, 1])
         with col1:
-            cf_contest_id = st.number_input("Contest ID", min_value=0, value=0, help="e.g., 1234")
+            mode = st.radio(
+                "Scoring mode",
+                SCORING_MODES,
+                index=SCORING_MODES.index(current_mode),
+                horizontal=True,
+                captions=["Admin-set points", "Decays with solver count", "CF rating / 100"]
+            )
         with col2:
-            cf_problem_index = st.text_input("Problem Index", placeholder="e.g., A, B1, C")
-        
-        submitted = st.form_submit_button("Add Problem", type="primary", use_container_width=True)
+            if st.button("🔄 Mirror CF ratings", use_container_width=True):
+                success, message = mirror_cf_ratings()
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        with col3:
+            if st.button("🧮 Recompute scores", use_container_width=True):
+                success, message = recompute_scores()
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
         
-        if submitted:
-            if not title:
-                st.error("Title is required.")
+        if mode != current_mode:
+            success, message = set_scoring_mode(mode)
+            if success:
+                st.success(message)
             else:
-                session = get_session()
-                try:
-                    # Parse CF URL if provided
-                    parsed_contest = cf_contest_id if cf_contest_id > 0 else None
-                    parsed_index = cf_problem_index.strip().upper() if cf_problem_index else None
-                    
-                    # Try to extract from URL if not provided
-                    if problem_url and not parsed_contest:
-                        match = re.search(r'codeforces\.com/(?:contest|problemset/problem)/(\d+)/(\w+)', problem_url)
-                        if match:
-                            parsed_contest = int(match.group(1))
-                            parsed_index = match.group(2).upper()
-                    
-                    problem = Problem(
-                        title=title,
-                        problem_url=problem_url if problem_url else None,
-                        points=points,
-                        cf_contest_id=parsed_contest,
-                        cf_problem_index=parsed_index,
-                        added_by=get_current_user_id()
-                    )
-                    session.add(problem)
-                    session.commit()
-                    st.success(f"Problem '{title}' added with {points} points!")
-                except Exception as e:
-                    session.rollback()
-                    st.error(f"Error: {str(e)}")
-                finally:
-                    session.close()
-
-with tab2:
-    st.subheader("Existing Problems")
-    
-    session = get_session()
-    try:
-        problems = session.query(Problem).order_by(Problem.created_at.desc()).all()
+                st.error(message)
+        
+        st.divider()
+        st.subheader("Existing Problems")
+        
+        problems = list_problems()
         
         if not problems:
             st.info("No problems added yet.")
@@ -102,16 +130,271 @@ with tab2:
                         st.markdown(f"**URL:** {problem.problem_url or 'N/A'}")
                         if problem.cf_contest_id:
                             st.markdown(f"**CF:** Contest {problem.cf_contest_id}, Problem {problem.cf_problem_index}")
-                        st.caption(f"Added: {problem.created_at.strftime('%Y-%m-%d %H:%M')}")
+                        if problem.created_at:
+                            st.caption(f"Added: {problem.created_at.strftime('%Y-%m-%d %H:%M')}")
                     
                     with col2:
                         if st.button("🗑️ Delete", key=f"del_{problem.id}"):
-                            del_session = get_session()
-                            try:
-                                del_session.query(Problem).filter(Problem.id == problem.id).delete()
-                                del_session.commit()
+                            success, message = delete_problem(problem.id)
+                            if success:
                                 st.rerun()
-                            finally:
-                                del_session.close()
-    finally:
-        session.close()
+                            else:
+                                st.error(message)
+
+    with tab3:
+        st.subheader("Query Metrics")
+        
+        metrics = get_query_metrics()
+        
+        col1, col2, col3 = st.columns([1, 1, 1])
+        with col1:
+            enabled = st.toggle("Record queries", value=query_metrics_enabled())
+        with col2:
+            slow_ms = st.number_input("Slow query threshold (ms)", min_value=0.0, value=float(metrics.slow_ms), key="slow_query_ms")
+        with col3:
+            if st.button("Reset metrics", use_container_width=True):
+                metrics.reset()
+        
+        if enabled:
+            enable_query_metrics(slow_ms=slow_ms)
+        else:
+            disable_query_metrics()
+        
+        statements = metrics.statement_stats()
+        if not statements:
+            st.info("No queries recorded yet. Turn recording on and use the app.")
+        else:
+            st.markdown("#### Statements (by total time)")
+            st.dataframe(
+                [
+                    {
+                        "SQL": row["sql"],
+                        "Calls": row["count"],
+                        "Total (ms)": row["total_ms"],
+                        "Mean (ms)": row["mean_ms"],
+                        "p50 (ms)": row["p50_ms"],
+                        "p95 (ms)": row["p95_ms"],
+                        "Max (ms)": row["max_ms"]
+                    }
+                    for row in statements
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+            
+            slow_queries = metrics.slow_queries()
+            st.markdown(f"#### Slow Queries ({len(slow_queries)})")
+            for entry in slow_queries:
+                with st.expander(f"{entry['elapsed_ms']:.1f} ms · {entry['at']} · {entry['sql'][:80]}"):
+                    st.code(entry["statement"], language="sql")
+                    st.caption(f"Parameters: {entry['parameters']}")
+                    if entry["plan"]:
+                        st.markdown("**Query plan**")
+                        st.code("\n".join(entry["plan"]), language="text")
+        
+        st.download_button(
+            "⬇️ Download metrics (JSON)",
+            metrics.to_json(),
+            file_name="query_metrics.json",
+            mime="application/json"
+        )
+
+    with tab4:
+        st.subheader("Page Performance")
+        
+        st.metric("👥 Active Sessions (5 min)", active_session_count())
+        
+        summary = page_render_summary()
+        if not summary:
+            st.info("No page renders recorded yet.")
+        else:
+            st.dataframe(
+                [
+                    {
+                        "Page": row["page"],
+                        "Renders": row["renders"],
+                        "Total p50 (ms)": row["total_p50_ms"],
+                        "Total p95 (ms)": row["total_p95_ms"],
+                        "DB p95 (ms)": row["db_p95_ms"],
+                        "CF p95 (ms)": row["cf_p95_ms"],
+                        "Render p95 (ms)": row["render_p95_ms"]
+                    }
+                    for row in summary
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            prometheus_text = render_prometheus()
+            st.download_button(
+                "⬇️ Download Prometheus metrics",
+                prometheus_text,
+                file_name="metrics.prom",
+                mime="text/plain",
+                use_container_width=True
+            )
+        with col2:
+            if st.button("💾 Write metrics file now", use_container_width=True):
+                write_metrics_file()
+                st.success(f"Wrote {METRICS_FILE}")
+        
+        st.markdown("#### Profile Next Render")
+        col1, col2 = st.columns([3, 1])
+        with col1:
+            profile_page = st.selectbox("Page", PAGES)
+        with col2:
+            st.write("")
+            if st.button("🎯 Arm profiler", use_container_width=True):
+                request_profile(profile_page)
+        
+        pending = pending_profiles()
+        if pending:
+            st.caption(f"Waiting for next render of: {', '.join(sorted(pending))}")
+        
+        for page, profile in sorted(get_profiles().items()):
+            with st.expander(f"{page} · {profile['elapsed_ms']} ms · {profile['captured_at']}"):
+                st.code(profile["stats"], language="text")
+
+    with tab5:
+        st.subheader("Create Contest")
+        
+        all_problems = list_problems()
+        with st.form("create_contest_form"):
+            contest_name = st.text_input("Contest Name *", placeholder="e.g., Weekly Practice #1")
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                start_date = st.date_input("Start date (UTC)", value=datetime.utcnow().date())
+            with col2:
+                start_time = st.time_input("Start time (UTC)", value=datetime.utcnow().time().replace(second=0, microsecond=0))
+            with col3:
+                duration_minutes = st.number_input("Duration (minutes)", min_value=10, max_value=7 * 24 * 60, value=120)
+            
+            contest_problems = st.multiselect(
+                "Problems * (labelled A, B, C... in this order)",
+                all_problems,
+                format_func=lambda p: f"{p.title} ({p.cf_label or 'Custom'})"
+            )
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                penalty_minutes = st.number_input("Penalty per wrong attempt (minutes)", min_value=0, value=20)
+            with col2:
+                contest_cf_id = st.number_input(
+                    "Codeforces contest ID (optional)", min_value=0, value=0,
+                    help="Poll this contest's submissions to pick up solves and wrong attempts"
+                )
+            
+            if st.form_submit_button("Create Contest", type="primary", use_container_width=True):
+                start_at = datetime.combine(start_date, start_time)
+                success, message = create_contest(
+                    contest_name,
+                    start_at,
+                    start_at + timedelta(minutes=duration_minutes),
+                    [p.id for p in contest_problems],
+                    penalty_minutes=penalty_minutes,
+                    cf_contest_id=contest_cf_id or None,
+                    created_by=get_current_user_id()
+                )
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        
+        st.subheader("Existing Contests")
+        for contest in list_contests():
+            with st.expander(f"🏁 {contest.name} ({contest.status()})"):
+                st.caption(f"{contest.start_at:%Y-%m-%d %H:%M} – {contest.end_at:%Y-%m-%d %H:%M} UTC")
+                col1, col2 = st.columns(2)
+                with col1:
+                    if contest.cf_contest_id and st.button("🔄 Poll Codeforces now", key=f"poll_{contest.id}"):
+                        count, message = poll_cf_contest(contest.id)
+                        st.info(message)
+                with col2:
+                    if st.button("🗑️ Delete", key=f"del_contest_{contest.id}"):
+                        delete_contest(contest.id)
+                        st.rerun()
+
+    with tab6:
+        st.subheader("Create Group")
+        
+        with st.form("create_group_form"):
+            group_name = st.text_input("Group Name *", placeholder="e.g., Cohort 2026")
+            group_description = st.text_input("Description", placeholder="Optional")
+            if st.form_submit_button("Create Group", type="primary", use_container_width=True):
+                success, message = create_group(group_name, group_description)
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
+        
+        st.subheader("Existing Groups")
+        all_users = list_users()
+        usernames = dict(all_users)
+        for group in list_groups():
+            with st.expander(f"👥 {group.name} ({group.member_count} members)"):
+                members = st.multiselect(
+                    "Members",
+                    [user_id for user_id, _ in all_users],
+                    default=get_group_member_ids(group.id),
+                    format_func=lambda user_id: usernames.get(user_id, str(user_id)),
+                    key=f"members_{group.id}"
+                )
+                col1, col2 = st.columns(2)
+                with col1:
+                    if st.button("💾 Save members", key=f"save_group_{group.id}"):
+                        success, message = set_group_members(group.id, members)
+                        if success:
+                            st.success(message)
+                        else:
+                            st.error(message)
+                with col2:
+                    if st.button("🗑️ Delete", key=f"del_group_{group.id}"):
+                        delete_group(group.id)
+                        st.rerun()
+
+    with tab7:
+        st.subheader("Backup")
+        st.caption("Online backup: the app keeps serving reads and writes while pages are copied.")
+        
+        if st.button("💾 Back up now", type="primary"):
+            bar = st.progress(0.0, text="Starting backup...")
+            success, message = backup_database(progress=lambda fraction, text: bar.progress(fraction, text=text))
+            if success:
+                st.success(message)
+            else:
+                st.error(message)
+        
+        backups = list_backups()
+        if backups:
+            st.dataframe(
+                [
+                    {"File": path, "Size (MB)": round(size / 2**20, 1), "Created": modified}
+                    for path, size, modified in backups
+                ],
+                use_container_width=True,
+                hide_index=True
+            )
+        else:
+            st.info("No backups yet.")
+        
+        st.subheader("Export")
+        st.caption(f"Tables are streamed in chunks to files under {EXPORT_DIR}.")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            tables = st.multiselect("Tables", list(EXPORT_TABLES), default=list(EXPORT_TABLES))
+        with col2:
+            export_format = st.radio("Format", EXPORT_FORMATS, horizontal=True)
+        
+        if st.button("📤 Export", disabled=not tables):
+            for table in tables:
+                bar = st.progress(0.0, text=f"Exporting {table}...")
+                success, message = export_table(
+                    table, fmt=export_format, progress=lambda fraction, text: bar.progress(fraction, text=text)
+                )
+                if success:
+                    st.success(message)
+                else:
+                    st.error(message)
@@ -0,0 +1,100 @@
+"""
+Contests Page - Live ICPC-style contest standings.
+"""
+import os
+import streamlit as st
+from auth import is_logged_in, is_admin, get_current_username, get_current_user_id, logout
+from contests import list_contests, get_contest_problems, get_standings, poll_cf_contest_if_due
+from models import get_data_version
+from metrics import track_page
+from styling import highlight
+
+STANDINGS_REFRESH_SECONDS = int(os.environ.get("CP_CONTEST_REFRESH_SECONDS", "5"))
+STATUS_ICONS = {"running": "🟢", "upcoming": "🕒", "finished": "🏁"}
+
+
+# Standings are cached per data version; every refresh with no new solves is a cache hit
+@st.cache_data(ttl=300, max_entries=64, show_spinner=False)
+def load_standings(contest_id: int, data_version: int):
+    return get_standings(contest_id)
+
+
+@track_page("contests_live")
+def show_standings(contest):
+    """Render one contest's standings; reruns on its own while the contest runs."""
+    if contest.status() == "running" and contest.cf_contest_id:
+        poll_cf_contest_if_due(contest.id)
+
+    standings = load_standings(contest.id, get_data_version())
+    if not standings["rows"]:
+        st.info("No solves yet.")
+        return
+
+    import pandas as pd  # Only needed once there are standings to show
+
+    user_id = get_current_user_id()
+    df = pd.DataFrame([
+        {
+            "user_id": row["user_id"],
+            "Rank": row["rank"],
+            "User": row["username"],
+            "Solved": row["solved"],
+            "Penalty": row["penalty"],
+            **{label: row["cells"].get(label, "") for label in standings["labels"]}
+        }
+        for row in standings["rows"]
+    ])
+    is_current_user = (df["user_id"] == user_id).to_numpy()
+    df = df.drop(columns=["user_id"])
+    st.dataframe(highlight(df, is_current_user), use_container_width=True, hide_index=True)
+
+
+with track_page("contests"):
+    # Redirect if not logged in
+    if not is_logged_in():
+        st.switch_page("streamlit_app.py")
+
+    st.set_page_config(page_title="Contests | CP Platform", page_icon="🏁", layout="wide")
+
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 👋 **{get_current_username()}**")
+        if is_admin():
+            st.markdown("🛡️ *Admin*")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
+
+    # Main content
+    st.title("🏁 Contests")
+
+    contests = list_contests()
+
+    if not contests:
+        st.info("No contests yet. Ask an admin to create one!")
+    else:
+        contest = st.selectbox(
+            "Contest",
+            contests,
+            format_func=lambda c: f"{STATUS_ICONS[c.status()]} {c.name}"
+        )
+
+        st.caption(
+            f"{contest.start_at:%Y-%m-%d %H:%M} – {contest.end_at:%Y-%m-%d %H:%M} UTC · "
+            f"{contest.penalty_minutes} min penalty per wrong attempt"
+            + (f" · synced from Codeforces contest {contest.cf_contest_id}" if contest.cf_contest_id else "")
+        )
+
+        problems = get_contest_problems(contest.id)
+        st.markdown(" · ".join(f"**{label}** {title}" for label, _, title in problems))
+
+        st.divider()
+
+        if contest.status() == "upcoming":
+            st.info("This contest has not started yet.")
+        else:
+            refresh = STANDINGS_REFRESH_SECONDS if contest.status() == "running" else None
+            st.fragment(run_every=refresh or None)(show_standings)(contest)
@@ -0,0 +1,105 @@
+"""
+Groups Page - Per-group leaderboards and group standings.
+"""
+import streamlit as st
+from auth import is_logged_in, is_admin, get_current_username, get_current_user_id, logout
+from groups import list_groups, get_user_groups, get_group_leaderboard, get_group_standings
+from models import get_data_version
+from metrics import track_page
+from styling import highlight
+
+FILTER_MAP = {"All Time": "all", "Monthly": "monthly", "Weekly": "weekly"}
+
+
+@st.cache_data(ttl=300, max_entries=512, show_spinner=False)
+def load_group_leaderboard(group_id: int, time_key: str, data_version: int):
+    return get_group_leaderboard(group_id, time_key)
+
+
+@st.cache_data(ttl=300, max_entries=16, show_spinner=False)
+def load_group_standings(time_key: str, data_version: int):
+    return get_group_standings(time_key)
+
+
+with track_page("groups"):
+    # Redirect if not logged in
+    if not is_logged_in():
+        st.switch_page("streamlit_app.py")
+
+    st.set_page_config(page_title="Groups | CP Platform", page_icon="👥", layout="wide")
+
+    # Sidebar
+    with st.sidebar:
+        st.markdown(f"### 👋 **{get_current_username()}**")
+        if is_admin():
+            st.markdown("🛡️ *Admin*")
+        st.divider()
+        if st.button("🏠 Home", use_container_width=True):
+            st.switch_page("streamlit_app.py")
+        if st.button("🚪 Logout", use_container_width=True):
+            logout()
+            st.switch_page("streamlit_app.py")
+
+    # Main content
+    st.title("👥 Groups")
+
+    groups = list_groups()
+    if not groups:
+        st.info("No groups yet. Ask an admin to create one!")
+    else:
+        import pandas as pd  # Only needed once there are groups to show
+
+        user_id = get_current_user_id()
+        data_version = get_data_version()
+        time_key = FILTER_MAP[st.radio("Time Period:", list(FILTER_MAP), horizontal=True)]
+
+        tab1, tab2 = st.tabs(["🏅 Group Leaderboard", "🏆 All Groups"])
+
+        with tab1:
+            # The user's own groups first
+            mine = {group.id for group in get_user_groups(user_id)}
+            ordered = sorted(groups, key=lambda group: (group.id not in mine, group.name))
+            group = st.selectbox(
+                "Group",
+                ordered,
+                format_func=lambda g: f"{'⭐ ' if g.id in mine else ''}{g.name} ({g.member_count} members)"
+            )
+            if group.description:
+                st.caption(group.description)
+
+            entries = load_group_leaderboard(group.id, time_key, data_version)
+            if not entries:
+                st.info("No solves from this group in this period yet.")
+            else:
+                df = pd.DataFrame(entries)
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("👥 Active Members", f"{len(df)} / {group.member_count}")
+                with col2:
+                    st.metric("✅ Problems Solved", int(df["solved_count"].sum()))
+                with col3:
+                    st.metric("⭐ Total Points", int(df["total_points"].sum()))
+
+                is_current_user = (df["user_id"] == user_id).to_numpy()
+                df = df.drop(columns=["user_id"]).rename(columns={
+                    "rank": "Rank",
+                    "username": "Username",
+                    "solved_count": "Problems Solved",
+                    "total_points": "Total Points"
+                })
+                st.dataframe(highlight(df, is_current_user), use_container_width=True, hide_index=True)
+
+        with tab2:
+            standings = load_group_standings(time_key, data_version)
+            df = pd.DataFrame(standings)
+            is_my_group = df["group_id"].isin(mine).to_numpy()
+            df = df.drop(columns=["group_id"]).rename(columns={
+                "rank": "Rank",
+                "name": "Group",
+                "members": "Members",
+                "active_members": "Active",
+                "solved_count": "Problems Solved",
+                "total_points": "Total Points",
+                "avg_points": "Points / Member"
+            })
+            st.dataframe(highlight(df, is_my_group), use_container_width=True, hide_index=True)
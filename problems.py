@@ -0,0 +1,335 @@
+"""
+Problem catalog read APIs for Competitive Programming Platform.
+List pages only need a handful of columns, so these queries select plain
+columns into compact rows instead of building full ORM objects.
+"""
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from sqlalchemy import func, select, update, bindparam
+from models import get_session, Problem, Submission, UserScore, ContestProblem, ContestResult, bump_data_version
+from contests import record_solve, recompute_standings
+from scoring import apply_solve, rebuild_user_scores
+
+CF_URL_PATTERN = re.compile(r'codeforces\.com/(?:contest|problemset/problem)/(\d+)/(\w+)')
+
+
+@dataclass(slots=True, frozen=True)
+class ProblemRow:
+    """Lightweight, read-only view of a problem for list pages."""
+    id: int
+    title: str
+    problem_url: str | None
+    points: int
+    cf_contest_id: int | None
+    cf_problem_index: str | None
+    created_at: datetime | None
+
+    @property
+    def cf_label(self) -> str | None:
+        """Codeforces label such as "1234B1", or None for custom problems."""
+        if self.cf_contest_id:
+            return f"{self.cf_contest_id}{self.cf_problem_index or ''}"
+        return None
+
+
+_PROBLEM_ROW_COLUMNS = (
+    Problem.id,
+    Problem.title,
+    Problem.problem_url,
+    Problem.points,
+    Problem.cf_contest_id,
+    Problem.cf_problem_index,
+    Problem.created_at,
+)
+
+
+def list_problems(limit: int | None = None, offset: int = 0) -> list[ProblemRow]:
+    """Get problems, newest first, as compact rows."""
+    session = get_session()
+    try:
+        query = session.query(*_PROBLEM_ROW_COLUMNS).order_by(
+            Problem.created_at.desc(), Problem.id.desc()
+        )
+        if offset:
+            query = query.offset(offset)
+        if limit is not None:
+            query = query.limit(limit)
+        return [ProblemRow(*row) for row in query.all()]
+    finally:
+        session.close()
+
+
+def count_problems() -> int:
+    """Get the number of problems."""
+    session = get_session()
+    try:
+        return session.query(func.count(Problem.id)).scalar() or 0
+    finally:
+        session.close()
+
+
+def parse_cf_url(problem_url: str) -> tuple[int, str] | None:
+    """Extract (contest_id, problem_index) from a Codeforces problem URL."""
+    match = CF_URL_PATTERN.search(problem_url or "")
+    if match:
+        return int(match.group(1)), match.group(2).upper()
+    return None
+
+
+def add_problem(title: str, problem_url: str | None, points: int,
+                cf_contest_id: int | None = None, cf_problem_index: str | None = None,
+                added_by: int | None = None) -> tuple[bool, str]:
+    """
+    Add a problem, filling in Codeforces details from the URL when not given.
+    Returns (success, message).
+    """
+    if not title:
+        return False, "Title is required."
+    
+    parsed_contest = cf_contest_id if cf_contest_id else None
+    parsed_index = cf_problem_index.strip().upper() if cf_problem_index else None
+    if problem_url and not parsed_contest:
+        parsed = parse_cf_url(problem_url)
+        if parsed:
+            parsed_contest, parsed_index = parsed
+    
+    session = get_session()
+    try:
+        session.add(Problem(
+            title=title,
+            problem_url=problem_url if problem_url else None,
+            points=points,
+            base_points=points,
+            cf_contest_id=parsed_contest,
+            cf_problem_index=parsed_index,
+            added_by=added_by
+        ))
+        bump_data_version(session)
+        session.commit()
+        return True, f"Problem '{title}' added with {points} points!"
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def import_problems(rows: list[dict], added_by: int | None = None) -> tuple[bool, str]:
+    """
+    Add many problems in one transaction. Each row has "title" and optionally
+    "problem_url", "points", "cf_contest_id" and "cf_problem_index". Codeforces
+    problems already in the catalog (or repeated in `rows`) are skipped.
+    Returns (success, message).
+    """
+    session = get_session()
+    try:
+        existing = {
+            (contest_id, index) for contest_id, index in session.query(
+                Problem.cf_contest_id, Problem.cf_problem_index
+            ).filter(Problem.cf_contest_id.isnot(None)).all()
+        }
+        now = datetime.utcnow()
+        new_rows = []
+        skipped = 0
+        for line, row in enumerate(rows, 1):
+            title = (row.get("title") or "").strip()
+            if not title:
+                return False, f"Row {line}: title is required."
+            try:
+                points = int(row.get("points") or 10)
+                contest_id = int(row["cf_contest_id"]) if row.get("cf_contest_id") else None
+            except ValueError as e:
+                return False, f"Row {line}: {e}"
+            index = (row.get("cf_problem_index") or "").strip().upper() or None
+            problem_url = (row.get("problem_url") or "").strip() or None
+            if problem_url and not contest_id:
+                parsed = parse_cf_url(problem_url)
+                if parsed:
+                    contest_id, index = parsed
+            if contest_id:
+                if (contest_id, index) in existing:
+                    skipped += 1
+                    continue
+                existing.add((contest_id, index))
+            new_rows.append({
+                "title": title,
+                "problem_url": problem_url,
+                "points": points,
+                "base_points": points,
+                "cf_contest_id": contest_id,
+                "cf_problem_index": index,
+                "added_by": added_by,
+                "created_at": now
+            })
+
+        if new_rows:
+            session.execute(Problem.__table__.insert(), new_rows)
+            bump_data_version(session)
+        session.commit()
+        return True, f"Imported {len(new_rows)} problems ({skipped} already present)."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def dedupe_submissions() -> tuple[bool, str]:
+    """
+    Remove repeated submissions of the same problem by the same user, keeping
+    the earliest solve (lowest id on ties), and rebuild user totals.
+    Returns (success, message).
+    """
+    session = get_session()
+    try:
+        ranked = select(
+            Submission.id,
+            func.row_number().over(
+                partition_by=(Submission.user_id, Submission.problem_id),
+                order_by=(Submission.solved_at, Submission.id)
+            ).label("position")
+        ).subquery()
+        duplicates = select(ranked.c.id).where(ranked.c.position > 1)
+        removed = session.query(Submission).filter(
+            Submission.id.in_(duplicates)
+        ).delete(synchronize_session=False)
+        if removed:
+            rebuild_user_scores(session)
+            bump_data_version(session)
+        session.commit()
+        return True, f"Removed {removed} duplicate submissions."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def delete_problem(problem_id: int) -> tuple[bool, str]:
+    """
+    Delete a problem with its submissions and contest entries, taking its
+    points off the users who solved it. Returns (success, message).
+    """
+    session = get_session()
+    try:
+        problem = session.get(Problem, problem_id)
+        if problem is None:
+            return False, "Problem not found."
+        title, points = problem.title, problem.points or 0
+        solves = session.query(Submission.user_id, func.count(Submission.id)).filter(
+            Submission.problem_id == problem_id
+        ).group_by(Submission.user_id).all()
+        if solves:
+            scores = UserScore.__table__
+            session.connection().execute(
+                update(scores).where(scores.c.user_id == bindparam("b_user")).values(
+                    solved_count=scores.c.solved_count - bindparam("b_count"),
+                    total_points=scores.c.total_points - bindparam("b_points")
+                ),
+                [{"b_user": user_id, "b_count": count, "b_points": count * points} for user_id, count in solves]
+            )
+        contest_ids = [contest_id for (contest_id,) in session.query(ContestProblem.contest_id).filter(
+            ContestProblem.problem_id == problem_id
+        )]
+        for model in (ContestResult, ContestProblem, Submission):
+            session.query(model).filter(model.problem_id == problem_id).delete(synchronize_session=False)
+        session.query(Problem).filter(Problem.id == problem_id).delete(synchronize_session=False)
+        if contest_ids:
+            recompute_standings(session, contest_ids)
+        bump_data_version(session)
+        session.commit()
+        return True, f"Problem '{title}' deleted ({len(solves)} users' totals updated)."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def mark_solved(user_id: int, problem_id: int) -> tuple[bool, str]:
+    """
+    Record that a user solved a problem (and apply it to running contests).
+    Returns (success, message).
+    """
+    session = get_session()
+    try:
+        if session.get(Problem, problem_id) is None:
+            return False, "Problem not found."
+        already = session.query(Submission.id).filter(
+            Submission.user_id == user_id, Submission.problem_id == problem_id
+        ).first()
+        if already:
+            return False, "You have already solved this problem."
+        solved_at = datetime.utcnow()
+        session.add(Submission(
+            user_id=user_id,
+            problem_id=problem_id,
+            solved_at=solved_at
+        ))
+        apply_solve(session, user_id, problem_id)
+        record_solve(session, user_id, problem_id, solved_at)
+        bump_data_version(session)
+        session.commit()
+        return True, "Problem marked as solved!"
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def _benchmark(rows: int = 100_000):
+    """Compare ORM loading against compact rows on a scratch catalog."""
+    import os
+    import tempfile
+    import time
+    import tracemalloc
+    import models
+    from leaderboard import get_user_solved_problems
+
+    scratch = os.path.join(tempfile.mkdtemp(), "bench_problems.db")
+    models.use_database(f"sqlite:///{scratch}")
+    models.Base.metadata.create_all(bind=models.engine)
+
+    with models.engine.begin() as conn:
+        now = datetime.utcnow()
+        conn.execute(Problem.__table__.insert(), [
+            {"title": f"Problem {i}", "problem_url": f"https://codeforces.com/problemset/problem/{i}/A",
+             "points": 10 + i % 90, "cf_contest_id": i, "cf_problem_index": "A", "created_at": now}
+            for i in range(1, rows + 1)
+        ])
+        conn.execute(models.Submission.__table__.insert(), [
+            {"user_id": 1, "problem_id": i, "solved_at": now} for i in range(1, rows + 1, 3)
+        ])
+
+    def measure(label, fn):
+        tracemalloc.start()
+        start = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{label:<32} {elapsed * 1000:9.1f} ms   peak {peak / 1024 / 1024:7.1f} MiB")
+        return result
+
+    def orm_problems():
+        session = get_session()
+        try:
+            return session.query(Problem).order_by(Problem.created_at.desc()).all()
+        finally:
+            session.close()
+
+    print(f"Catalog of {rows} problems ({scratch})")
+    measure("ORM Problem objects", orm_problems)
+    measure("list_problems()", list_problems)
+    solved = measure("get_user_solved_problems()", lambda: get_user_solved_problems(1))
+
+    start = time.perf_counter()
+    hits = sum(1 for pid in range(1, rows + 1) if pid in solved)
+    print(f"{'membership checks (set)':<32} {(time.perf_counter() - start) * 1000:9.1f} ms   ({hits} solved)")
+
+
+if __name__ == "__main__":
+    import sys
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
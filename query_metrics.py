@@ -0,0 +1,156 @@
+"""
+SQL query instrumentation for Competitive Programming Platform.
+Opt-in SQLAlchemy engine hooks that record per-statement latency, keep a
+slow-query log and capture EXPLAIN QUERY PLAN output for slow statements.
+"""
+import json
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from sqlalchemy import event
+from metrics import LatencyHistogram
+
+DEFAULT_SLOW_QUERY_MS = 100.0
+SLOW_LOG_SIZE = 200
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)", re.IGNORECASE)
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Normalize a SQL statement so that executions differing only in literal
+    values or IN-list length share one key.
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _WHITESPACE.sub(" ", sql).strip()
+    return _IN_LIST.sub("IN (...)", sql)
+
+
+class QueryMetrics:
+    """Thread-safe store of per-statement histograms and the slow-query log."""
+
+    def __init__(self, slow_ms: float = DEFAULT_SLOW_QUERY_MS, slow_log_size: int = SLOW_LOG_SIZE):
+        self.slow_ms = slow_ms
+        self._lock = threading.Lock()
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._slow_log: deque = deque(maxlen=slow_log_size)
+        self._started_at = datetime.utcnow()
+
+    def record(self, statement: str, elapsed_ms: float) -> bool:
+        """Record one execution. Returns True if it counts as slow."""
+        key = normalize_sql(statement)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.observe(elapsed_ms)
+        return elapsed_ms >= self.slow_ms
+
+    def record_slow(self, statement: str, parameters, elapsed_ms: float, plan: list[str] | None):
+        """Add an entry to the slow-query log."""
+        entry = {
+            "at": datetime.utcnow().isoformat(timespec="seconds"),
+            "elapsed_ms": round(elapsed_ms, 3),
+            "sql": normalize_sql(statement),
+            "statement": statement,
+            "parameters": repr(parameters)[:500],
+            "plan": plan,
+        }
+        with self._lock:
+            self._slow_log.append(entry)
+
+    def reset(self):
+        """Drop everything recorded so far."""
+        with self._lock:
+            self._histograms.clear()
+            self._slow_log.clear()
+            self._started_at = datetime.utcnow()
+
+    def statement_stats(self) -> list[dict]:
+        """Get per-statement summaries, most total time first."""
+        with self._lock:
+            rows = [{"sql": sql, **histogram.to_dict()} for sql, histogram in self._histograms.items()]
+        return sorted(rows, key=lambda row: row["total_ms"], reverse=True)
+
+    def slow_queries(self) -> list[dict]:
+        """Get slow-query log entries, newest first."""
+        with self._lock:
+            return list(reversed(self._slow_log))
+
+    def snapshot(self) -> dict:
+        """Export everything as a JSON-serialisable dict."""
+        return {
+            "started_at": self._started_at.isoformat(timespec="seconds"),
+            "exported_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "slow_query_ms": self.slow_ms,
+            "statements": self.statement_stats(),
+            "slow_queries": self.slow_queries(),
+        }
+
+    def to_json(self) -> str:
+        """Export everything as JSON."""
+        return json.dumps(self.snapshot(), indent=2)
+
+
+_metrics = QueryMetrics()
+
+
+def get_query_metrics() -> QueryMetrics:
+    """Get the process-wide query metrics store."""
+    return _metrics
+
+
+def _explain(conn, statement: str, parameters) -> list[str] | None:
+    """Run EXPLAIN QUERY PLAN on a raw DBAPI cursor (bypasses these hooks)."""
+    if conn.dialect.name != "sqlite" or not statement.lstrip().upper().startswith(("SELECT", "WITH")):
+        return None
+    cursor = conn.connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [f"{row[0]}|{row[1]}| {row[3]}" for row in cursor.fetchall()]
+    except Exception as e:
+        return [f"EXPLAIN failed: {e}"]
+    finally:
+        cursor.close()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Kept on the per-statement context, so a statement that fails leaves nothing behind
+    context.query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "query_start_time", None)
+    if start is None:
+        return
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if _metrics.record(statement, elapsed_ms):
+        plan = None if executemany else _explain(conn, statement, parameters)
+        _metrics.record_slow(statement, parameters, elapsed_ms, plan)
+
+
+def instrument_engine(engine, slow_ms: float | None = None):
+    """Attach timing hooks to an engine (no-op if already attached)."""
+    if slow_ms is not None:
+        _metrics.slow_ms = slow_ms
+    if not is_instrumented(engine):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def uninstrument_engine(engine):
+    """Detach timing hooks from an engine."""
+    if is_instrumented(engine):
+        event.remove(engine, "before_cursor_execute", _before_cursor_execute)
+        event.remove(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def is_instrumented(engine) -> bool:
+    """Check whether the timing hooks are attached to an engine."""
+    return event.contains(engine, "after_cursor_execute", _after_cursor_execute)
@@ -0,0 +1,333 @@
+"""
+Problem recommendations for Competitive Programming Platform.
+Keeps an in-memory sparse user x problem co-solve matrix (CSR by user and
+CSC by problem, as NumPy arrays) built once from `submissions` and then
+extended with new solves as they arrive. A user's recommendations come
+from their most similar users (cosine similarity of solved sets), weighted
+by problem points and closeness to the user's CF rating level, and are
+cached per user until their own solved set changes.
+"""
+from __future__ import annotations
+import threading
+import time
+from itertools import chain
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from sqlalchemy import func, select
+from models import get_session, get_data_version, Problem, Submission
+
+if TYPE_CHECKING:
+    import numpy as np
+
+NEIGHBOURS = 50  # Most similar users considered per recommendation
+COMPACT_AFTER = 10_000  # Pending solves folded into the CSR/CSC arrays after this many
+CACHE_SIZE = 1024  # Users with cached recommendations
+CACHED_PER_USER = 20  # Recommendations computed and cached per user
+CACHE_TTL = 600.0  # Seconds before a user's cached recommendations are recomputed anyway
+PROBLEMS_TTL = 600.0  # Seconds between full problem reloads (picks up changed points and ratings)
+RATING_STEP = 100  # Aim this far above the median rating of the user's solved problems
+RATING_SPREAD = 300.0
+UNRATED_FIT = 0.6  # Rating fit used for problems without a CF rating
+
+
+def _gather(ptr: np.ndarray, data: np.ndarray, rows: np.ndarray) -> np.ndarray:
+    """Concatenate data[ptr[r]:ptr[r + 1]] for each row in `rows`, without a Python loop."""
+    import numpy as np
+    rows = rows[rows < len(ptr) - 1]
+    starts = ptr[rows]
+    lengths = ptr[rows + 1] - starts
+    total = int(lengths.sum())
+    if not total:
+        return np.empty(0, dtype=data.dtype)
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return data[offsets + np.arange(total)]
+
+
+def _compress(keys: np.ndarray, values: np.ndarray, size: int) -> tuple[np.ndarray, np.ndarray]:
+    """Build (ptr, data) index arrays grouping `values` by `keys`."""
+    import numpy as np
+    order = np.argsort(keys, kind="stable")
+    ptr = np.zeros(size + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=size), out=ptr[1:])
+    return ptr, values[order]
+
+
+def _contains(sorted_keys: np.ndarray, keys: np.ndarray) -> np.ndarray:
+    """Mask of `keys` present in the sorted array `sorted_keys`."""
+    import numpy as np
+    positions = np.searchsorted(sorted_keys, keys)
+    found = positions < len(sorted_keys)
+    found[found] = sorted_keys[positions[found]] == keys[found]
+    return found
+
+
+class CoSolveIndex:
+    """Sparse co-solve matrix with incremental updates. Thread-safe."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cache: OrderedDict[int, tuple[int, float, list[dict]]] = OrderedDict()
+        self._reset()
+
+    def _reset(self):
+        import numpy as np
+        self.version = None
+        self.cursor = 0  # Highest submission id applied
+        self.submission_count = 0
+        self.user_index: dict[int, int] = {}
+        self.problem_index: dict[int, int] = {}
+        self.user_ids = np.empty(0, dtype=np.int64)
+        self.problem_ids = np.empty(0, dtype=np.int64)
+        self.degrees = np.empty(0, dtype=np.int64)  # Problems solved per user
+        self.solvers = np.empty(0, dtype=np.int64)  # Users per problem
+        self.pair_keys = np.empty(0, dtype=np.int64)  # Sorted (user << 32 | problem), compacted solves
+        self.pending_keys = np.empty(0, dtype=np.int64)  # Sorted keys of pending solves, merged on compaction
+        self.row_ptr = self.col_ptr = np.zeros(1, dtype=np.int64)
+        self.row_data = self.col_data = np.empty(0, dtype=np.int32)
+        self.pending_rows: dict[int, list[int]] = {}
+        self.pending_cols: dict[int, list[int]] = {}
+        self.pending = 0
+        self.problems: dict[int, tuple] = {}
+        self.problem_cursor = 0  # Highest problem id loaded
+        self.problems_loaded_at = float("-inf")  # time.monotonic() of the last full problem load
+        self.points = np.empty(0)
+        self.points_weight = np.empty(0)
+        self.ratings = np.empty(0)
+        self._cache.clear()
+
+    @staticmethod
+    def _indices(ids: np.ndarray, index: dict[int, int]) -> np.ndarray:
+        """Map ids to dense indices, assigning indices to new ids."""
+        import numpy as np
+        unique, inverse = np.unique(ids, return_inverse=True)
+        unique = unique.tolist()
+        for key in unique:
+            if key not in index:
+                index[key] = len(index)
+        return np.fromiter((index[key] for key in unique), dtype=np.int64, count=len(unique))[inverse]
+
+    def _grow(self):
+        """Size the per-user and per-problem arrays to the current indices."""
+        import numpy as np
+        if len(self.user_ids) < len(self.user_index):
+            self.user_ids = np.fromiter(self.user_index, dtype=np.int64, count=len(self.user_index))
+            self.degrees = np.concatenate([self.degrees, np.zeros(len(self.user_ids) - len(self.degrees), dtype=np.int64)])
+        if len(self.problem_ids) < len(self.problem_index):
+            self.problem_ids = np.fromiter(self.problem_index, dtype=np.int64, count=len(self.problem_index))
+            self.solvers = np.concatenate([self.solvers, np.zeros(len(self.problem_ids) - len(self.solvers), dtype=np.int64)])
+
+    def _row(self, user: int) -> np.ndarray:
+        """Problems solved by a user."""
+        import numpy as np
+        solved = _gather(self.row_ptr, self.row_data, np.array([user]))
+        extra = self.pending_rows.get(user)
+        return np.concatenate([solved, np.array(extra, dtype=np.int32)]) if extra else solved
+
+    def _compact(self):
+        """Fold pending solves into the CSR/CSC arrays."""
+        import numpy as np
+        if len(self.pending_keys):
+            positions = np.searchsorted(self.pair_keys, self.pending_keys)
+            self.pair_keys = np.insert(self.pair_keys, positions, self.pending_keys)
+            self.pending_keys = np.empty(0, dtype=np.int64)
+        users = (self.pair_keys >> 32).astype(np.int32)
+        problems = (self.pair_keys & 0xFFFFFFFF).astype(np.int32)
+        self.row_ptr, self.row_data = _compress(users, problems, len(self.user_ids))
+        self.col_ptr, self.col_data = _compress(problems, users, len(self.problem_ids))
+        self.pending_rows.clear()
+        self.pending_cols.clear()
+        self.pending = 0
+
+    def _add_pairs(self, user_ids: np.ndarray, problem_ids: np.ndarray):
+        """Add solves, ignoring (user, problem) pairs already present."""
+        import numpy as np
+        users = self._indices(user_ids, self.user_index)
+        problems = self._indices(problem_ids, self.problem_index)
+        self._grow()
+
+        keys = np.unique((users << 32) | problems)
+        keys = keys[~(_contains(self.pair_keys, keys) | _contains(self.pending_keys, keys))]
+        if not len(keys):
+            return
+        # Only the small pending array is copied here; the full key array is merged on compaction
+        self.pending_keys = np.union1d(self.pending_keys, keys)
+
+        users = (keys >> 32).astype(np.int32)
+        problems = (keys & 0xFFFFFFFF).astype(np.int32)
+        self.degrees += np.bincount(users, minlength=len(self.degrees))
+        self.solvers += np.bincount(problems, minlength=len(self.solvers))
+        self.pending += len(keys)
+        if self.pending <= COMPACT_AFTER:
+            for user, problem in zip(users.tolist(), problems.tolist()):
+                self.pending_rows.setdefault(user, []).append(problem)
+                self.pending_cols.setdefault(problem, []).append(user)
+
+    def _load_problems(self, session, full: bool):
+        """Load problem details: all of them, or only those added since the last load."""
+        import numpy as np
+        query = session.query(Problem.id, Problem.title, Problem.problem_url, Problem.points, Problem.cf_rating)
+        if not full:
+            query = query.filter(Problem.id > self.problem_cursor)
+        rows = query.all()
+        if full:
+            self.problems = {}
+            self.problems_loaded_at = time.monotonic()
+        self.problems.update((row[0], tuple(row)) for row in rows)
+        self.problem_cursor = max([self.problem_cursor, *(row[0] for row in rows)])
+        indices = self._indices(np.array([row[0] for row in rows], dtype=np.int64), self.problem_index)
+        self._grow()
+        # Deleted problems keep their column but get zero weight
+        points = np.zeros(len(self.problem_ids))
+        ratings = np.full(len(self.problem_ids), np.nan)
+        if not full:
+            points[:len(self.points)] = self.points
+            ratings[:len(self.ratings)] = self.ratings
+        points[indices] = [row[3] or 0 for row in rows]
+        ratings[indices] = [np.nan if row[4] is None else row[4] for row in rows]
+        self.points = points
+        self.points_weight = np.log1p(points)
+        self.ratings = ratings
+
+    @staticmethod
+    def _fetch_pairs(session, after_id: int, last_id: int) -> np.ndarray:
+        """(user_id, problem_id) rows for submissions with after_id < id <= last_id."""
+        import numpy as np
+        if last_id <= after_id:
+            return np.empty((0, 2), dtype=np.int64)
+        rows = session.connection().execute(
+            select(Submission.user_id, Submission.problem_id).where(
+                Submission.id > after_id, Submission.id <= last_id
+            )
+        ).all()
+        flat = np.fromiter(chain.from_iterable(rows), dtype=np.int64, count=2 * len(rows))
+        return flat.reshape(-1, 2)
+
+    def refresh(self):
+        """Apply solves recorded since the last refresh. Rebuilds only if submissions were removed."""
+        version = get_data_version()
+        if version == self.version:
+            return
+        session = get_session()
+        try:
+            with self._lock:
+                if version == self.version:
+                    return
+                count, last_id = session.execute(
+                    select(func.count(Submission.id), func.coalesce(func.max(Submission.id), 0))
+                ).one()
+                pairs = self._fetch_pairs(session, self.cursor, last_id)
+                if count < self.submission_count + len(pairs):
+                    self._reset()
+                    pairs = self._fetch_pairs(session, 0, last_id)
+                if len(pairs):
+                    self._add_pairs(pairs[:, 0], pairs[:, 1])
+                self.cursor = last_id
+                self.submission_count = count
+                self._load_problems(session, full=time.monotonic() - self.problems_loaded_at >= PROBLEMS_TTL)
+                if self.pending > COMPACT_AFTER or len(self.row_ptr) - 1 < len(self.user_ids) // 2:
+                    self._compact()
+                self.version = version
+        finally:
+            session.close()
+
+    def _popular(self, exclude: np.ndarray) -> np.ndarray:
+        """Fallback scores for users without similar users: most-solved problems."""
+        scores = self.solvers * self.points_weight
+        scores[exclude] = 0
+        return scores
+
+    def _scores(self, user: int) -> tuple[np.ndarray, np.ndarray]:
+        """Score every problem for a user. Returns (scores, supporting neighbour counts)."""
+        import numpy as np
+        solved = self._row(user)
+        n_problems = len(self.problem_ids)
+        if not len(solved):
+            return self._popular(solved), np.zeros(n_problems)
+
+        # Users sharing a solve with this user, counted per shared problem
+        co_solvers = _gather(self.col_ptr, self.col_data, solved)
+        extra = [self.pending_cols[p] for p in solved if p in self.pending_cols]
+        if extra:
+            co_solvers = np.concatenate([co_solvers, np.concatenate(extra).astype(np.int32)])
+        overlap = np.bincount(co_solvers, minlength=len(self.user_ids)).astype(float)
+        overlap[user] = 0
+        similarity = overlap / np.sqrt(len(solved) * np.maximum(self.degrees, 1))
+
+        k = min(NEIGHBOURS, int(np.count_nonzero(similarity)))
+        if not k:
+            return self._popular(solved), np.zeros(n_problems)
+        neighbours = np.argpartition(-similarity, k - 1)[:k]
+
+        candidates = [self._row(v) for v in neighbours]
+        lengths = np.array([len(c) for c in candidates])
+        candidates = np.concatenate(candidates)
+        weights = np.repeat(similarity[neighbours], lengths)
+        scores = np.bincount(candidates, weights=weights, minlength=n_problems)
+        support = np.bincount(candidates, minlength=n_problems)
+
+        # Prefer problems a little above the user's current level
+        solved_ratings = self.ratings[solved]
+        solved_ratings = solved_ratings[~np.isnan(solved_ratings)]
+        if len(solved_ratings):
+            target = np.median(solved_ratings) + RATING_STEP
+            fit = np.exp(-0.5 * ((self.ratings - target) / RATING_SPREAD) ** 2)
+            scores *= np.where(np.isnan(self.ratings), UNRATED_FIT, fit)
+        scores *= self.points_weight
+        scores[solved] = 0
+        return scores, support
+
+    def recommend(self, user_id: int, limit: int = 5) -> list[dict]:
+        """Get up to `limit` recommended problems for a user, best first."""
+        import numpy as np
+        self.refresh()
+        with self._lock:
+            user = self.user_index.get(user_id)
+            degree = int(self.degrees[user]) if user is not None else 0
+            cached = self._cache.get(user_id)
+            if cached and cached[0] == degree and time.monotonic() - cached[1] < CACHE_TTL:
+                self._cache.move_to_end(user_id)
+                return cached[2][:limit]
+
+            if user is None:
+                scores, support = self._popular(np.empty(0, dtype=np.int64)), np.zeros(len(self.problem_ids))
+            else:
+                scores, support = self._scores(user)
+            count = min(max(limit, CACHED_PER_USER), int(np.count_nonzero(scores > 0)))
+            top = np.argpartition(-scores, count - 1)[:count] if count else np.empty(0, dtype=np.int64)
+            top = top[np.argsort(-scores[top], kind="stable")]
+
+            recommendations = []
+            for index in top:
+                problem_id = int(self.problem_ids[index])
+                if problem_id not in self.problems:
+                    continue
+                _, title, problem_url, points, cf_rating = self.problems[problem_id]
+                recommendations.append({
+                    "problem_id": problem_id,
+                    "title": title,
+                    "problem_url": problem_url,
+                    "points": points,
+                    "cf_rating": cf_rating,
+                    "score": float(scores[index]),
+                    "similar_solvers": int(support[index])
+                })
+
+            self._cache[user_id] = (degree, time.monotonic(), recommendations)
+            self._cache.move_to_end(user_id)
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+            return recommendations[:limit]
+
+
+_index: CoSolveIndex | None = None  # Built on first use, so importing this module stays light
+_index_lock = threading.Lock()
+
+
+def get_recommendations(user_id: int, limit: int = 5) -> list[dict]:
+    """Get "next problem" recommendations for a user."""
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = CoSolveIndex()
+    return _index.recommend(user_id, limit)
@@ -0,0 +1,253 @@
+"""
+Problem scoring for Competitive Programming Platform.
+A problem is worth its admin-set base points ("static"), a value that
+decays as more users solve it ("decay"), or a value derived from its
+mirrored Codeforces rating ("rating"). All-time user totals are kept in
+the user_scores rollup. Re-scoring computes every problem's value at once
+with NumPy and rebuilds the totals in a single SQL pass, in one transaction.
+"""
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from sqlalchemy import bindparam, func, insert, select, update, delete
+from models import get_session, bump_data_version, set_setting, AppMeta, Problem, Submission, UserScore
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SCORING_MODES = ["static", "decay", "rating"]
+SCORING_MODE_KEY = "scoring_mode"  # Index into SCORING_MODES
+DECAY_HALF_SOLVERS = 20  # A problem with this many solvers is worth half its base points
+DECAY_MIN_RATIO = 0.25  # Decay never goes below this share of the base points
+RATING_POINTS_DIVISOR = 100  # CF rating 1500 -> 15 points
+DECAY_DELTA_LIMIT = 32  # More re-valued problems than this in one batch: rebuild totals instead
+
+
+def _mode(session) -> str:
+    value = session.query(AppMeta.value).filter(AppMeta.key == SCORING_MODE_KEY).scalar() or 0
+    return SCORING_MODES[value] if 0 <= value < len(SCORING_MODES) else "static"
+
+
+def get_scoring_mode() -> str:
+    """Get the current scoring mode."""
+    session = get_session()
+    try:
+        return _mode(session)
+    finally:
+        session.close()
+
+
+def compute_points(mode: str, base_points, cf_rating, solvers) -> np.ndarray:
+    """
+    Compute problem values for a scoring mode, element-wise over arrays.
+    `cf_rating` uses NaN for problems without a rating; those keep their
+    base points in "rating" mode.
+    """
+    import numpy as np  # Only scoring math needs it, so pages importing this module stay light
+    base = np.asarray(base_points, dtype=float)
+    if mode == "decay":
+        solvers = np.asarray(solvers, dtype=float)
+        values = base * np.maximum(DECAY_MIN_RATIO, DECAY_HALF_SOLVERS / (DECAY_HALF_SOLVERS + solvers))
+    elif mode == "rating":
+        rating = np.asarray(cf_rating, dtype=float)
+        values = np.where(np.isnan(rating), base, rating / RATING_POINTS_DIVISOR)
+    else:
+        values = base
+    return np.rint(values).astype(np.int64)
+
+
+def _solver_counts(session):
+    """Subquery of distinct solvers per problem."""
+    return session.query(
+        Submission.problem_id.label("problem_id"),
+        func.count(func.distinct(Submission.user_id)).label("solvers")
+    ).group_by(Submission.problem_id).subquery()
+
+
+def rebuild_user_scores(session):
+    """Recompute every user's totals from submissions in one INSERT ... SELECT."""
+    session.execute(delete(UserScore))
+    session.execute(insert(UserScore).from_select(
+        ["user_id", "solved_count", "total_points"],
+        select(
+            Submission.user_id,
+            func.count(Submission.id),
+            func.coalesce(func.sum(Problem.points), 0)
+        ).outerjoin(Problem, Submission.problem_id == Problem.id).group_by(Submission.user_id)
+    ))
+
+
+def rescore_problems(session, mode: str | None = None) -> int:
+    """
+    Recompute all problem values for `mode` (default: the current mode) and,
+    if any changed, rebuild user totals. Runs in the caller's transaction.
+    Returns the number of problems whose value changed.
+    """
+    mode = mode or _mode(session)
+    solvers = _solver_counts(session)
+    rows = session.query(
+        Problem.id, Problem.points, Problem.base_points, Problem.cf_rating,
+        func.coalesce(solvers.c.solvers, 0)
+    ).outerjoin(solvers, solvers.c.problem_id == Problem.id).all()
+    if not rows:
+        return 0
+
+    import numpy as np
+    ids, points, base_points, cf_rating, solver_counts = zip(*rows)
+    current = np.array([value or 0 for value in points], dtype=np.int64)
+    base = np.array([b if b is not None else p or 0 for b, p in zip(base_points, points)], dtype=float)
+    rating = np.array([np.nan if r is None else r for r in cf_rating], dtype=float)
+    new = compute_points(mode, base, rating, np.array(solver_counts))
+
+    changed = np.flatnonzero(new != current)
+    if len(changed):
+        session.execute(update(Problem), [
+            {"id": ids[i], "points": int(new[i])} for i in changed
+        ])
+        rebuild_user_scores(session)
+    return len(changed)
+
+
+def apply_solves(session, solves: list[tuple[int, int]]):
+    """
+    Add newly recorded submissions [(user_id, problem_id)] to their users'
+    totals. In decay mode the problems' values drop, and every earlier
+    solver's total is adjusted by the difference. Call after adding the
+    Submissions, inside their transaction.
+    """
+    if not solves:
+        return
+    session.flush()
+    problem_ids = sorted({problem_id for _, problem_id in solves})
+    values = dict(session.query(Problem.id, Problem.points).filter(Problem.id.in_(problem_ids)).all())
+
+    totals = {}
+    for user_id, problem_id in solves:
+        count, points = totals.get(user_id, (0, 0))
+        totals[user_id] = (count + 1, points + (values.get(problem_id) or 0))
+    scores = UserScore.__table__
+    known = {user_id for (user_id,) in session.query(UserScore.user_id).filter(UserScore.user_id.in_(list(totals)))}
+    if known:
+        session.connection().execute(
+            update(scores).where(scores.c.user_id == bindparam("b_user")).values(
+                solved_count=scores.c.solved_count + bindparam("b_count"),
+                total_points=scores.c.total_points + bindparam("b_points")
+            ),
+            [{"b_user": user_id, "b_count": totals[user_id][0], "b_points": totals[user_id][1]} for user_id in known]
+        )
+    if len(known) < len(totals):
+        session.execute(insert(UserScore), [
+            {"user_id": user_id, "solved_count": count, "total_points": points}
+            for user_id, (count, points) in totals.items() if user_id not in known
+        ])
+
+    if _mode(session) != "decay":
+        return
+    rows = session.query(
+        Problem.id, Problem.points, Problem.base_points, func.count(func.distinct(Submission.user_id))
+    ).join(Submission, Submission.problem_id == Problem.id).filter(
+        Problem.id.in_(problem_ids)
+    ).group_by(Problem.id).all()
+    if not rows:
+        return
+    import numpy as np
+    ids, points, base_points, solvers = zip(*rows)
+    current = np.array([value or 0 for value in points], dtype=np.int64)
+    base = np.array([b if b is not None else p or 0 for b, p in zip(base_points, points)], dtype=float)
+    new = compute_points("decay", base, np.full(len(ids), np.nan), np.array(solvers))
+    changed = np.flatnonzero(new != current)
+    if not len(changed):
+        return
+    session.execute(update(Problem), [{"id": ids[i], "points": int(new[i])} for i in changed])
+    if len(changed) > DECAY_DELTA_LIMIT:
+        rebuild_user_scores(session)
+        return
+    for i in changed:
+        user_solves = select(func.count(Submission.id)).where(
+            Submission.user_id == UserScore.user_id,
+            Submission.problem_id == ids[i]
+        ).scalar_subquery()
+        session.execute(
+            update(UserScore).where(
+                UserScore.user_id.in_(select(Submission.user_id).where(Submission.problem_id == ids[i]))
+            ).values(total_points=UserScore.total_points + int(new[i] - current[i]) * user_solves)
+        )
+
+
+def apply_solve(session, user_id: int, problem_id: int):
+    """Add one newly recorded submission to the user's totals (see apply_solves)."""
+    apply_solves(session, [(user_id, problem_id)])
+
+
+def set_scoring_mode(mode: str) -> tuple[bool, str]:
+    """
+    Switch scoring mode and re-score everything in one transaction.
+    Returns (success, message).
+    """
+    if mode not in SCORING_MODES:
+        return False, f"Unknown scoring mode '{mode}'."
+
+    session = get_session()
+    try:
+        set_setting(session, SCORING_MODE_KEY, SCORING_MODES.index(mode))
+        changed = rescore_problems(session, mode)
+        bump_data_version(session)
+        session.commit()
+        return True, f"Scoring mode set to {mode}; {changed} problem values changed."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def recompute_scores() -> tuple[bool, str]:
+    """Re-score all problems and rebuild user totals. Returns (success, message)."""
+    session = get_session()
+    try:
+        changed = rescore_problems(session)
+        if not changed:
+            rebuild_user_scores(session)
+        bump_data_version(session)
+        session.commit()
+        return True, f"Recomputed scores; {changed} problem values changed."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
+
+
+def mirror_cf_ratings() -> tuple[bool, str]:
+    """
+    Copy problem ratings from the Codeforces problemset onto our CF problems,
+    re-scoring in the same transaction when in rating mode.
+    Returns (success, message).
+    """
+    from codeforces_api import get_problemset_ratings
+
+    ratings = get_problemset_ratings()
+    if ratings is None:
+        return False, "Codeforces API error."
+
+    session = get_session()
+    try:
+        rows = session.query(
+            Problem.id, Problem.cf_contest_id, Problem.cf_problem_index, Problem.cf_rating
+        ).filter(Problem.cf_contest_id.isnot(None)).all()
+        changes = [
+            {"id": problem_id, "cf_rating": ratings[(contest_id, index)]}
+            for problem_id, contest_id, index, rating in rows
+            if (contest_id, index) in ratings and ratings[(contest_id, index)] != rating
+        ]
+        if changes:
+            session.execute(update(Problem), changes)
+        rescored = rescore_problems(session) if _mode(session) == "rating" else 0
+        if changes or rescored:
+            bump_data_version(session)
+        session.commit()
+        return True, f"Updated ratings for {len(changes)} problems; {rescored} problem values changed."
+    except Exception as e:
+        session.rollback()
+        return False, f"Error: {str(e)}"
+    finally:
+        session.close()
@@ -0,0 +1,170 @@
+"""
+Cold-start benchmark for Competitive Programming Platform.
+Every measurement runs in a fresh Python process, like a container restart:
+import time per module (third-party and our own), and time to first render
+of each page via Streamlit's AppTest, with the heavy modules each page loaded.
+Exits non-zero if a page fails to render or a module in LAZY_IMPORTS loads
+one of its listed heavy modules on import.
+
+Usage:
+    python startup_bench.py
+    python startup_bench.py --runs 5 --db data/bench.db
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+LIBRARY_MODULES = ["streamlit", "sqlalchemy", "numpy", "pandas", "altair", "requests", "bcrypt"]
+APP_MODULES = [
+    "metrics", "models", "auth", "problems", "leaderboard", "contests", "scoring",
+    "groups", "activity", "recommendations", "judges", "codeforces_api", "styling"
+]
+# Heavy modules these may only load inside the functions that need them, not on import
+LAZY_IMPORTS = {
+    "leaderboard": ["numpy"], "recommendations": ["numpy"], "activity": ["numpy"], "styling": ["numpy", "pandas"],
+    "problems": ["numpy"], "scoring": ["numpy"], "groups": ["numpy"], "contests": ["numpy"]
+}
+HEAVY_MODULES = ["sqlalchemy", "numpy", "pandas", "altair", "requests", "bcrypt"]
+PAGES = [
+    "streamlit_app.py", "pages/1_Dashboard.py", "pages/2_Problems.py", "pages/3_Leaderboard.py",
+    "pages/4_Admin.py", "pages/5_Contests.py", "pages/6_Groups.py"
+]
+LOGGED_IN = {"user_id": 1, "username": "Admin", "is_admin": True, "logged_in": True}
+
+_IMPORT_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"ms": (time.perf_counter() - start) * 1000,
+                  "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+_RENDER_CHILD = """
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+app = AppTest.from_file({path!r}, default_timeout=120)
+for key, value in {state!r}.items():
+    app.session_state[key] = value
+ready = time.perf_counter()
+app.run()
+rendered = time.perf_counter()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+import auth
+auth.ensure_db_initialized()  # Waits for the background warm-up if the page started one
+print(json.dumps({{
+    "first_render_ms": (rendered - start) * 1000,
+    "run_ms": (rendered - ready) * 1000,
+    "db_ready_ms": (time.perf_counter() - start) * 1000,
+    "errors": [str(e.value)[:200] for e in app.exception],
+    "loaded": loaded
+}}))
+"""
+
+
+def _child(code: str, db_url: str) -> dict:
+    env = dict(os.environ, CP_DATABASE_URL=db_url)
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, timeout=300
+    )
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "child failed")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(modules: list[str], db_url: str, runs: int = 3) -> dict:
+    """Median cold import time per module, and which heavy modules it pulls in."""
+    results = {}
+    for module in modules:
+        samples = [_child(_IMPORT_CHILD.format(module=module, heavy=HEAVY_MODULES), db_url) for _ in range(runs)]
+        results[module] = {
+            "median_ms": round(statistics.median(sample["ms"] for sample in samples), 1),
+            "loaded": samples[-1]["loaded"]
+        }
+    return results
+
+
+def measure_first_render(pages: list[str], db_url: str, runs: int = 3) -> dict:
+    """
+    Median cold time to first render per page: a new process imports Streamlit,
+    runs the page script once and reports the heavy modules it loaded. The
+    home page renders logged out (the login form); the others as Admin.
+    """
+    results = {}
+    for page in pages:
+        state = {} if page == "streamlit_app.py" else LOGGED_IN
+        code = _RENDER_CHILD.format(path=os.path.join(ROOT, page), state=state, heavy=HEAVY_MODULES)
+        samples = [_child(code, db_url) for _ in range(runs)]
+        results[page] = {
+            "first_render_ms": round(statistics.median(sample["first_render_ms"] for sample in samples), 1),
+            "run_ms": round(statistics.median(sample["run_ms"] for sample in samples), 1),
+            "db_ready_ms": round(statistics.median(sample["db_ready_ms"] for sample in samples), 1),
+            "errors": samples[-1]["errors"],
+            "loaded": samples[-1]["loaded"]
+        }
+    return results
+
+
+def run_startup_benchmark(db: str | None = None, runs: int = 3, progress=print) -> dict:
+    """
+    Run both measurements against a scratch copy of `db` (default: the app
+    database), so first renders never write to the real one.
+    """
+    scratch = tempfile.mkdtemp()
+    db_path = os.path.join(scratch, "startup.db")
+    source = db or os.path.join(ROOT, "data", "cp_platform.db")
+    if os.path.exists(source):
+        shutil.copyfile(source, db_path)
+    db_url = f"sqlite:///{db_path}"
+    # One warm-up render creates/migrates the scratch DB so every timed run sees the same state
+    _child(_RENDER_CHILD.format(path=os.path.join(ROOT, PAGES[0]), state={}, heavy=HEAVY_MODULES), db_url)
+
+    try:
+        progress("Import time per module (fresh process, median):")
+        imports = measure_imports(LIBRARY_MODULES + APP_MODULES, db_url, runs)
+        eager = {}
+        for module, result in imports.items():
+            loaded = ", ".join(m for m in result["loaded"] if m != module) or "-"
+            eager_loaded = [m for m in LAZY_IMPORTS.get(module, []) if m in result["loaded"]]
+            if eager_loaded:
+                eager[module] = eager_loaded
+            status = f"   SHOULD BE LAZY: {', '.join(eager_loaded)}" if eager_loaded else ""
+            progress(f"  {module:<18} {result['median_ms']:8.1f} ms   pulls in: {loaded}{status}")
+
+        progress("Time to first render (fresh process, median):")
+        renders = measure_first_render(PAGES, db_url, runs)
+        for page, result in renders.items():
+            status = "" if not result["errors"] else f"   ERRORS: {result['errors']}"
+            progress(
+                f"  {page:<24} {result['first_render_ms']:8.1f} ms  (script {result['run_ms']:.1f} ms, "
+                f"DB ready {result['db_ready_ms']:.1f} ms)   loaded: {', '.join(result['loaded']) or '-'}{status}"
+            )
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return {"imports": imports, "first_render": renders, "eager_imports": eager}
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure CP Platform cold-start import and render times.")
+    parser.add_argument("--db", help="database to copy for the render runs (default: data/cp_platform.db)")
+    parser.add_argument("--runs", type=int, default=3, help="fresh processes per measurement")
+    parser.add_argument("--output", help="also write the results as JSON here")
+    args = parser.parse_args(argv)
+
+    results = run_startup_benchmark(args.db, args.runs)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {args.output}")
+    failed = results["eager_imports"] or any(result["errors"] for result in results["first_render"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,12 +3,10 @@ Competitive Programming Platform - Main Entry Point
 """
 import streamlit as st
 from auth import (
-    ensure_db_initialized, login, register, logout,
+    warm_up_db, login, register, logout,
     is_logged_in, is_admin, get_current_username
 )
-
-# Initialize database on startup
-ensure_db_initialized()
+from metrics import track_page
 
 # Page config
 st.set_page_config(
@@ -93,7 +91,7 @@ def show_home_page():
     # Main content
     st.markdown('<p class="main-header">🏆 CP Platform</p>', unsafe_allow_html=True)
     
-    col1, col2, col3 = st.columns(3)
+    col1, col2, col3, col4, col5 = st.columns(5)
     
     with col1:
         st.markdown("### 📊 Dashboard")
@@ -113,6 +111,18 @@ def show_home_page():
         if st.button("View Leaderboard →", key="lead_btn"):
             st.switch_page("pages/3_Leaderboard.py")
     
+    with col4:
+        st.markdown("### 🏁 Contests")
+        st.markdown("Follow live standings of time-boxed contests.")
+        if st.button("View Contests →", key="contest_btn"):
+            st.switch_page("pages/5_Contests.py")
+    
+    with col5:
+        st.markdown("### 👥 Groups")
+        st.markdown("Compare your cohort and team rankings.")
+        if st.button("View Groups →", key="group_btn"):
+            st.switch_page("pages/6_Groups.py")
+    
     if is_admin():
         st.divider()
         st.markdown("### 🛡️ Admin Panel")
@@ -122,7 +132,11 @@ def show_home_page():
 
 
 # Main routing
-if is_logged_in():
-    show_home_page()
-else:
-    show_login_page()
+with track_page("home"):
+    if is_logged_in():
+        show_home_page()
+    else:
+        show_login_page()
+
+# Initialize the database in the background once the page is drawn; login/register wait for it
+warm_up_db()
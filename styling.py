@@ -0,0 +1,20 @@
+"""
+Shared table styling for Competitive Programming Platform pages.
+"""
+
+HIGHLIGHT_STYLE = "background-color: #1e3a5f"
+
+
+def highlight(df, mask):
+    """
+    Style the rows of `df` where the boolean array `mask` is set, with one
+    vectorized style frame instead of a per-row callback.
+    """
+    import numpy as np
+    import pandas as pd
+    styles = pd.DataFrame(
+        np.where(np.broadcast_to(mask[:, None], df.shape), HIGHLIGHT_STYLE, ""),
+        index=df.index,
+        columns=df.columns
+    )
+    return df.style.apply(lambda _: styles, axis=None)